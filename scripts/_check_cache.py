@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Opt-in result cache for self_check.
+
+A check is cacheable when it declares `inputs` (repo-relative globs) in its
+*.checks.json entry. The key hashes the command, the values of `cache_env`
+variables and the content of every input file; a hit replays pass/fail,
+stdout/stderr and the artifacts dir. Failures are only cached when the check
+sets `cache_failures: true` (most failures here are environmental, e.g. a
+missing Playwright, and must re-run once the machine is fixed).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+CACHE_REL = Path(".sddai") / "check_cache"
+CACHE_VERSION = "1"
+
+
+def _input_files(repo: Path, patterns: list) -> list:
+    files = set()
+    for pat in patterns:
+        for p in repo.glob(pat):
+            if p.is_file() and "__pycache__" not in p.parts:
+                files.add(p)
+    return sorted(files)
+
+
+def cache_key(repo: Path, chk: Dict[str, Any]) -> Optional[str]:
+    inputs = chk.get("inputs")
+    if not inputs:
+        return None
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    h = hashlib.sha256()
+    h.update(f"v{CACHE_VERSION}\0{chk.get('cmd', '')}\0".encode("utf-8"))
+    for var in sorted(chk.get("cache_env", [])):
+        h.update(f"{var}={os.environ.get(var, '')}\0".encode("utf-8"))
+    for p in _input_files(repo, inputs):
+        h.update(p.relative_to(repo).as_posix().encode("utf-8") + b"\0")
+        with p.open("rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def load(repo: Path, key: str, artifacts_dir: Path, log_prefix: Path) -> Optional[Dict[str, Any]]:
+    """Return the cached result (artifacts restored into `artifacts_dir`, logs next to `log_prefix`) or None."""
+    entry = repo / CACHE_REL / key
+    try:
+        res = json.loads((entry / "result.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    cached_art = entry / "artifacts"
+    if cached_art.exists():
+        shutil.copytree(cached_art, artifacts_dir, dirs_exist_ok=True)
+    res["artifacts_dir"] = str(artifacts_dir)
+    for stream in ("stdout", "stderr"):
+        cached_log = entry / f"{stream}.log"
+        if cached_log.exists():
+            dst = log_prefix.with_name(f"{log_prefix.name}.{stream}.log")
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(cached_log, dst)
+            res[f"{stream}_log"] = str(dst)
+    res["cached_seconds"] = res.get("seconds", 0.0)
+    res["seconds"] = 0.0
+    res["cache"] = "hit"
+    return res
+
+
+def store(repo: Path, key: str, chk: Dict[str, Any], result: Dict[str, Any], artifacts_dir: Path) -> None:
+    if result.get("returncode") == 124:  # timeouts say nothing about the inputs
+        return
+    if not result.get("pass") and not chk.get("cache_failures", False):
+        return
+    base = repo / CACHE_REL
+    tmp = base / f".tmp-{uuid.uuid4().hex}"
+    try:
+        tmp.mkdir(parents=True, exist_ok=True)
+        data = {k: v for k, v in result.items() if k not in ("artifacts_dir", "cache", "stdout_log", "stderr_log")}
+        (tmp / "result.json").write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        if artifacts_dir.exists() and any(artifacts_dir.iterdir()):
+            shutil.copytree(artifacts_dir, tmp / "artifacts")
+        for stream in ("stdout", "stderr"):
+            log = result.get(f"{stream}_log")
+            if log and Path(log).exists():
+                shutil.copyfile(log, tmp / f"{stream}.log")
+        dst = base / key
+        if dst.exists():
+            shutil.rmtree(dst, ignore_errors=True)
+        os.replace(tmp, dst)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Bounded-concurrency DAG scheduler for self_check.
+
+Each check may declare (all optional) in specs/*.checks.json:
+- depends_on: ["other check name" | "suite_id::check name" | "suite_id"]
+- exclusive: true            -> runs with nothing else in flight
+- resource: "browser" | [...] -> at most one running check holds each named resource
+
+Nodes are keyed "suite_id::check name"; a repeated name in one suite gets
+"#2", "#3", ... so every check keeps its own result, logs and artifacts
+(depends_on / --only by plain name still cover all of them).
+
+select_checks() narrows a plan for --only/--skip; run_scheduled(fail_fast=True)
+stops starting checks after the first failure.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+def check_id(suite_id: str, name: str) -> str:
+    return f"{suite_id}::{name}"
+
+
+def slug(s: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", s).strip("_")[:80] or "check"
+
+
+def _as_list(v: Any) -> List[str]:
+    if v is None:
+        return []
+    if isinstance(v, str):
+        return [v]
+    return [str(x) for x in v]
+
+
+def plan_checks(suites: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Flatten suites into nodes (definition order) with resolved deps; bad deps/cycles set node["error"]."""
+    nodes: List[Dict[str, Any]] = []
+    by_suite: Dict[str, List[str]] = {}
+    by_name: Dict[str, List[str]] = {}  # "suite::name" -> ids of every check with that name
+    dirs: set = set()
+    for si, suite in enumerate(suites):
+        for ci, chk in enumerate(suite["checks"]):
+            name = chk.get("name", "unnamed")
+            base = check_id(suite["id"], name)
+            same = by_name.setdefault(base, [])
+            nid = base if not same else f"{base}#{len(same) + 1}"
+            # logs/artifacts dir; distinct names can slug alike too
+            d = slug(name) if not same else f"{slug(name)}_{len(same) + 1}"
+            while (suite["id"], d) in dirs:
+                d += "_"
+            dirs.add((suite["id"], d))
+            same.append(nid)
+            nodes.append({
+                "id": nid,
+                "name_id": base,
+                "dir": d,
+                "suite_index": si,
+                "check_index": ci,
+                "suite_id": suite["id"],
+                "chk": chk,
+                "exclusive": bool(chk.get("exclusive", False)),
+                "resources": _as_list(chk.get("resource")),
+                "deps": [],
+                "error": "",
+            })
+            by_suite.setdefault(suite["id"], []).append(nid)
+
+    ids = {n["id"] for n in nodes}
+    for n in nodes:
+        deps: List[str] = []
+        for dep in _as_list(n["chk"].get("depends_on")):
+            if dep in by_name:
+                deps.extend(by_name[dep])
+            elif dep in ids:
+                deps.append(dep)
+            elif check_id(n["suite_id"], dep) in by_name:
+                deps.extend(by_name[check_id(n["suite_id"], dep)])
+            elif dep in by_suite:
+                deps.extend(by_suite[dep])
+            else:
+                n["error"] = f"unknown dependency: {dep}"
+        n["deps"] = list(dict.fromkeys(d for d in deps if d != n["id"]))
+
+    # Kahn: whatever is never released sits on a cycle
+    indeg = {n["id"]: len(n["deps"]) for n in nodes}
+    users: Dict[str, List[str]] = {}
+    for n in nodes:
+        for d in n["deps"]:
+            users.setdefault(d, []).append(n["id"])
+    queue = [i for i, k in indeg.items() if k == 0]
+    while queue:
+        cur = queue.pop()
+        for u in users.get(cur, []):
+            indeg[u] -= 1
+            if indeg[u] == 0:
+                queue.append(u)
+    for n in nodes:
+        if indeg[n["id"]] > 0 and not n["error"]:
+            n["error"] = "dependency cycle"
+    return nodes
+
+
+def _selected(node: Dict[str, Any], patterns: List[str]) -> bool:
+    return any(p in (node["id"], node["name_id"], node["suite_id"]) or fnmatch.fnmatchcase(node["id"], p)
+               for p in patterns)
+
+
+def select_checks(nodes: List[Dict[str, Any]], only: Optional[List[str]] = None,
+                  skip: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Subset of a plan. Patterns are check ids ("suite_id::check name"), suite ids or globs over check ids.
+
+    `only` also keeps the transitive dependencies of what it selects (they must run
+    first); dependencies on `skip`ped checks are dropped rather than failing.
+    """
+    by_id = {n["id"]: n for n in nodes}
+    keep = set(by_id)
+    if only:
+        keep = set()
+        stack = [n["id"] for n in nodes if _selected(n, only)]
+        while stack:
+            nid = stack.pop()
+            if nid not in keep:
+                keep.add(nid)
+                stack.extend(by_id[nid]["deps"])
+    if skip:
+        keep -= {n["id"] for n in nodes if _selected(n, skip)}
+    return [dict(n, deps=[d for d in n["deps"] if d in keep]) for n in nodes if n["id"] in keep]
+
+
+def run_scheduled(
+    nodes: List[Dict[str, Any]],
+    run_one: Callable[[Dict[str, Any]], Dict[str, Any]],
+    skip_result: Callable[[Dict[str, Any], str], Dict[str, Any]],
+    jobs: int = 1,
+    on_done: Optional[Callable[[Dict[str, Any], Dict[str, Any]], None]] = None,
+    fail_fast: bool = False,
+    stop_event: Optional[threading.Event] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Run nodes respecting deps/exclusive/resources with at most `jobs` in flight.
+
+    Ready nodes start in definition order. A node whose dependency failed (or whose
+    plan has an error) is not run; `skip_result(node, reason)` supplies its result.
+    With `fail_fast`, the first failure sets `stop_event` (runners use it to kill
+    what is in flight) and every node not yet started is skipped.
+    """
+    jobs = max(1, jobs)
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = list(nodes)
+    running: Dict[str, Dict[str, Any]] = {}
+    held: set = set()
+    cond = threading.Condition()
+    aborted: List[str] = []
+
+    def finish(node: Dict[str, Any], res: Dict[str, Any]) -> None:
+        results[node["id"]] = res
+        if fail_fast and not aborted and not res.get("pass"):
+            aborted.append(node["id"])
+            if stop_event is not None:
+                stop_event.set()
+        if on_done is not None:
+            on_done(node, res)
+
+    def worker(node: Dict[str, Any]) -> None:
+        try:
+            res = run_one(node)
+        except Exception as e:  # a crashing runner must not wedge the scheduler
+            res = skip_result(node, f"runner error: {e}")
+        with cond:
+            running.pop(node["id"], None)
+            held.difference_update(node["resources"])
+            try:
+                finish(node, res)
+            finally:
+                # on_done raising here would otherwise leave the main loop waiting forever
+                cond.notify_all()
+
+    def can_start(node: Dict[str, Any]) -> bool:
+        if len(running) >= jobs:
+            return False
+        if any(r["exclusive"] for r in running.values()):
+            return False
+        if node["exclusive"] and running:
+            return False
+        return not held.intersection(node["resources"])
+
+    with ThreadPoolExecutor(max_workers=jobs) as ex:
+        with cond:
+            while pending:
+                if aborted:
+                    for node in pending:
+                        finish(node, skip_result(node, f"fail-fast: {aborted[0]} failed"))
+                    pending = []
+                    break
+                progressed = False
+                for node in list(pending):
+                    if aborted:
+                        break
+                    if node["error"]:
+                        pending.remove(node)
+                        finish(node, skip_result(node, node["error"]))
+                        progressed = True
+                        continue
+                    if any(d not in results for d in node["deps"]):
+                        continue
+                    failed = [d for d in node["deps"] if not results[d].get("pass")]
+                    if failed:
+                        pending.remove(node)
+                        finish(node, skip_result(node, f"dependency failed: {failed[0]}"))
+                        progressed = True
+                        continue
+                    if not can_start(node):
+                        continue
+                    pending.remove(node)
+                    running[node["id"]] = node
+                    held.update(node["resources"])
+                    ex.submit(worker, node)
+                    progressed = True
+                if pending and not progressed:
+                    cond.wait()
+            while running:
+                cond.wait()
+    return results
@@ -4,6 +4,8 @@
 from __future__ import annotations
 
 import json
+import os
+import struct
 from pathlib import Path
 from typing import Dict, List
 
@@ -13,44 +15,176 @@ def tail_text(s: str, n: int = 30) -> str:
     return "\n".join(lines[-n:])
 
 
+_RULES = None
+
+
+def _quick_fix_rules():
+    global _RULES
+    if _RULES is None:
+        from ai_apply.rule_engine import load_rule_set
+        _RULES = load_rule_set(Path(__file__).resolve().parents[1])
+    return _RULES
+
+
 def guess_quick_fix(stdout: str, stderr: str) -> str:
-    t = (stdout or "") + "\n" + (stderr or "")
-    tl = t.lower()
-
-    if "playwright missing" in tl or ("playwright" in tl and "python -m playwright install" in tl):
-        return "安装自检依赖：pip install -r requirements-dev.txt && python -m playwright install"
-    if "modulenotfounderror" in tl and "pillow" in tl:
-        return "安装 Pillow：pip install -r requirements-dev.txt"
-    if "no graph spider entry found" in tl or "entry not found" in tl:
-        return "检查入口文件：web/graph_spider/index.html（或 v2/v4）；如 Qt 仍指向旧路径，做一个跳转入口保持兼容。"
-    if "blank-like" in tl or "looks blank" in tl:
-        return "页面可能没渲染：检查 index.html 是否包含 canvas+脚本；检查 JS 控制台报错；确认 nodes/links 至少 >0。"
-    if "hover interaction not detected" in tl or "hover not detected" in tl:
-        return "Hover 未触发：确保 mousemove 设置 hovered 节点，并在 draw 时放大节点、加粗/变亮相邻边。"
-    if "timeout" in tl:
-        return "疑似卡死/过慢：减少首屏节点数量（LOD），或先渲染骨架图再增量更新。"
-    if "patch does not apply" in tl:
-        return "Patch 不能 apply：确认基线版本一致；优先生成更小补丁只改必要文件。"
-
-    return "先看 report.md 的 FAIL 项 stderr/stdout tail；定位入口/报错文件，再做最小修复。"
+    """First matching rule of ai/DETECTORS/quick_fix_rules.json (one pass over the combined output)."""
+    rules = _quick_fix_rules()
+    hit = rules.first_text((stdout or "") + "\n" + (stderr or ""), "quick_fix")
+    if hit is not None:
+        return hit.get("fix", "")
+    return rules.defaults.get("quick_fix", "")
 
 
-def load_recent_errors(index_jsonl: Path, limit: int = 5) -> List[Dict]:
-    if not index_jsonl.exists():
-        return []
-    lines = index_jsonl.read_text(encoding="utf-8", errors="ignore").splitlines()
+OFFSET = struct.Struct("<Q")
+TAIL_BLOCK = 64 * 1024
+# compaction keeps this many full error sets; older ones survive only as counters in stats.json
+KEEP_RECENT = 200
+
+
+def _offsets_path(index_jsonl: Path) -> Path:
+    return index_jsonl.with_name(index_jsonl.stem + ".offsets")
+
+
+def _stats_path(index_jsonl: Path) -> Path:
+    return index_jsonl.with_name("stats.json")
+
+
+def _parse(lines: List[bytes]) -> List[Dict]:
     out: List[Dict] = []
-    for ln in reversed(lines):
+    for ln in lines:
         ln = ln.strip()
         if not ln:
             continue
         try:
-            out.append(json.loads(ln))
+            out.append(json.loads(ln.decode("utf-8", errors="ignore")))
         except Exception:
             continue
-        if len(out) >= limit:
-            break
-    return list(reversed(out))
+    return out
+
+
+def tail_records(index_jsonl: Path, limit: int) -> List[Dict]:
+    """Reverse tail reader: seek back from EOF block by block until `limit` records are found."""
+    out: List[Dict] = []
+    with index_jsonl.open("rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = b""
+        while pos > 0 and len(out) < limit:
+            step = min(TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+            parts = buf.split(b"\n")
+            buf = parts[0]  # possibly partial line; completed by the next block
+            out = _parse(parts[1:]) + out
+        if pos == 0 and buf and len(out) < limit:
+            out = _parse([buf]) + out
+    return out[-limit:] if limit > 0 else []
+
+
+def _valid_offsets(index_jsonl: Path, offsets: Path) -> bool:
+    """Cheap O(1) consistency check: the last offset must start the last line of the index."""
+    try:
+        n = offsets.stat().st_size
+        size = index_jsonl.stat().st_size
+    except OSError:
+        return False
+    if n == 0 or n % OFFSET.size:
+        return n == 0 and size == 0
+    with offsets.open("rb") as f:
+        f.seek(n - OFFSET.size)
+        last = OFFSET.unpack(f.read(OFFSET.size))[0]
+    if last >= size:
+        return False
+    with index_jsonl.open("rb") as f:
+        if last > 0:
+            f.seek(last - 1)
+            if f.read(1) != b"\n":
+                return False
+        f.seek(last)
+        return b"\n" not in f.read().rstrip(b"\n")
+
+
+def rebuild_offsets(index_jsonl: Path) -> None:
+    """One pass over the index to recreate the sidecar (after manual edits or upgrades)."""
+    offs = []
+    pos = 0
+    with index_jsonl.open("rb") as f:
+        for ln in f:
+            if ln.strip():
+                offs.append(pos)
+            pos += len(ln)
+    tmp = _offsets_path(index_jsonl).with_suffix(".offsets.tmp")
+    tmp.write_bytes(b"".join(OFFSET.pack(o) for o in offs))
+    os.replace(tmp, _offsets_path(index_jsonl))
+
+
+def load_recent_errors(index_jsonl: Path, limit: int = 5) -> List[Dict]:
+    """Last `limit` error sets, oldest first; constant time via the offsets sidecar."""
+    if not index_jsonl.exists() or limit <= 0:
+        return []
+    offsets = _offsets_path(index_jsonl)
+    if not _valid_offsets(index_jsonl, offsets):
+        return tail_records(index_jsonl, limit)
+    with offsets.open("rb") as f:
+        f.seek(0, os.SEEK_END)
+        count = f.tell() // OFFSET.size
+        if count == 0:
+            return []
+        f.seek((count - min(limit, count)) * OFFSET.size)
+        start = OFFSET.unpack(f.read(OFFSET.size))[0]
+    with index_jsonl.open("rb") as f:
+        f.seek(start)
+        return _parse(f.read().split(b"\n"))[-limit:]
+
+
+def _failure_key(f: Dict) -> str:
+    return "\x1f".join([str(f.get("suite_id", "")), str(f.get("check_name", "")), str(f.get("quick_fix", ""))])
+
+
+def _fold(stats: Dict, error_set: Dict) -> None:
+    ts = error_set.get("timestamp", "")
+    for f in error_set.get("failures", []):
+        key = _failure_key(f)
+        cur = stats["failures"].get(key)
+        if cur is None:
+            stats["failures"][key] = {
+                "suite_id": f.get("suite_id"), "check_name": f.get("check_name"), "quick_fix": f.get("quick_fix"),
+                "count": 1, "first_seen": ts, "last_seen": ts,
+            }
+        else:
+            cur["count"] += 1
+            cur["last_seen"] = ts
+
+
+def load_failure_stats(repo: Path) -> Dict:
+    """Deduplicated (suite_id, check_name, quick_fix) counters with first/last-seen timestamps."""
+    base = repo / "issue_memory" / "errors"
+    sp = _stats_path(base / "index.jsonl")
+    try:
+        return json.loads(sp.read_text(encoding="utf-8"))
+    except Exception:
+        return {"version": 1, "failures": {}}
+
+
+def _write_json_atomic(path: Path, obj: Dict) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def compact_index(repo: Path, keep_recent: int = KEEP_RECENT) -> None:
+    """Trim index.jsonl to the last `keep_recent` error sets; counters already live in stats.json."""
+    idx = repo / "issue_memory" / "errors" / "index.jsonl"
+    if not idx.exists():
+        return
+    recent = load_recent_errors(idx, keep_recent)
+    tmp = idx.with_suffix(".jsonl.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        for es in recent:
+            f.write(json.dumps(es, ensure_ascii=False) + "\n")
+    os.replace(tmp, idx)
+    rebuild_offsets(idx)
 
 
 def write_latest(repo: Path, error_set: Dict) -> None:
@@ -67,9 +201,35 @@ def write_latest(repo: Path, error_set: Dict) -> None:
     (base / "latest.md").write_text("".join(md), encoding="utf-8")
 
 
-def append_index(repo: Path, error_set: Dict) -> None:
+def append_index(repo: Path, error_set: Dict, keep_recent: int = KEEP_RECENT) -> None:
     base = repo / "issue_memory" / "errors"
     base.mkdir(parents=True, exist_ok=True)
     idx = base / "index.jsonl"
-    with idx.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(error_set, ensure_ascii=False) + "\n")
+    offsets = _offsets_path(idx)
+    if idx.exists() and not _valid_offsets(idx, offsets):
+        rebuild_offsets(idx)
+
+    # counters first: a history from before stats.json existed is folded in once
+    sp = _stats_path(idx)
+    if sp.exists():
+        stats = load_failure_stats(repo)
+    else:
+        stats = {"version": 1, "failures": {}}
+        if idx.exists():
+            with idx.open("rb") as f:
+                for es in _parse(f.readlines()):
+                    _fold(stats, es)
+    _fold(stats, error_set)
+    _write_json_atomic(sp, stats)
+
+    line = (json.dumps(error_set, ensure_ascii=False) + "\n").encode("utf-8")
+    with idx.open("ab") as f:
+        f.seek(0, os.SEEK_END)
+        start = f.tell()
+        f.write(line)
+    with offsets.open("ab") as f:
+        f.write(OFFSET.pack(start))
+
+    # amortized compaction: rewrite only once the history doubles past keep_recent
+    if offsets.stat().st_size // OFFSET.size > 2 * keep_recent:
+        compact_index(repo, keep_recent)
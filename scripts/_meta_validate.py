@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Schema + referential-integrity validation for meta/pipeline_graph.json.
+
+One parse, one pass over each array (O(N+E)):
+- schema: meta_pipeline_graph.schema.json through the compiled _schema_lite checker
+- duplicate ids across phases/modules/contracts, duplicate edge ids
+- dangling edges: source/target must be a phase, module, contract or doc:<name>
+  (with `root`, doc:<name> must also exist as docs/<name>.md, the path
+  sync_doc_links writes to)
+- unknown phases on modules, orphan positions, unknown ui.summary.pinned ids
+
+Every problem is {"path": <JSON pointer>, "code": ..., "message": ...}.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from _schema_lite import validate as validate_schema
+
+SCHEMA_REL = Path("specs") / "contract_output" / "meta_pipeline_graph.schema.json"
+DEFAULT_MAX_PROBLEMS = 200
+
+
+def _problem(path: str, code: str, message: str) -> Dict[str, str]:
+    return {"path": path, "code": code, "message": message}
+
+
+def check_references(data: Dict[str, Any], root: Optional[Path] = None) -> List[Dict[str, str]]:
+    """Referential checks only (assumes the document is roughly schema-shaped; wrong types are skipped)."""
+    problems: List[Dict[str, str]] = []
+    ids: Dict[str, str] = {}  # id -> pointer of its first definition
+    phase_ids = set()
+
+    for section in ("phases", "modules", "contracts"):
+        items = data.get(section)
+        if not isinstance(items, list):
+            continue
+        for i, item in enumerate(items):
+            nid = item.get("id") if isinstance(item, dict) else None
+            if not isinstance(nid, str):
+                continue
+            where = f"/{section}/{i}/id"
+            first = ids.get(nid)
+            if first is not None:
+                problems.append(_problem(where, "duplicate_id", f"id {nid!r} already defined at {first}"))
+                continue
+            ids[nid] = where
+            if section == "phases":
+                phase_ids.add(nid)
+
+    for i, m in enumerate(data.get("modules") or []):
+        ph = m.get("phase") if isinstance(m, dict) else None
+        if isinstance(ph, str) and ph and ph not in phase_ids:
+            problems.append(_problem(f"/modules/{i}/phase", "unknown_phase", f"phase {ph!r} is not in /phases"))
+
+    doc_ok: Dict[str, bool] = {}
+
+    def known(node_id: str) -> bool:
+        if node_id in ids:
+            return True
+        if not node_id.startswith("doc:") or len(node_id) <= 4:
+            return False
+        if root is None:
+            return True
+        hit = doc_ok.get(node_id)
+        if hit is None:
+            hit = doc_ok[node_id] = (root / "docs" / f"{node_id[4:]}.md").is_file()
+        return hit
+
+    edge_ids: Dict[str, int] = {}
+    edges = data.get("edges")
+    for i, e in enumerate(edges if isinstance(edges, list) else []):
+        if not isinstance(e, dict):
+            continue
+        eid = e.get("id")
+        if isinstance(eid, str):
+            first = edge_ids.get(eid)
+            if first is not None:
+                problems.append(_problem(f"/edges/{i}/id", "duplicate_edge_id", f"edge id {eid!r} already used by /edges/{first}"))
+            else:
+                edge_ids[eid] = i
+        for end in ("source", "target"):
+            ref = e.get(end)
+            if isinstance(ref, str) and not known(ref):
+                problems.append(_problem(f"/edges/{i}/{end}", "dangling_edge",
+                                         f"{end} {ref!r} is not a phase, module, contract or existing doc: node"))
+
+    positions = data.get("positions")
+    if isinstance(positions, dict):
+        for key in positions:
+            if not known(key):
+                esc = key.replace("~", "~0").replace("/", "~1")
+                problems.append(_problem(f"/positions/{esc}", "orphan_position", f"position for unknown node {key!r}"))
+
+    summary = (data.get("ui") or {}).get("summary") if isinstance(data.get("ui"), dict) else None
+    if isinstance(summary, dict) and isinstance(summary.get("pinned"), list):
+        for i, pid in enumerate(summary["pinned"]):
+            if isinstance(pid, str) and not known(pid):
+                problems.append(_problem(f"/ui/summary/pinned/{i}", "unknown_pinned", f"pinned id {pid!r} does not exist"))
+
+    return problems
+
+
+def validate_meta(data: Any, schema_path: Path, root: Optional[Path] = None,
+                  max_problems: int = DEFAULT_MAX_PROBLEMS) -> List[Dict[str, str]]:
+    """Schema problems first, then referential ones; at most `max_problems`."""
+    problems = [_problem(e["path"], f"schema.{e['validator']}", e["message"])
+                for e in validate_schema(schema_path, data, max_problems)]
+    if isinstance(data, dict):
+        problems.extend(check_references(data, root))
+    return problems[:max_problems]
+
+
+def validate_meta_file(meta_path: Path, schema_root: Path, docs_root: Optional[Path] = None,
+                       max_problems: int = DEFAULT_MAX_PROBLEMS) -> List[Dict[str, str]]:
+    """Validate a meta file against <schema_root>/SCHEMA_REL; doc: ids are checked under `docs_root` if given."""
+    try:
+        data = json.loads(meta_path.read_text(encoding="utf-8"))
+    except ValueError as e:
+        return [_problem("/", "invalid_json", str(e))]
+    return validate_meta(data, schema_root / SCHEMA_REL, docs_root, max_problems)
+
+
+def format_problems(problems: List[Dict[str, str]], limit: int = 20) -> str:
+    lines = [f"- {p['path']}: [{p['code']}] {p['message']}" for p in problems[:limit]]
+    if len(problems) > limit:
+        lines.append(f"- ... +{len(problems) - limit} more")
+    return "\n".join(lines)
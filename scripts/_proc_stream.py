@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Streaming subprocess runner with bounded memory.
+
+Child stdout/stderr are teed line by line to log files as they arrive; only
+the last `tail_lines` lines of each stream are kept in memory. Log files stop
+growing at `max_log_bytes` (the child is still drained so it never blocks).
+"""
+
+from __future__ import annotations
+
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+DEFAULT_TAIL_LINES = 200
+DEFAULT_MAX_LOG_BYTES = 20 * 1024 * 1024
+
+
+def _kill_tree(p: subprocess.Popen) -> None:
+    try:
+        if os.name == "nt":
+            subprocess.run(f"taskkill /T /F /PID {p.pid}", shell=True, capture_output=True)
+        else:
+            os.killpg(p.pid, signal.SIGKILL)
+    except Exception:
+        pass
+    try:
+        p.kill()
+    except Exception:
+        pass
+
+
+def _pump(pipe, log_path: Path, tail: deque, max_log_bytes: int, stats: Dict[str, int],
+          on_line: Optional[Callable[[str], None]]) -> None:
+    written = 0
+    capped = False
+    with log_path.open("wb") as log:
+        for raw in iter(pipe.readline, b""):
+            stats["bytes"] += len(raw)
+            if not capped:
+                if written + len(raw) <= max_log_bytes:
+                    log.write(raw)
+                    log.flush()
+                    written += len(raw)
+                else:
+                    log.write(f"\n[log truncated at {max_log_bytes} bytes]\n".encode("utf-8"))
+                    capped = True
+                    stats["truncated"] = 1
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            tail.append(line)
+            if on_line is not None:
+                on_line(line)
+    pipe.close()
+
+
+def run_streaming(
+    cmd: str,
+    cwd: Path,
+    timeout_sec: int,
+    stdout_log: Path,
+    stderr_log: Path,
+    env: Optional[Dict[str, str]] = None,
+    tail_lines: int = DEFAULT_TAIL_LINES,
+    max_log_bytes: int = DEFAULT_MAX_LOG_BYTES,
+    on_stdout: Optional[Callable[[str], None]] = None,
+    on_stderr: Optional[Callable[[str], None]] = None,
+    stop_event: Optional[threading.Event] = None,
+) -> Dict[str, object]:
+    """Run `cmd` in a shell; return returncode, stdout/stderr tails, seconds, byte counts, log paths.
+
+    Timeouts kill the whole process tree and return 124 (same code as before).
+    Setting `stop_event` kills the child early and returns 130.
+    """
+    stdout_log.parent.mkdir(parents=True, exist_ok=True)
+    stderr_log.parent.mkdir(parents=True, exist_ok=True)
+    t0 = time.time()
+    kwargs = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP} if os.name == "nt" else {"start_new_session": True}
+    p = subprocess.Popen(cmd, cwd=str(cwd), shell=True, env=env, stdin=subprocess.DEVNULL,
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs)
+    out_tail: deque = deque(maxlen=tail_lines)
+    err_tail: deque = deque(maxlen=tail_lines)
+    out_stats = {"bytes": 0, "truncated": 0}
+    err_stats = {"bytes": 0, "truncated": 0}
+    readers = [
+        threading.Thread(target=_pump, args=(p.stdout, stdout_log, out_tail, max_log_bytes, out_stats, on_stdout), daemon=True),
+        threading.Thread(target=_pump, args=(p.stderr, stderr_log, err_tail, max_log_bytes, err_stats, on_stderr), daemon=True),
+    ]
+    for t in readers:
+        t.start()
+
+    rc: Optional[int] = None
+    note = ""
+    deadline = t0 + timeout_sec
+    while rc is None:
+        try:
+            rc = p.wait(timeout=0.2)
+        except subprocess.TimeoutExpired:
+            if time.time() >= deadline:
+                _kill_tree(p)
+                p.wait()
+                rc, note = 124, "[TIMEOUT]"
+            elif stop_event is not None and stop_event.is_set():
+                _kill_tree(p)
+                p.wait()
+                rc, note = 130, "[CANCELLED]"
+    for t in readers:
+        t.join(timeout=5)
+    if note:
+        err_tail.append(note)
+
+    return {
+        "returncode": rc,
+        "stdout": "\n".join(out_tail),
+        "stderr": "\n".join(err_tail),
+        "seconds": time.time() - t0,
+        "stdout_log": str(stdout_log),
+        "stderr_log": str(stderr_log),
+        "stdout_bytes": out_stats["bytes"],
+        "stderr_bytes": err_stats["bytes"],
+        "log_truncated": bool(out_stats["truncated"] or err_stats["truncated"]),
+    }
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Line-buffered writer for events.jsonl (specs/contract_output/run_events.schema.json).
+
+Every line is flushed as soon as it is written so a tailing reader (RunLoader
+"Enhanced" mode, CI log followers) sees progress while the run is in flight.
+Each event carries `ts` (UTC ISO-8601) and `t_ms` (ms since the run started);
+step_exit events also carry `duration_ms`.
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+
+def iso_now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class EventWriter:
+    def __init__(self, path: Path, run_id: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.run_id = run_id
+        self._f = path.open("a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+        self._t0 = time.monotonic()
+        self._entered: Dict[str, float] = {}
+
+    def emit(self, event: str, step_id: str, **fields: Any) -> None:
+        rec = {"run_id": self.run_id, "event": event, "step_id": step_id, "ts": iso_now(),
+               "t_ms": int((time.monotonic() - self._t0) * 1000)}
+        rec.update({k: v for k, v in fields.items() if v is not None})
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._f.closed:
+                return
+            self._f.write(line)
+            self._f.flush()
+
+    def step_enter(self, step_id: str, **fields: Any) -> None:
+        self._entered[step_id] = time.monotonic()
+        self.emit("step_enter", step_id, **fields)
+
+    def step_exit(self, step_id: str, status: str, **fields: Any) -> None:
+        t = self._entered.pop(step_id, None)
+        duration_ms = int((time.monotonic() - t) * 1000) if t is not None else 0
+        self.emit("step_exit", step_id, status=status, duration_ms=duration_ms, **fields)
+
+    def entered(self, step_id: str) -> bool:
+        return step_id in self._entered
+
+    def close(self) -> None:
+        with self._lock:
+            self._f.close()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Small compiled JSON Schema validator for the subset our contract schemas use
+(specs/contract_*/*.schema.json): type, enum, const, required, properties,
+additionalProperties (bool or schema), items, minimum/maximum, minItems,
+minLength. Annotations ($schema, $id, title, description, default, examples)
+are ignored.
+
+A schema is compiled once into nested closures, so validating a meta with
+100k edges costs one Python call per value rather than a keyword dispatch per
+value (which is where jsonschema spends its time). Error paths are kept as
+linked (parent, key) tuples and only turned into JSON pointers for values that
+fail.
+
+Schemas that use any other keyword raise UnsupportedSchema; validate() falls
+back to jsonschema for those. Both kinds of compiled validator live in one
+cache keyed by the schema file's (mtime_ns, size); tools/checks/schema_cache.py
+uses the jsonschema side of it.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import jsonschema  # type: ignore
+    from jsonschema.validators import validator_for  # type: ignore
+except Exception:
+    jsonschema = None
+
+ANNOTATIONS = {"$schema", "$id", "title", "description", "default", "examples", "$comment"}
+SUPPORTED = {"type", "enum", "const", "required", "properties", "additionalProperties", "items",
+             "minimum", "maximum", "minItems", "minLength"} | ANNOTATIONS
+
+Path_ = Optional[Tuple[Any, Any]]  # (parent, key) chain; None is the document root
+Check = Callable[[Any, Path_, list], None]
+
+
+class UnsupportedSchema(ValueError):
+    pass
+
+
+class _Enough(Exception):
+    """Raised by _err once the error list is full; ends the walk early."""
+
+
+class _Errors(list):
+    __slots__ = ("limit",)
+
+
+def pointer(path: Path_) -> str:
+    parts = []
+    while path is not None:
+        path, key = path
+        parts.append(str(key).replace("~", "~0").replace("/", "~1"))
+    return "".join("/" + p for p in reversed(parts)) or "/"
+
+
+def _is_type(t: str) -> Callable[[Any], bool]:
+    if t == "object":
+        return lambda v: isinstance(v, dict)
+    if t == "array":
+        return lambda v: isinstance(v, list)
+    if t == "string":
+        return lambda v: isinstance(v, str)
+    if t == "boolean":
+        return lambda v: isinstance(v, bool)
+    if t == "null":
+        return lambda v: v is None
+    if t == "number":
+        return lambda v: isinstance(v, (int, float)) and not isinstance(v, bool)
+    if t == "integer":
+        return lambda v: (isinstance(v, int) and not isinstance(v, bool)) or (isinstance(v, float) and v.is_integer())
+    raise UnsupportedSchema(f"unknown type {t!r}")
+
+
+def _err(errors: list, path: Path_, message: str, keyword: str) -> None:
+    errors.append({"path": pointer(path), "message": message, "validator": keyword})
+    if len(errors) >= getattr(errors, "limit", float("inf")):
+        raise _Enough
+
+
+def compile_schema(schema: Any) -> Check:
+    """Compile `schema` into check(value, path, errors) that appends {path, message, validator}."""
+    if schema is True or schema == {}:
+        return lambda v, p, e: None
+    if schema is False:
+        return lambda v, p, e: _err(e, p, "no value is allowed here", "false")
+    if not isinstance(schema, dict):
+        raise UnsupportedSchema(f"schema must be an object or boolean, got {type(schema).__name__}")
+    unknown = set(schema) - SUPPORTED
+    if unknown:
+        raise UnsupportedSchema(f"unsupported keyword(s): {', '.join(sorted(unknown))}")
+
+    checks: List[Check] = []
+
+    if "type" in schema:
+        types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        preds = [_is_type(t) for t in types]
+        want = " or ".join(types)
+        if len(preds) == 1:
+            pred = preds[0]
+
+            def c_type(v, p, e, pred=pred):
+                if not pred(v):
+                    _err(e, p, f"{json.dumps(v)[:80]} is not of type {want}", "type")
+        else:
+            def c_type(v, p, e):
+                if not any(f(v) for f in preds):
+                    _err(e, p, f"{json.dumps(v)[:80]} is not of type {want}", "type")
+        checks.append(c_type)
+
+    if "enum" in schema:
+        options = schema["enum"]
+        hashable = all(isinstance(o, (str, int, float, bool, type(None))) for o in options)
+        # bool/int must not compare equal here (True is not 1 in JSON Schema)
+        keyed = {(type(o) is bool, o) for o in options} if hashable else None
+
+        def c_enum(v, p, e):
+            if keyed is not None and isinstance(v, (str, int, float, bool, type(None))):
+                ok = (type(v) is bool, v) in keyed
+            else:
+                ok = any(v == o and (type(v) is bool) == (type(o) is bool) for o in options)
+            if not ok:
+                _err(e, p, f"{json.dumps(v)[:80]} is not one of {options}", "enum")
+        checks.append(c_enum)
+
+    if "const" in schema:
+        const = schema["const"]
+
+        def c_const(v, p, e):
+            if v != const or (type(v) is bool) != (type(const) is bool):
+                _err(e, p, f"{const!r} was expected", "const")
+        checks.append(c_const)
+
+    for kw, op, word in (("minimum", lambda v, b: v >= b, "less than the minimum of"),
+                         ("maximum", lambda v, b: v <= b, "greater than the maximum of")):
+        if kw in schema:
+            bound = schema[kw]
+
+            def c_bound(v, p, e, bound=bound, op=op, kw=kw, word=word):
+                if isinstance(v, (int, float)) and not isinstance(v, bool) and not op(v, bound):
+                    _err(e, p, f"{v} is {word} {bound}", kw)
+            checks.append(c_bound)
+
+    if "minLength" in schema:
+        n = schema["minLength"]
+
+        def c_minlen(v, p, e):
+            if isinstance(v, str) and len(v) < n:
+                _err(e, p, f"{v!r} is too short", "minLength")
+        checks.append(c_minlen)
+
+    if "minItems" in schema:
+        n = schema["minItems"]
+
+        def c_minitems(v, p, e):
+            if isinstance(v, list) and len(v) < n:
+                _err(e, p, f"array is too short (minItems {n})", "minItems")
+        checks.append(c_minitems)
+
+    if "required" in schema:
+        required = list(schema["required"])
+
+        def c_required(v, p, e):
+            if isinstance(v, dict):
+                for k in required:
+                    if k not in v:
+                        _err(e, p, f"{k!r} is a required property", "required")
+        checks.append(c_required)
+
+    props: Dict[str, Check] = {k: compile_schema(s) for k, s in (schema.get("properties") or {}).items()}
+    addl = schema.get("additionalProperties", True)
+    addl_check = None if addl is True else compile_schema(addl) if isinstance(addl, dict) else False
+    if props or addl_check is not None:
+        def c_props(v, p, e):
+            if not isinstance(v, dict):
+                return
+            for k, sub in v.items():
+                c = props.get(k)
+                if c is not None:
+                    c(sub, (p, k), e)
+                elif addl_check is False:
+                    _err(e, p, f"additional property {k!r} is not allowed", "additionalProperties")
+                elif addl_check is not None:
+                    addl_check(sub, (p, k), e)
+        checks.append(c_props)
+
+    if "items" in schema:
+        item = compile_schema(schema["items"])
+
+        def c_items(v, p, e):
+            if isinstance(v, list):
+                for i, sub in enumerate(v):
+                    item(sub, (p, i), e)
+        checks.append(c_items)
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def c_all(v, p, e):
+        for c in checks:
+            c(v, p, e)
+    return c_all
+
+
+_lock = threading.Lock()
+_cache: Dict[Tuple[str, str], Tuple[Tuple[int, int], Any]] = {}
+
+
+def cached(schema_path: Path, kind: str, build: Callable[[Any], Any]) -> Any:
+    """build(schema) once per schema file version (mtime_ns, size) and `kind`; shared by all threads."""
+    key = (kind, str(schema_path.resolve()))
+    st = schema_path.stat()
+    version = (st.st_mtime_ns, st.st_size)
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None and hit[0] == version:
+            return hit[1]
+        built = build(json.loads(schema_path.read_text(encoding="utf-8")))
+        _cache[key] = (version, built)
+        return built
+
+
+def _compile_or_unsupported(schema: Any) -> Any:
+    try:
+        return compile_schema(schema)
+    except UnsupportedSchema as e:
+        return e  # cached too, so an unsupported schema is not re-parsed on every call
+
+
+def get_checker(schema_path: Path) -> Check:
+    """Compiled subset checker for a schema file; raises UnsupportedSchema."""
+    check = cached(schema_path, "lite", _compile_or_unsupported)
+    if isinstance(check, UnsupportedSchema):
+        raise check
+    return check
+
+
+def _build_jsonschema(schema: Any) -> Any:
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+def get_jsonschema_validator(schema_path: Path) -> Any:
+    """jsonschema validator for a schema file (meta-schema checked once per file version)."""
+    if jsonschema is None:
+        raise RuntimeError("jsonschema not installed (pip install jsonschema)")
+    return cached(schema_path, "jsonschema", _build_jsonschema)
+
+
+def jsonschema_errors(validator: Any, doc: Any, limit: int) -> List[Dict[str, str]]:
+    out = []
+    for err in islice(validator.iter_errors(doc), max(0, limit)):
+        path = None
+        for k in err.absolute_path:
+            path = (path, k)
+        out.append({"path": pointer(path), "message": err.message, "validator": str(err.validator)})
+    return out
+
+
+def validate(schema_path: Path, doc: Any, max_errors: int = 200) -> List[Dict[str, str]]:
+    """At most `max_errors` errors as {path, message, validator}; compiled subset first, jsonschema for other schemas."""
+    try:
+        check = get_checker(schema_path)
+    except UnsupportedSchema:
+        if jsonschema is None:
+            raise RuntimeError(f"{schema_path.name} needs jsonschema (pip install jsonschema)")
+        return jsonschema_errors(get_jsonschema_validator(schema_path), doc, max_errors)
+    if max_errors <= 0:
+        return []
+    errors = _Errors()
+    errors.limit = max_errors
+    try:
+        check(doc, None, errors)
+    except _Enough:
+        pass
+    return list(errors)
@@ -2,7 +2,7 @@ from __future__ import annotations
 import json
 import shutil
 from pathlib import Path
-from .scan_repo import scan_repo
+from .scan_repo import reusable_report, scan_repo
 from .util import write_json
 
 def _load_recipe(repo_root: Path, recipe_id: str) -> dict:
@@ -18,14 +18,18 @@ def _load_recipe(repo_root: Path, recipe_id: str) -> dict:
     data["_dir"] = str(recipe_dir)
     return data
 
-def build_bundle(repo_root: str, target_repo: str, recipe_id: str, out_dir: str):
+def build_bundle(repo_root: str, target_repo: str, recipe_id: str, out_dir: str, report_json: str = ""):
+    """`report_json` (default <out>/report.json) is reused instead of rescanning while the target is unchanged."""
     repo_root_p = Path(repo_root).resolve()
     target_p = Path(target_repo).resolve()
     out = Path(out_dir).resolve()
     (out / "patches").mkdir(parents=True, exist_ok=True)
 
-    profile = scan_repo(str(target_p))
-    report = {"scanned_at": profile.get("scanned_at",""), "profile": profile, "findings": []}
+    report, walked = reusable_report(Path(report_json) if report_json else out / "report.json", str(target_p))
+    if report is None:
+        profile = scan_repo(str(target_p), walked=walked)
+        report = {"scanned_at": profile.get("scanned_at",""), "profile": profile, "findings": []}
+    profile = report["profile"]
     write_json(out / "report.json", report)
     (out / "report.md").write_text(
         f"# Scan Report\n\n- target: {profile['target']}\n\n"
@@ -69,8 +73,9 @@ def main():
     ap.add_argument("--recipe", required=True)
     ap.add_argument("--out", required=True)
     ap.add_argument("--repo-root", default=".")
+    ap.add_argument("--report", default="", help="scan report.json to reuse if the target is unchanged (default <out>/report.json)")
     args = ap.parse_args()
-    out = build_bundle(args.repo_root, args.target_repo, args.recipe, args.out)
+    out = build_bundle(args.repo_root, args.target_repo, args.recipe, args.out, args.report)
     print(str(out))
 
 if __name__ == "__main__":
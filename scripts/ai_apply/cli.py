@@ -4,6 +4,7 @@ from pathlib import Path
 from .scan_repo import main as scan_main
 from .recommend import main as recommend_main
 from .build_bundle import main as bundle_main
+from .fleet import main as fleet_main
 
 def main():
     ap = argparse.ArgumentParser(prog="ai_apply")
@@ -22,11 +23,21 @@ def main():
     p3.add_argument("--recipe", required=True)
     p3.add_argument("--out", required=True)
     p3.add_argument("--repo-root", default=".")
+    p3.add_argument("--report", default="")
+
+    sub.add_parser("fleet", add_help=False, help="scan + recommend many targets (see fleet.py --help)")
+
+    import sys
+    if sys.argv[1:2] == ["fleet"]:
+        # fleet's positionals and options interleave freely: hand them over untouched
+        sys.argv = ["fleet.py", *sys.argv[2:]]
+        fleet_main()
+        return
 
     args, rest = ap.parse_known_args()
     if args.cmd == "scan":
         import sys
-        sys.argv = ["scan_repo.py", args.target, "--out", args.out]
+        sys.argv = ["scan_repo.py", args.target, "--out", args.out, *rest]
         scan_main()
     elif args.cmd == "recommend":
         import sys
@@ -34,7 +45,8 @@ def main():
         recommend_main()
     elif args.cmd == "bundle":
         import sys
-        sys.argv = ["build_bundle.py", args.target_repo, "--recipe", args.recipe, "--out", args.out, "--repo-root", args.repo_root]
+        sys.argv = ["build_bundle.py", args.target_repo, "--recipe", args.recipe, "--out", args.out, "--repo-root", args.repo_root,
+                    "--report", args.report]
         bundle_main()
 
 if __name__ == "__main__":
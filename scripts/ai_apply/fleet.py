@@ -0,0 +1,238 @@
+"""Scan and recommend across many target repos.
+
+Targets (paths/globs, or a --list file) are scanned on a bounded process pool.
+Detector rules and the recipe index are loaded once, in the parent; workers only
+produce scan profiles. Each target keeps its report under
+<out>/targets/<name>-<hash>/report.json and it is reused, without reading any
+file, while the target's stat fingerprint is unchanged.
+
+Every finished target is appended to <out>/results.jsonl at once, so an
+interrupted run continues with --resume. ranking.jsonl / ranking.md rank the
+targets by their best recipe score, then by detector hits.
+"""
+from __future__ import annotations
+import datetime
+import glob
+import hashlib
+import itertools
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from .recommend import load_recipe_index, recommend_profile
+from .rule_engine import load_rule_set
+from .scan_repo import DEFAULT_MAX_BYTES, DEFAULT_MAX_FILES, reusable_report, scan_repo, write_report
+
+RESULTS_NAME = "results.jsonl"
+DEFAULT_JOBS = min(4, os.cpu_count() or 1)
+
+def expand_targets(patterns: list[str], list_file: str = "") -> list[str]:
+    """Resolved target paths in input order, deduplicated.
+
+    Globs keep only directories; a plain path is kept as given, so a missing
+    target shows up as an error row instead of vanishing.
+    """
+    items = list(patterns)
+    if list_file:
+        for ln in Path(list_file).read_text(encoding="utf-8").splitlines():
+            ln = ln.strip()
+            if ln and not ln.startswith("#"):
+                items.append(ln)
+    seen: set[str] = set()
+    out: list[str] = []
+    for item in items:
+        item = os.path.expanduser(item)
+        if glob.has_magic(item):
+            paths = [Path(m) for m in sorted(glob.glob(item)) if Path(m).is_dir()]
+        else:
+            paths = [Path(item)]
+        for p in paths:
+            t = str(p.resolve())
+            if t not in seen:
+                seen.add(t)
+                out.append(t)
+    return out
+
+def target_dir(out: Path, target: str) -> Path:
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", Path(target).name) or "root"
+    return out / "targets" / f"{name}-{hashlib.sha1(target.encode('utf-8')).hexdigest()[:8]}"
+
+def scan_target(target: str, report_dir: str, use_cache: bool, max_files: int | None, max_bytes: int | None) -> dict:
+    """Pool worker: reuse or rebuild <report_dir>/report.json; returns {status, seconds, profile | error}."""
+    t0 = time.perf_counter()
+    try:
+        if not Path(target).is_dir():
+            raise NotADirectoryError(f"not a directory: {target}")
+        out = Path(report_dir)
+        report, walked = reusable_report(out / "report.json", target, max_files, max_bytes)
+        status = "reused"
+        if report is None:
+            # one process per target already; no nested scan pool
+            profile = scan_repo(target, jobs=1, use_cache=use_cache, max_files=max_files, max_bytes=max_bytes, walked=walked)
+            report = write_report(out, profile, datetime.datetime.utcnow().isoformat() + "Z")
+            status = "scanned"
+        return {"status": status, "seconds": time.perf_counter() - t0, "profile": report["profile"]}
+    except Exception as e:
+        return {"status": "error", "seconds": time.perf_counter() - t0, "error": f"{type(e).__name__}: {e}"}
+
+def summarize(target: str, report_dir: Path, res: dict, rules, idx: dict) -> dict:
+    """One results.jsonl row: scan status plus detector hits and recipe scores."""
+    row = {"target": target, "status": res["status"], "seconds": round(res["seconds"], 3),
+           "report": str(report_dir / "report.json")}
+    if res["status"] == "error":
+        row["error"] = res["error"]
+        return row
+    profile = res["profile"]
+    rec = recommend_profile(profile, rules, idx)
+    ranked = rec["ranked_recipes"]
+    row.update({
+        "build_system": profile.get("build_system"),
+        "has_qt": profile.get("has_qt"),
+        "has_qt_webengine": profile.get("has_qt_webengine"),
+        "file_count": profile.get("file_count"),
+        "stat_fingerprint": profile.get("stat_fingerprint"),
+        "detectors": [{"id": f["detector_id"], "severity": f["severity"]} for f in rec["findings"]],
+        "ranked_recipes": ranked,
+        "top_score": ranked[0]["score"] if ranked else 0,
+    })
+    return row
+
+def load_results(path: Path) -> dict[str, dict]:
+    """target -> last row of an earlier run (a torn last line from an interrupt is ignored)."""
+    rows: dict[str, dict] = {}
+    if not path.exists():
+        return rows
+    for ln in path.read_text(encoding="utf-8").splitlines():
+        try:
+            row = json.loads(ln)
+        except ValueError:
+            continue
+        if isinstance(row, dict) and row.get("target"):
+            rows[row["target"]] = row
+    return rows
+
+def rank(rows: list[dict]) -> list[dict]:
+    ok = sorted((r for r in rows if r["status"] != "error"),
+                key=lambda r: (-r["top_score"], -len(r["detectors"]), r["target"]))
+    failed = sorted((r for r in rows if r["status"] == "error"), key=lambda r: r["target"])
+    return [dict(r, rank=i) for i, r in enumerate(ok, 1)] + failed
+
+def write_ranking(out: Path, ranked: list[dict]) -> None:
+    with (out / "ranking.jsonl").open("w", encoding="utf-8") as f:
+        for r in ranked:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+    counts: dict[str, int] = {}
+    totals: dict[str, list[int]] = {}  # recipe -> [targets, total score]
+    for r in ranked:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+        for rr in r.get("ranked_recipes", []):
+            t = totals.setdefault(rr["recipe_id"], [0, 0])
+            t[0] += 1
+            t[1] += rr["score"]
+    lines = [
+        "# ai_apply fleet ranking", "",
+        f"- generated: {datetime.datetime.utcnow().isoformat()}Z",
+        f"- targets: {len(ranked)} ({', '.join(f'{k}: {v}' for k, v in sorted(counts.items()))})", "",
+        "## Targets", "",
+        "| rank | target | build | webengine | detectors | top recipes |",
+        "|---|---|---|---|---|---|",
+    ]
+    for r in ranked:
+        if r["status"] == "error":
+            continue
+        dets = ", ".join(d["id"] for d in r["detectors"]) or "-"
+        recipes = ", ".join(f"{x['recipe_id']} ({x['score']})" for x in r["ranked_recipes"][:3]) or "-"
+        lines.append(f"| {r['rank']} | `{r['target']}` | {r['build_system']} | {r['has_qt_webengine']} | {dets} | {recipes} |")
+    if totals:
+        lines += ["", "## Recipes across the fleet", "", "| recipe | targets | total score |", "|---|---|---|"]
+        for rid, (n, score) in sorted(totals.items(), key=lambda x: (-x[1][1], -x[1][0], x[0])):
+            lines.append(f"| {rid} | {n} | {score} |")
+    errors = [r for r in ranked if r["status"] == "error"]
+    if errors:
+        lines += ["", "## Errors", ""] + [f"- `{r['target']}`: {r['error']}" for r in errors]
+    (out / "ranking.md").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+def _results(todo: list[str], out: Path, jobs: int, opts: tuple):
+    """Yield (target, worker result) as targets finish; at most 2*jobs are queued on the pool."""
+    if jobs <= 1:
+        for t in todo:
+            yield t, scan_target(t, str(target_dir(out, t)), *opts)
+        return
+    it = iter(todo)
+    pending: dict = {}
+    ex = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        while True:
+            for t in itertools.islice(it, 2 * jobs - len(pending)):
+                pending[ex.submit(scan_target, t, str(target_dir(out, t)), *opts)] = t
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield pending.pop(fut), fut.result()
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+
+def run_fleet(targets: list[str], out: Path, repo_root: Path, jobs: int = DEFAULT_JOBS, resume: bool = False,
+              use_cache: bool = True, max_files: int | None = DEFAULT_MAX_FILES,
+              max_bytes: int | None = DEFAULT_MAX_BYTES) -> list[dict]:
+    """Scan/recommend every target; returns the ranked rows (also written to <out>/ranking.*)."""
+    out.mkdir(parents=True, exist_ok=True)
+    results_path = out / RESULTS_NAME
+    prev = load_results(results_path) if resume else {}
+    # rewritten rather than appended to: drops a torn last line and superseded rows
+    results_path.write_text("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in prev.values()), encoding="utf-8")
+    rows = {t: prev[t] for t in targets if t in prev and prev[t]["status"] != "error"}
+    todo = [t for t in targets if t not in rows]
+    if rows:
+        print(f"[fleet] resume: {len(rows)} done, {len(todo)} to go")
+
+    rules = load_rule_set(repo_root)
+    idx = load_recipe_index(repo_root)
+    opts = (use_cache, max_files, max_bytes)
+    with results_path.open("a", encoding="utf-8") as log:
+        for n, (t, res) in enumerate(_results(todo, out, jobs, opts), 1):
+            row = summarize(t, target_dir(out, t), res, rules, idx)
+            rows[t] = row
+            log.write(json.dumps(row, ensure_ascii=False) + "\n")
+            log.flush()
+            detail = row.get("error") or f"top score {row['top_score']}, {len(row['detectors'])} detector(s)"
+            print(f"[fleet] {n}/{len(todo)} {row['status']} {t} ({row['seconds']:.2f}s): {detail}", flush=True)
+
+    ranked = rank([rows[t] for t in targets if t in rows])
+    write_ranking(out, ranked)
+    return ranked
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("targets", nargs="*", help="target repo paths or globs (e.g. 'repos/*')")
+    ap.add_argument("--list", default="", help="file with one target path or glob per line (# comments)")
+    ap.add_argument("--out", default="out_fleet")
+    ap.add_argument("--repo-root", default=".", help="repo holding ai/DETECTORS and ai/RECIPES")
+    ap.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help=f"targets scanned concurrently (default {DEFAULT_JOBS}, 1 = inline)")
+    ap.add_argument("--resume", action="store_true", help=f"keep finished targets from <out>/{RESULTS_NAME}; errors are retried")
+    ap.add_argument("--no-cache", action="store_true", help="do not use or update each target's scan cache")
+    ap.add_argument("--max-files", type=int, default=DEFAULT_MAX_FILES, help="file budget per target (0 = unlimited)")
+    ap.add_argument("--max-mb", type=int, default=DEFAULT_MAX_BYTES // 1_000_000, help="byte budget per target in MB (0 = unlimited)")
+    args = ap.parse_args()
+
+    targets = expand_targets(args.targets, args.list)
+    if not targets:
+        raise SystemExit("no targets (give paths/globs or --list)")
+    out = Path(args.out).resolve()
+    try:
+        ranked = run_fleet(targets, out, Path(args.repo_root).resolve(), jobs=args.jobs, resume=args.resume,
+                           use_cache=not args.no_cache, max_files=args.max_files or None,
+                           max_bytes=args.max_mb * 1_000_000 or None)
+    except KeyboardInterrupt:
+        print(f"[fleet] interrupted; finished targets are in {out / RESULTS_NAME}, rerun with --resume")
+        raise SystemExit(130)
+    errors = sum(1 for r in ranked if r["status"] == "error")
+    print(f"[fleet] {len(ranked)} targets, {errors} error(s): {out / 'ranking.md'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Compiled rule engine shared by recommend (detectors) and self_check quick fixes.
+
+Rule files:
+- ai/DETECTORS/rules.json        -> {"detectors": [{id, match, ...}]}
+- ai/DETECTORS/quick_fix_rules.json -> {"ignore_case": true, "rules": [{id, match, fix}], "default_fix": ...}
+
+A `match` is a dict of clauses that must all hold:
+- "any_text_in_files": [...]  legacy form of "any"
+- "any": [term, ...] / "all": [term, ...]
+- "files": [glob, ...]        only count hits from matching files (profile mode)
+where a term is a literal substring, {"regex": "..."} or a nested {"any"/"all": [...]}.
+
+Every literal of every rule goes into one alternation (longest first, per-atom
+case flags), so text matching is one pass however many rules exist; literals
+hidden inside a longer hit are recovered by a containment check on the hit.
+Regex atoms share a second alternation. The compiled plan is cached on disk
+under .sddai/rule_cache, keyed by the hash of the rule files.
+"""
+from __future__ import annotations
+import bisect
+import fnmatch
+import hashlib
+import json
+import re
+from pathlib import Path
+
+PLAN_VERSION = "1"
+POSITIONS_CAP = 64
+
+
+def _term(term, atoms: list, index: dict, ignore_case: bool):
+    if isinstance(term, str):
+        key = ("lit", term, ignore_case)
+    elif isinstance(term, dict) and "regex" in term:
+        key = ("re", term["regex"], bool(term.get("ignore_case", ignore_case)))
+    elif isinstance(term, dict) and ("any" in term or "all" in term):
+        return _clauses(term, atoms, index, ignore_case)
+    else:
+        raise ValueError(f"bad rule term: {term!r}")
+    if key not in index:
+        index[key] = len(atoms)
+        atoms.append(list(key))
+    return ["atom", index[key]]
+
+
+def _clauses(match: dict, atoms: list, index: dict, ignore_case: bool):
+    parts = []
+    any_terms = list(match.get("any_text_in_files", [])) + list(match.get("any", []))
+    if any_terms:
+        parts.append(["any", [_term(t, atoms, index, ignore_case) for t in any_terms]])
+    if match.get("all"):
+        parts.append(["all", [_term(t, atoms, index, ignore_case) for t in match["all"]]])
+    return ["all", parts] if parts else ["any", []]
+
+
+def _alternation(alts: list) -> str:
+    return "|".join(f"(?P<a{i}>{'(?i:' + body + ')' if ic else body})" for i, body, ic in alts)
+
+
+def build_plan(sources: list) -> dict:
+    """sources: [(kind, rules_json_dict)] -> JSON-serializable plan."""
+    atoms: list = []
+    index: dict = {}
+    rules = []
+    defaults = {}
+    for kind, data in sources:
+        ignore_case = bool(data.get("ignore_case", False))
+        items = data.get("detectors") if kind == "detector" else data.get("rules", [])
+        for r in items or []:
+            rules.append({
+                "kind": kind,
+                "id": r.get("id"),
+                "expr": _clauses(r.get("match", {}), atoms, index, ignore_case),
+                "files": list(r.get("match", {}).get("files", [])),
+                "rule": r,
+            })
+        if data.get("default_fix"):
+            defaults[kind] = data["default_fix"]
+
+    lits = sorted((i for i, a in enumerate(atoms) if a[0] == "lit"), key=lambda i: -len(atoms[i][1]))
+    res = [i for i, a in enumerate(atoms) if a[0] == "re"]
+    lower = [atoms[i][1].lower() for i in lits]
+    overlapping = any(
+        a != b and a not in b and any(a.endswith(b[:k]) for k in range(1, len(b)))
+        for a in lower for b in lower
+    )
+    lit_body = _alternation([(i, re.escape(atoms[i][1]), atoms[i][2]) for i in lits])
+    re_body = _alternation([(i, atoms[i][1], atoms[i][2]) for i in res])
+    return {
+        "version": PLAN_VERSION,
+        "atoms": atoms,
+        "rules": rules,
+        "defaults": defaults,
+        "lit_pattern": (f"(?=(?:{lit_body}))" if overlapping else lit_body) if lits else "",
+        "re_pattern": f"(?=(?:{re_body}))" if res else "",
+    }
+
+
+class RuleSet:
+    def __init__(self, plan: dict):
+        self.plan = plan
+        self.atoms = plan["atoms"]
+        self.rules = plan["rules"]
+        self.defaults = plan.get("defaults", {})
+        self._lit_rx = re.compile(plan["lit_pattern"]) if plan["lit_pattern"] else None
+        self._re_rx = re.compile(plan["re_pattern"]) if plan["re_pattern"] else None
+        self._regex_atoms = [i for i, a in enumerate(self.atoms) if a[0] == "re"]
+        self._lits = [(i, a[1], a[2]) for i, a in enumerate(self.atoms) if a[0] == "lit"]
+        # containment closure: literal -> other literals that can occur inside one of its hits
+        self._inner = {
+            i: [(j, lj, icj) for j, lj, icj in self._lits if j != i and len(lj) <= len(li) and lj.lower() in li.lower()]
+            for i, li, _ in self._lits
+        }
+
+    # -- matching ---------------------------------------------------------
+    def _scan(self, text: str) -> dict:
+        """One pass: atom index -> start offsets (capped)."""
+        found: dict = {}
+
+        def add(i: int, pos: int) -> None:
+            lst = found.setdefault(i, [])
+            if len(lst) < POSITIONS_CAP:
+                lst.append(pos)
+
+        if self._lit_rx is not None:
+            for m in self._lit_rx.finditer(text):
+                name = m.lastgroup
+                hit = m.group(name)
+                start = m.start(name)
+                add(int(name[1:]), start)
+                low = hit.lower()
+                for i, lit, ic in self._inner[int(name[1:])]:
+                    hay, needle = (low, lit.lower()) if ic else (hit, lit)
+                    off = hay.find(needle)
+                    while off >= 0:
+                        add(i, start + off)
+                        off = hay.find(needle, off + 1)
+        found.update(self._scan_regex(text))
+        return found
+
+    def _scan_regex(self, text: str) -> dict:
+        found: dict = {}
+        if self._re_rx is None:
+            return found
+        for m in self._re_rx.finditer(text):
+            lst = found.setdefault(int(m.lastgroup[1:]), [])
+            if len(lst) < POSITIONS_CAP:
+                lst.append(m.start(m.lastgroup))
+        if found:
+            # a regex can shadow another at the same offset; confirm the missing ones directly
+            for i in self._regex_atoms:
+                if i not in found:
+                    m = re.search(self.atoms[i][1], text, re.I if self.atoms[i][2] else 0)
+                    if m:
+                        found[i] = [m.start()]
+        return found
+
+    def _eval(self, expr, hits: set) -> bool:
+        op = expr[0]
+        if op == "atom":
+            return expr[1] in hits
+        if op == "any":
+            return any(self._eval(e, hits) for e in expr[1])
+        return all(self._eval(e, hits) for e in expr[1])
+
+    def match_text(self, text: str, kind: str | None = None) -> list:
+        """Rules (in file order) whose expression holds for `text`."""
+        hits = set(self._scan(text))
+        return [r["rule"] for r in self.rules if (kind is None or r["kind"] == kind) and self._eval(r["expr"], hits)]
+
+    def first_text(self, text: str, kind: str):
+        out = self.match_text(text, kind)
+        return out[0] if out else None
+
+    def match_profile(self, profile: dict, kind: str | None = "detector") -> list:
+        """Evaluate against a scan profile (its keyword hits, not file text).
+
+        Literals match whole keywords, as `any_text_in_files` always did; regex atoms
+        run once over the joined keyword list. `files` globs keep only keywords seen
+        in a matching file (profile["keyword_files"]).
+        """
+        keywords = sorted(profile.get("text_hits", []))
+        exact = {kw: kw for kw in keywords}
+        folded = {kw.lower(): kw for kw in keywords}
+        atom_kws: dict = {}
+        for i, lit, ic in self._lits:
+            kw = folded.get(lit.lower()) if ic else exact.get(lit)
+            if kw is not None:
+                atom_kws.setdefault(i, set()).add(kw)
+        if self._re_rx is not None and keywords:
+            text = "\n".join(keywords)
+            starts, pos = [], 0
+            for kw in keywords:
+                starts.append(pos)
+                pos += len(kw) + 1
+            for i, ps in self._scan_regex(text).items():
+                atom_kws.setdefault(i, set()).update(keywords[bisect.bisect_right(starts, p) - 1] for p in ps)
+        kw_files = profile.get("keyword_files", {})
+        out = []
+        for r in self.rules:
+            if kind is not None and r["kind"] != kind:
+                continue
+            if r["files"]:
+                hits = {
+                    i for i, kws in atom_kws.items()
+                    if any(fnmatch.fnmatch(f, g) for kw in kws for f in kw_files.get(kw, []) for g in r["files"])
+                }
+            else:
+                hits = set(atom_kws)
+            if self._eval(r["expr"], hits):
+                out.append(r["rule"])
+        return out
+
+
+def _read(path: Path) -> bytes:
+    try:
+        return path.read_bytes()
+    except OSError:
+        return b""
+
+
+def load_rule_set(repo_root: Path, cache_dir: Path | None = None) -> RuleSet:
+    """Compile ai/DETECTORS/{rules,quick_fix_rules}.json, reusing the on-disk plan when the files are unchanged."""
+    det_dir = repo_root / "ai" / "DETECTORS"
+    raw = [("detector", _read(det_dir / "rules.json")), ("quick_fix", _read(det_dir / "quick_fix_rules.json"))]
+    h = hashlib.sha256(PLAN_VERSION.encode())
+    for kind, data in raw:
+        h.update(kind.encode() + b"\0" + data + b"\0")
+    key = h.hexdigest()
+    cache_dir = cache_dir if cache_dir is not None else repo_root / ".sddai" / "rule_cache"
+    cached = cache_dir / f"{key}.json"
+    try:
+        return RuleSet(json.loads(cached.read_text(encoding="utf-8")))
+    except (OSError, ValueError, KeyError, re.error):
+        pass
+    plan = build_plan([(kind, json.loads(data.decode("utf-8")) if data else {}) for kind, data in raw])
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        cached.write_text(json.dumps(plan, ensure_ascii=False), encoding="utf-8")
+    except OSError:
+        pass
+    return RuleSet(plan)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+
+CACHE_VERSION = "1"
+DEFAULT_CACHE_REL = ".sddai/scan_cache.sqlite"
+
+class ScanCache:
+    """Per-file scan results keyed by (path, size, mtime_ns, inode).
+
+    Rows are only trusted while the stat key matches and the keyword set
+    (`signature`) is the one they were computed with; anything else is a miss.
+    """
+
+    def __init__(self, path: Path, signature: str):
+        self.path = path
+        self.signature = signature
+        self.rows: dict[str, tuple] = {}
+        self._db = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path))
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER,"
+                " inode INTEGER, digest TEXT, hits TEXT, nbytes INTEGER)"
+            )
+            meta = dict(self._db.execute("SELECT key, value FROM meta"))
+            if meta.get("version") != CACHE_VERSION or meta.get("signature") != signature:
+                self._db.execute("DELETE FROM files")
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    [("version", CACHE_VERSION), ("signature", signature)],
+                )
+                self._db.commit()
+            for rel, size, mtime_ns, inode, digest, hits, nbytes in self._db.execute("SELECT * FROM files"):
+                self.rows[rel] = (size, mtime_ns, inode, digest, json.loads(hits), nbytes)
+        except (sqlite3.Error, OSError, ValueError):
+            # read-only or corrupt cache: scan without it
+            self.close()
+            self.rows = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._db is not None
+
+    def lookup(self, rel: str, stat_key: tuple[int, int, int]):
+        """Return (digest, hits, nbytes) when the cached stat key still matches, else None."""
+        row = self.rows.get(rel)
+        if row is None or row[:3] != stat_key:
+            return None
+        return row[3], row[4], row[5]
+
+    def update(self, changed: dict[str, tuple], present: set[str]) -> None:
+        """Upsert `changed` rows (rel -> (size, mtime_ns, inode, digest, hits, nbytes)) and drop vanished paths."""
+        if not self.enabled:
+            return
+        gone = [(rel,) for rel in self.rows if rel not in present]
+        try:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(rel, *row[:4], json.dumps(row[4]), row[5]) for rel, row in changed.items()],
+            )
+            self._db.executemany("DELETE FROM files WHERE path = ?", gone)
+            self._db.commit()
+        except sqlite3.Error:
+            pass
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+def merkle_root(entries: list[tuple[str, str]]) -> str:
+    """Content fingerprint: directories hash their sorted (name, child hash) pairs bottom-up."""
+    tree: dict = {}
+    for rel, digest in entries:
+        parts = rel.split("/")
+        node = tree
+        for part in parts[:-1]:
+            node = node.setdefault(part + "/", {})
+        node[parts[-1]] = digest
+
+    def _hash(node: dict) -> str:
+        h = hashlib.sha1()
+        for name in sorted(node):
+            child = node[name]
+            h.update(name.encode("utf-8"))
+            h.update(b"\0")
+            h.update((_hash(child) if isinstance(child, dict) else child).encode("ascii"))
+            h.update(b"\n")
+        return h.hexdigest()
+
+    return _hash(tree)
+
+def stat_fingerprint(files, signature: str) -> str:
+    """Cheap tree fingerprint from walk stat data (rel, size, mtime_ns, inode); no file is read."""
+    h = hashlib.sha1(signature.encode("utf-8"))
+    for fe in files:
+        h.update(f"\n{fe.rel}\0{fe.size}\0{fe.mtime_ns}\0{fe.inode}".encode("utf-8", "surrogateescape"))
+    return h.hexdigest()
@@ -1,15 +1,137 @@
 from __future__ import annotations
+import hashlib
+import json
 import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from .util import iter_files, read_text, write_json, sha1_of_files
+from .scan_cache import DEFAULT_CACHE_REL, ScanCache, merkle_root, stat_fingerprint
+from .util import WalkResult, walk_files, write_json
 
 PATTERNS_QT = ["Qt6", "Qt5", "QApplication", "QMainWindow", "QWidget"]
 PATTERNS_WEBENGINE = ["QWebEngineView", "Qt6::WebEngineWidgets", "Qt5::WebEngineWidgets", "QtWebEngineWidgets", "qtwebengine", "QWebChannel", "qt.webChannelTransport"]
+KEYWORDS = PATTERNS_QT + PATTERNS_WEBENGINE
 
-def scan_repo(target: str) -> dict:
+TEXT_EXTS = {".cpp", ".h", ".hpp", ".cxx", ".cmake", ".txt", ".md", ".pro", ".qml", ".js", ".html", ".css"}
+ENTRY_EXTS = {".cpp", ".h", ".hpp"}
+ENTRY_KEYWORDS = {"QWebEngineView", "QWebChannel"}
+MAX_READ_BYTES = 2_000_000
+# per keyword, the first N files it occurs in (lets detectors scope rules by file glob)
+KEYWORD_FILES_CAP = 50
+# walk budgets; exceeding them is reported in profile["truncated"], not silently dropped
+DEFAULT_MAX_FILES = 200_000
+DEFAULT_MAX_BYTES = 4_000_000_000
+# below this many files the pool start-up costs more than it saves
+PARALLEL_MIN_FILES = 256
+
+def _compile_keywords(keywords: list[str]):
+    """One bytes regex for all keywords + the closure of keywords contained in each keyword.
+
+    Alternatives are ordered longest first, so a hit on `Qt6::WebEngineWidgets` hides the
+    nested `Qt6`; the closure adds it back. Only if a keyword can start inside another one
+    and run past its end do we need the (slower) overlapping lookahead form.
+    """
+    alts = sorted(set(keywords), key=len, reverse=True)
+    body = b"|".join(re.escape(k.encode("utf-8")) for k in alts)
+    overlapping = any(
+        a != b and a not in b and any(a.endswith(b[:i]) for i in range(1, len(b)))
+        for a in alts for b in alts
+    )
+    rx = re.compile(b"(?=(" + body + b"))" if overlapping else b"(" + body + b")")
+    closure = {k.encode("utf-8"): tuple(o for o in alts if o in k) for k in alts}
+    return rx, closure
+
+_KEYWORD_RX, _KEYWORD_CLOSURE = _compile_keywords(KEYWORDS)
+
+def scan_file(path: str, match: bool = True) -> tuple[int, list[str], str]:
+    """Read a file once; return (bytes matched, keyword hits, sha1 of the full content).
+
+    Keywords are only matched in the first MAX_READ_BYTES; the digest covers the whole file.
+    """
+    h = hashlib.sha1()
+    try:
+        with open(path, "rb") as f:
+            data = f.read(MAX_READ_BYTES)
+            h.update(data)
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    except OSError:
+        return 0, [], ""
+    if not match:
+        return 0, [], h.hexdigest()
+    found: set[str] = set()
+    seen: set[bytes] = set()
+    for m in _KEYWORD_RX.finditer(data):
+        kw = m.group(1)
+        if kw in seen:
+            continue
+        seen.add(kw)
+        found.update(_KEYWORD_CLOSURE[kw])
+        if len(found) == len(_KEYWORD_CLOSURE):
+            break
+    return len(data), sorted(found), h.hexdigest()
+
+def _scan_chunk(tasks: list[tuple[str, bool]]) -> list[tuple[int, list[str], str]]:
+    return [scan_file(p, m) for p, m in tasks]
+
+def scan_files(tasks: list[tuple[str, bool]], jobs: int = 0) -> list[tuple[int, list[str], str]]:
+    """Scan (path, match) tasks (order preserved); fan out over a process pool when it pays off."""
+    jobs = jobs or (os.cpu_count() or 1)
+    if jobs <= 1 or len(tasks) < PARALLEL_MIN_FILES:
+        return _scan_chunk(tasks)
+    size = max(16, len(tasks) // (jobs * 8))
+    chunks = [tasks[i:i + size] for i in range(0, len(tasks), size)]
+    out: list[tuple[int, list[str], str]] = []
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        for part in ex.map(_scan_chunk, chunks):
+            out.extend(part)
+    return out
+
+def _signature(max_files: int | None, max_bytes: int | None) -> str:
+    # what a profile depends on besides the files themselves
+    return "\n".join(KEYWORDS) + f"\n#budget {max_files} {max_bytes}"
+
+def reusable_report(
+    report_json: Path,
+    target: str,
+    max_files: int | None = DEFAULT_MAX_FILES,
+    max_bytes: int | None = DEFAULT_MAX_BYTES,
+) -> tuple[dict | None, WalkResult]:
+    """(report, walk): the report at `report_json` if its profile has this tree's stat fingerprint, else None.
+
+    Only the walk is done (no file is read); it is returned so a rescan can skip it.
+    """
+    root = Path(target).resolve()
+    walked = walk_files(root, max_files=max_files, max_bytes=max_bytes)
+    try:
+        report = json.loads(report_json.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None, walked
+    profile = report.get("profile") if isinstance(report, dict) else None
+    if (isinstance(profile, dict) and profile.get("target") == str(root)
+            and profile.get("stat_fingerprint") == stat_fingerprint(walked.files, _signature(max_files, max_bytes))):
+        return report, walked
+    return None, walked
+
+def scan_repo(
+    target: str,
+    jobs: int = 0,
+    use_cache: bool = True,
+    cache_path: str = "",
+    max_files: int | None = DEFAULT_MAX_FILES,
+    max_bytes: int | None = DEFAULT_MAX_BYTES,
+    walked: WalkResult | None = None,
+) -> dict:
+    """Profile `target`; `walked` (from reusable_report, same budgets) saves the directory walk."""
+    t_start = time.perf_counter()
     root = Path(target).resolve()
-    files = list(iter_files(root))
-    rels = [str(p.relative_to(root)).replace("\\","/") for p in files]
+    if walked is None:
+        walked = walk_files(root, max_files=max_files, max_bytes=max_bytes)
+    files = [Path(fe.path) for fe in walked.files]
+    rels = [fe.rel for fe in walked.files]
+    stat_keys = [(fe.size, fe.mtime_ns, fe.inode) for fe in walked.files]
+    t_walk = time.perf_counter()
 
     # build system heuristics
     has_cmake = (root / "CMakeLists.txt").exists()
@@ -23,15 +145,46 @@ def scan_repo(target: str) -> dict:
     elif has_pyproject: build_system = "python"
     elif has_package_json: build_system = "node"
 
+    # unchanged files (same path/size/mtime/inode) are served from the cache without a read
+    cache = None
+    if use_cache:
+        cache = ScanCache(Path(cache_path) if cache_path else root / DEFAULT_CACHE_REL, signature="\n".join(KEYWORDS))
+    results: list = [None] * len(files)
+    todo = []
+    for i, key in enumerate(stat_keys):
+        cached = cache.lookup(rels[i], key) if cache is not None else None
+        if cached is not None:
+            results[i] = cached
+        else:
+            todo.append(i)
+    t_cache = time.perf_counter()
+
+    # single read per file: digest, keyword hits and entry candidates come from the same pass
+    scanned = scan_files([(str(files[i]), files[i].suffix.lower() in TEXT_EXTS) for i in todo], jobs=jobs)
+    bytes_read = 0
+    changed = {}
+    for i, (nbytes, hits, digest) in zip(todo, scanned):
+        bytes_read += nbytes
+        results[i] = (digest, hits, nbytes)
+        if digest:
+            changed[rels[i]] = (*stat_keys[i], digest, hits, nbytes)
+    t_scan = time.perf_counter()
+    cache_enabled = bool(cache is not None and cache.enabled)
+    if cache is not None:
+        cache.update(changed, set(rels))
+        cache.close()
+
     text_hits = set()
-    # limited scan for keywords
-    for p in files:
-        name = p.name.lower()
-        if any(name.endswith(ext) for ext in [".cpp",".h",".hpp",".cxx",".cmake",".txt",".md",".pro",".qml",".js",".html",".css"]):
-            t = read_text(p)
-            for kw in PATTERNS_QT + PATTERNS_WEBENGINE:
-                if kw in t:
-                    text_hits.add(kw)
+    entry_candidates = []
+    keyword_files: dict[str, list[str]] = {}
+    for i, (digest, hits, nbytes) in enumerate(results):
+        text_hits.update(hits)
+        for kw in hits:
+            paths = keyword_files.setdefault(kw, [])
+            if len(paths) < KEYWORD_FILES_CAP:
+                paths.append(rels[i])
+        if files[i].suffix.lower() in ENTRY_EXTS and ENTRY_KEYWORDS.intersection(hits):
+            entry_candidates.append(rels[i])
     has_qt = any(k in text_hits for k in PATTERNS_QT)
     has_qt_webengine = any(k in text_hits for k in PATTERNS_WEBENGINE)
 
@@ -42,14 +195,10 @@ def scan_repo(target: str) -> dict:
             web_roots.append(cand.replace("\\","/"))
 
     # entry candidates for webengine integration
-    entry_candidates = []
-    for p in files:
-        if p.suffix.lower() in [".cpp",".h",".hpp"]:
-            t = read_text(p)
-            if "QWebEngineView" in t or "QWebChannel" in t:
-                entry_candidates.append(str(p.relative_to(root)).replace("\\","/"))
     entry_candidates = entry_candidates[:20]
 
+    t_end = time.perf_counter()
+    scan_sec = t_scan - t_cache
     profile = {
         "target": str(root),
         "build_system": build_system,
@@ -58,33 +207,81 @@ def scan_repo(target: str) -> dict:
         "text_hits": sorted(text_hits),
         "web_roots": web_roots,
         "entry_candidates": entry_candidates,
+        "keyword_files": keyword_files,
         "file_count": len(files),
-        "fingerprint": sha1_of_files(rels),
+        "truncated": {
+            "truncated": walked.truncated,
+            "reason": walked.reason,
+            "total_files": walked.total_files,
+            "total_bytes": walked.total_bytes,
+            "kept_bytes": walked.kept_bytes,
+        },
+        "fingerprint": merkle_root([(rel, r[0]) for rel, r in zip(rels, results)]),
+        "stat_fingerprint": stat_fingerprint(walked.files, _signature(max_files, max_bytes)),
+        "cache": {
+            "enabled": cache_enabled,
+            "hits": len(files) - len(todo),
+            "misses": len(todo),
+        },
+        "timings": {
+            "walk_sec": round(t_walk - t_start, 4),
+            "cache_sec": round(t_cache - t_walk, 4),
+            "scan_sec": round(scan_sec, 4),
+            "total_sec": round(t_end - t_start, 4),
+        },
+        "throughput": {
+            "files_scanned": len(todo),
+            "bytes_read": bytes_read,
+            "files_per_sec": round(len(todo) / scan_sec, 1) if scan_sec > 0 else None,
+            "mb_per_sec": round(bytes_read / 1e6 / scan_sec, 2) if scan_sec > 0 else None,
+        },
     }
     return profile
 
+def write_report(out: Path, profile: dict, scanned_at: str) -> dict:
+    """Write <out>/report.json + report.md for a scan profile; returns the report."""
+    report = {"scanned_at": scanned_at, "profile": profile, "findings": []}
+    write_json(out / "report.json", report)
+    tm, tp, tc, tr = profile["timings"], profile["throughput"], profile["cache"], profile["truncated"]
+    truncated_md = (
+        f"\n**truncated** ({tr['reason']}): kept {profile['file_count']} of {tr['total_files']} files, "
+        f"{tr['kept_bytes']} of {tr['total_bytes']} bytes\n" if tr["truncated"] else ""
+    )
+    (out / "report.md").write_text(
+        f"# Scan Report\n\n- target: {profile['target']}\n- scanned_at: {scanned_at}\n\n"
+        f"## Profile\n- build_system: {profile['build_system']}\n- has_qt: {profile['has_qt']}\n"
+        f"- has_qt_webengine: {profile['has_qt_webengine']}\n- web_roots: {profile['web_roots']}\n"
+        f"- entry_candidates: {profile['entry_candidates']}\n\n"
+        f"## Text hits\n{', '.join(profile['text_hits'])}\n\n"
+        f"## Timings\n- walk: {tm['walk_sec']}s\n- cache: {tm['cache_sec']}s ({tc['hits']} hits / {tc['misses']} misses)\n"
+        f"- scan: {tm['scan_sec']}s\n- total: {tm['total_sec']}s\n"
+        f"- throughput: {tp['files_scanned']} files, {tp['files_per_sec']} files/s, {tp['mb_per_sec']} MB/s\n"
+        f"{truncated_md}",
+        encoding="utf-8"
+    )
+    return report
+
 def main():
-    import argparse, datetime, json
+    import argparse, datetime
     ap = argparse.ArgumentParser()
     ap.add_argument("target")
     ap.add_argument("--out", default="out_scan")
+    ap.add_argument("--jobs", type=int, default=0, help="scan worker processes (default: cpu count, 1 = inline)")
+    ap.add_argument("--no-cache", action="store_true", help=f"ignore and do not update <target>/{DEFAULT_CACHE_REL}")
+    ap.add_argument("--cache", default="", help="scan cache path (default: <target>/" + DEFAULT_CACHE_REL + ")")
+    ap.add_argument("--max-files", type=int, default=DEFAULT_MAX_FILES, help="file budget (0 = unlimited)")
+    ap.add_argument("--max-mb", type=int, default=DEFAULT_MAX_BYTES // 1_000_000, help="byte budget in MB (0 = unlimited)")
     args = ap.parse_args()
 
     out = Path(args.out).resolve()
     out.mkdir(parents=True, exist_ok=True)
-    profile = scan_repo(args.target)
+    profile = scan_repo(
+        args.target, jobs=args.jobs, use_cache=not args.no_cache, cache_path=args.cache,
+        max_files=args.max_files or None, max_bytes=args.max_mb * 1_000_000 or None,
+    )
 
     scanned_at = datetime.datetime.utcnow().isoformat() + "Z"
-    report = {"scanned_at": scanned_at, "profile": profile, "findings": []}
-    write_json(out / "report.json", report)
-    (out / "report.md").write_text(
-        f"# Scan Report\n\n- target: {profile['target']}\n- scanned_at: {scanned_at}\n\n"
-        f"## Profile\n- build_system: {profile['build_system']}\n- has_qt: {profile['has_qt']}\n"
-        f"- has_qt_webengine: {profile['has_qt_webengine']}\n- web_roots: {profile['web_roots']}\n"
-        f"- entry_candidates: {profile['entry_candidates']}\n\n"
-        f"## Text hits\n{', '.join(profile['text_hits'])}\n",
-        encoding="utf-8"
-    )
+    write_report(out, profile, scanned_at)
     print(str(out / "report.json"))
 
 if __name__ == "__main__":
@@ -1,23 +1,199 @@
 from __future__ import annotations
 import os
+import re
 import json
 import hashlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import NamedTuple
 
-SKIP_DIRS = {".git", ".svn", ".hg", "build", "dist", ".idea", ".vscode", "__pycache__", ".cache"}
+SKIP_DIRS = {".git", ".svn", ".hg", "build", "dist", ".idea", ".vscode", "__pycache__", ".cache", ".sddai"}
+IGNORE_FILES = (".gitignore", ".sddaiignore")
 
-def iter_files(root: Path, max_files: int = 6000):
-    n = 0
-    for p in root.rglob("*"):
-        if n >= max_files:
-            break
-        if p.is_dir():
+class FileEntry(NamedTuple):
+    path: str        # absolute path
+    rel: str         # posix path relative to the walk root
+    size: int
+    mtime_ns: int
+    inode: int
+
+class WalkResult(NamedTuple):
+    files: list      # FileEntry, sorted by rel
+    truncated: bool
+    total_files: int
+    total_bytes: int
+    kept_bytes: int
+    reason: str      # "" | "max_files" | "max_bytes"
+
+def glob_to_regex(pat: str) -> str:
+    """Translate a gitignore-style glob (`*`, `?`, `[...]`, `**`) to an unanchored regex body."""
+    out, i, n = [], 0, len(pat)
+    while i < n:
+        c = pat[i]
+        if pat.startswith("**/", i):
+            out.append("(?:.*/)?"); i += 3; continue
+        if pat.startswith("/**", i) and i + 3 == n:
+            out.append("(?:/.*)?"); i += 3; continue
+        if pat.startswith("**", i):
+            out.append(".*"); i += 2; continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = pat.find("]", i + 1)
+            if j < 0:
+                out.append(re.escape(c))
+            else:
+                body = pat[i + 1:j]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = j
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+def parse_ignore(text: str, base: str = "") -> list:
+    """Parse .gitignore-style lines into (regex, negate, dir_only, base) rules.
+
+    Supports comments, `!` negation, trailing `/` (directories only), anchoring via a
+    leading or inner `/`, and `*`, `?`, `[...]`, `**` globs. `base` is the posix path of
+    the directory holding the ignore file, relative to the walk root.
+    """
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        if line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/") if dir_only else line
+        anchored = "/" in line
+        line = line.lstrip("/")
+        if not line:
+            continue
+        rx = glob_to_regex(line)
+        rx = ("^" if anchored else "^(?:.*/)?") + rx + "$"
+        rules.append((re.compile(rx), negate, dir_only, base))
+    return rules
+
+def is_ignored(rules: list, rel: str, is_dir: bool) -> bool:
+    """Last matching rule wins, as in git."""
+    for rx, negate, dir_only, base in reversed(rules):
+        if dir_only and not is_dir:
             continue
-        parts = set(p.parts)
-        if parts & SKIP_DIRS:
+        if base:
+            if not rel.startswith(base + "/"):
+                continue
+            sub = rel[len(base) + 1:]
+        else:
+            sub = rel
+        if rx.match(sub):
+            return not negate
+    return False
+
+def _read_ignore_rules(dir_path: str, rel_dir: str, ignore_files) -> list:
+    rules = []
+    for name in ignore_files:
+        try:
+            with open(os.path.join(dir_path, name), encoding="utf-8", errors="ignore") as f:
+                rules.extend(parse_ignore(f.read(), rel_dir))
+        except OSError:
             continue
-        yield p
-        n += 1
+    return rules
+
+def _scan_dir(dir_path: str, rel_dir: str, rules: list, skip_dirs, skip_rels, ignore_files, follow_symlinks: bool):
+    """List one directory: return (files, subdirs) after pruning; subdirs carry their rule set."""
+    if ignore_files:
+        own = _read_ignore_rules(dir_path, rel_dir, ignore_files)
+        if own:
+            rules = rules + own
+    files, subdirs = [], []
+    try:
+        it = os.scandir(dir_path)
+    except OSError:
+        return files, subdirs
+    with it:
+        for e in it:
+            rel = f"{rel_dir}/{e.name}" if rel_dir else e.name
+            try:
+                if e.is_dir(follow_symlinks=follow_symlinks):
+                    if e.name in skip_dirs or rel in skip_rels:
+                        continue
+                    if rules and is_ignored(rules, rel, True):
+                        continue
+                    subdirs.append((e.path, rel, rules))
+                elif e.is_file(follow_symlinks=follow_symlinks):
+                    if rules and is_ignored(rules, rel, False):
+                        continue
+                    st = e.stat(follow_symlinks=follow_symlinks)
+                    files.append(FileEntry(e.path, rel, st.st_size, st.st_mtime_ns, st.st_ino))
+            except OSError:
+                continue
+    return files, subdirs
+
+def walk_files(
+    root: Path,
+    skip_dirs=SKIP_DIRS,
+    ignore_files=IGNORE_FILES,
+    skip_rels=(),
+    max_files: int | None = None,
+    max_bytes: int | None = None,
+    jobs: int = 8,
+    follow_symlinks: bool = False,
+) -> WalkResult:
+    """Walk `root` with os.scandir, pruning `skip_dirs` names, `skip_rels` paths and ignored dirs.
+
+    Directories are listed concurrently on a thread pool; the result is sorted by rel path,
+    so budgets (`max_files`, `max_bytes`) cut deterministically and are reported instead of
+    silently dropping files.
+    """
+    root_s = str(Path(root))
+    skip_dirs = set(skip_dirs)
+    skip_rels = set(skip_rels)
+    args = (skip_dirs, skip_rels, tuple(ignore_files), follow_symlinks)
+    files: list = []
+    if jobs <= 1:
+        stack = [(root_s, "", [])]
+        while stack:
+            d, rel, rules = stack.pop()
+            f, sub = _scan_dir(d, rel, rules, *args)
+            files.extend(f)
+            stack.extend(sub)
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as ex:
+            pending = {ex.submit(_scan_dir, root_s, "", [], *args)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    f, sub = fut.result()
+                    files.extend(f)
+                    for d, rel, rules in sub:
+                        pending.add(ex.submit(_scan_dir, d, rel, rules, *args))
+
+    files.sort(key=lambda fe: fe.rel)
+    total_files = len(files)
+    total_bytes = sum(fe.size for fe in files)
+    reason = ""
+    if max_files is not None and len(files) > max_files:
+        files = files[:max_files]
+        reason = "max_files"
+    if max_bytes is not None:
+        acc = 0
+        for i, fe in enumerate(files):
+            acc += fe.size
+            if acc > max_bytes:
+                files = files[:i]
+                reason = "max_bytes"
+                break
+    kept_bytes = sum(fe.size for fe in files) if reason else total_bytes
+    return WalkResult(files, bool(reason), total_files, total_bytes, kept_bytes, reason)
 
 def read_text(path: Path, max_bytes: int = 2_000_000) -> str:
     try:
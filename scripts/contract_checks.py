@@ -1,7 +1,13 @@
 
+import argparse
 import json
+import re
+import subprocess
 from pathlib import Path
 
+from _meta_validate import SCHEMA_REL, format_problems, validate_meta_file
+from ai_apply.util import glob_to_regex, walk_files
+
 ROOT = Path(__file__).resolve().parents[1]
 SCHEMAS = [
     ROOT / "specs" / "contract_input" / "project_marker.schema.json",
@@ -9,84 +15,134 @@ SCHEMAS = [
     ROOT / "specs" / "contract_output" / "meta_pipeline_graph.schema.json",
     ROOT / "specs" / "contract_output" / "run_events.schema.json",
 ]
-
-
-def check_unique_graph_spider_impl() -> None:
-    web_root = ROOT / "web"
+WEB_POLICY = ROOT / "specs" / "web_policy.json"
+
+
+class WebPolicy:
+    """specs/web_policy.json compiled into one anchored alternation; the first matching rule wins."""
+
+    def __init__(self, spec: dict):
+        self.root = spec.get("root", "web").strip("/")
+        self.prune = [p.strip("/") for p in spec.get("prune", [])]
+        self.default = spec.get("default", "allow")
+        self.rules = spec.get("rules", [])
+        # alternatives are tried left to right, so m.lastgroup names the first rule that matches
+        alts = [f"(?P<r{i}>{glob_to_regex(r['glob'])})" for i, r in enumerate(self.rules)]
+        self._rx = re.compile("|".join(alts)) if alts else None
+
+    @classmethod
+    def load(cls, path: Path) -> "WebPolicy":
+        return cls(json.loads(path.read_text(encoding="utf-8")))
+
+    def match(self, rel: str):
+        """(action, rule or None) for a repo-relative posix path."""
+        m = self._rx.fullmatch(rel) if self._rx else None
+        if m is None:
+            return self.default, None
+        rule = self.rules[int(m.lastgroup[1:])]
+        return rule.get("action", "deny"), rule
+
+    def pruned(self, rel: str) -> bool:
+        return any(rel == p or rel.startswith(p + "/") for p in self.prune)
+
+
+def changed_paths(ref: str) -> list:
+    """Repo-relative paths changed (deletions included) against `ref` (staged + unstaged) plus untracked files."""
+    def git(*args):
+        res = subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True)
+        if res.returncode != 0:
+            raise SystemExit(f"[contract_checks] git {' '.join(args)} failed: {res.stderr.strip()}")
+        return [ln for ln in res.stdout.splitlines() if ln]
+
+    paths = git("diff", "--name-only", "--diff-filter=ACMRD", ref)
+    paths += git("ls-files", "--others", "--exclude-standard")
+    return sorted(set(paths))
+
+
+def check_unique_graph_spider_impl(only: list = None) -> None:
+    """Enforce specs/web_policy.json over web/ (or over `only`, a list of repo-relative paths)."""
+    policy = WebPolicy.load(WEB_POLICY)
+    web_root = ROOT / policy.root
     if not web_root.exists():
-        print("[contract_checks] web/ not found (skip unique impl check)")
+        print(f"[contract_checks] {policy.root}/ not found (skip unique impl check)")
         return
 
-    archive_root = web_root / "_archive"
-
-    violations: list[Path] = []
-
-    # Hard rule: only web/graph_spider owns the real implementation.
-    # - No versioned implementation files in web/graph_spider
-    # - No extra implementations under web/graph_spider_v*
-    # - graph_spider_v2 is allowed as a redirect shell with ONLY index.html
-    # - legacy files must live under web/_archive
-    for p in web_root.rglob("*"):
-        if p.is_dir():
-            continue
-
-        # Allow any historical copies under archive.
-        if archive_root in p.parents:
-            continue
-
-        rel = p.relative_to(ROOT).as_posix()
-
-        # Forbid stray legacy web-root qwebchannel.js placeholder.
-        if rel == "web/qwebchannel.js":
-            violations.append(p)
-            continue
-
-        # Forbid experimental/versioned spider implementations.
-        if rel.startswith("web/graph_spider/"):
-            name = p.name
-            if name == "bootstrap_graph.js":
-                violations.append(p)
-                continue
-            if name.startswith("spider_v") and name.endswith((".js", ".css")):
-                violations.append(p)
-                continue
-
-        # Enforce graph_spider_v2 is redirect-only.
-        if rel.startswith("web/graph_spider_v2/"):
-            if rel != "web/graph_spider_v2/index.html":
-                violations.append(p)
-            continue
-
-        # Forbid any other web/graph_spider_v*/ trees outside _archive.
-        if rel.startswith("web/graph_spider_v"):
-            violations.append(p)
+    if only is None:
+        # Pruned trees (web/_archive holds historical copies) are never descended.
+        prefix = policy.root + "/"
+        skip = {p[len(prefix):] for p in policy.prune if p.startswith(prefix)}
+        walked = walk_files(web_root, skip_dirs=(), ignore_files=(), skip_rels=skip)
+        rels = [prefix + fe.rel for fe in walked.files]
+    else:
+        rels = [r for r in only if r.startswith(policy.root + "/") and not policy.pruned(r) and (ROOT / r).is_file()]
+
+    violations = []
+    for rel in rels:
+        action, rule = policy.match(rel)
+        if action == "deny":
+            violations.append((rel, rule.get("reason", "") if rule else "denied by default"))
 
     if violations:
-        formatted = "\n".join(f"- {v.relative_to(ROOT).as_posix()}" for v in sorted(violations))
+        formatted = "\n".join(f"- {rel}" + (f"  ({why})" if why else "") for rel, why in sorted(violations))
         raise SystemExit(
             "[contract_checks] unique Graph Spider implementation violated.\n"
             "Move experimental/legacy files under web/_archive/ or delete them:\n"
             f"{formatted}"
         )
 
-    print("[contract_checks] unique Graph Spider implementation ok")
+    scope = f" ({len(rels)} changed path(s))" if only is not None else ""
+    print(f"[contract_checks] unique Graph Spider implementation ok{scope}")
+
+
+def check_meta(meta_path: Path, docs_root: Path = None, as_json: bool = False) -> None:
+    """Schema + referential integrity of a pipeline graph meta (see _meta_validate)."""
+    problems = validate_meta_file(meta_path, ROOT, docs_root)
+    if as_json:
+        print(json.dumps({"meta": str(meta_path), "ok": not problems, "problems": problems}, ensure_ascii=False))
+        if problems:
+            raise SystemExit(1)
+        return
+    if problems:
+        raise SystemExit(
+            f"[contract_checks] {meta_path.name}: {len(problems)} problem(s)\n{format_problems(problems)}"
+        )
+    print("[contract_checks] meta schema + references ok")
+
 
 def main():
+    ap = argparse.ArgumentParser(description="Contract checks (schemas, meta integrity, unique graph_spider impl).")
+    ap.add_argument("--meta", default="", help="only validate this pipeline graph meta (fast path for GUI saves)")
+    ap.add_argument("--root", default="", help="with --meta: project root whose docs/ backs doc: ids "
+                    "(default: the meta's project when it lives in <root>/meta/, else doc: files are not checked)")
+    ap.add_argument("--json", action="store_true", help="with --meta: print the problems as JSON")
+    ap.add_argument("--changed", nargs="?", const="HEAD", default=None, metavar="REF",
+                    help="pre-commit mode: only check paths changed against REF (default HEAD) and untracked files")
+    args = ap.parse_args()
+    if args.meta:
+        meta = Path(args.meta)
+        docs_root = Path(args.root) if args.root else (meta.resolve().parents[1] if meta.resolve().parent.name == "meta" else None)
+        check_meta(meta, docs_root, args.json)
+        return
+
     missing = [p for p in SCHEMAS if not p.exists()]
     if missing:
         raise SystemExit(f"[contract_checks] missing schema files: {missing}")
     print("[contract_checks] schema presence ok")
 
+    changed = changed_paths(args.changed) if args.changed is not None else None
     sample_meta = ROOT / "meta" / "pipeline_graph.json"
-    if sample_meta.exists():
-        data = json.loads(sample_meta.read_text(encoding="utf-8"))
-        if "schema_version" not in data:
-            raise SystemExit("[contract_checks] meta/pipeline_graph.json missing schema_version")
-        print("[contract_checks] meta schema_version ok")
-    else:
+    # the meta's verdict also depends on its schema and on which docs/<name>.md exist
+    meta_inputs = ("meta/pipeline_graph.json", SCHEMA_REL.as_posix())
+    if not sample_meta.exists():
         print("[contract_checks] meta/pipeline_graph.json not found (ok for fresh project)")
+    elif changed is not None and not any(p in meta_inputs or p.startswith("docs/") for p in changed):
+        print("[contract_checks] meta, schema and docs/ unchanged (skip)")
+    else:
+        check_meta(sample_meta, ROOT)
 
-    check_unique_graph_spider_impl()
+    # a changed policy can reject files that did not change: re-check the whole tree
+    web_policy_changed = changed is not None and WEB_POLICY.relative_to(ROOT).as_posix() in changed
+    check_unique_graph_spider_impl(None if web_policy_changed else changed)
 
 if __name__ == "__main__":
     main()
@@ -4,13 +4,19 @@
 import argparse
 import json
 import os
-import subprocess
+import threading
 import time
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
+import _check_cache
+from _check_scheduler import plan_checks, run_scheduled, select_checks, slug
+from _proc_stream import DEFAULT_MAX_LOG_BYTES, DEFAULT_TAIL_LINES, run_streaming
+from _run_events import EventWriter
 from _issue_memory import tail_text, guess_quick_fix, write_latest, append_index
 
+DEFAULT_JOBS = min(4, os.cpu_count() or 1)
+
 def find_repo_root(start: Path) -> Path:
     cur = start.resolve()
     for _ in range(12):
@@ -24,29 +30,28 @@ def find_repo_root(start: Path) -> Path:
 def now_stamp() -> str:
     return time.strftime("%Y%m%d_%H%M%S", time.localtime())
 
-def run_cmd(cmd: str, cwd: Path, timeout_sec: int) -> Tuple[int, str, str, float]:
-    t0 = time.time()
-    try:
-        p = subprocess.run(
-            cmd,
-            cwd=str(cwd),
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=timeout_sec,
-        )
-        return p.returncode, p.stdout, p.stderr, (time.time() - t0)
-    except subprocess.TimeoutExpired as e:
-        out = e.stdout or ""
-        err = (e.stderr or "") + "\n[TIMEOUT]"
-        return 124, out, err, (time.time() - t0)
+def run_cmd(cmd: str, cwd: Path, timeout_sec: int, log_prefix: Path, env: Optional[Dict[str, str]] = None,
+            tail_lines: int = DEFAULT_TAIL_LINES, max_log_bytes: int = DEFAULT_MAX_LOG_BYTES,
+            on_stdout=None, on_stderr=None, stop_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """Run one check; full output is streamed to <log_prefix>.stdout.log/.stderr.log, only tails stay in memory."""
+    return run_streaming(
+        cmd, cwd, timeout_sec,
+        stdout_log=log_prefix.with_name(log_prefix.name + ".stdout.log"),
+        stderr_log=log_prefix.with_name(log_prefix.name + ".stderr.log"),
+        env=env, tail_lines=tail_lines, max_log_bytes=max_log_bytes,
+        on_stdout=on_stdout, on_stderr=on_stderr, stop_event=stop_event,
+    )
+
+def split_patterns(values: Optional[List[str]]) -> List[str]:
+    """--only/--skip values; each may also be a comma-separated list."""
+    return [p.strip() for v in values or [] for p in v.split(",") if p.strip()]
 
 def load_suites(repo: Path) -> List[Dict[str, Any]]:
     suites: List[Dict[str, Any]] = []
     specs = repo / "specs"
     if not specs.exists():
         return suites
-    for p in specs.rglob("*.checks.json"):
+    for p in sorted(specs.rglob("*.checks.json")):
         try:
             data = json.loads(p.read_text(encoding="utf-8"))
             checks = data.get("checks", [])
@@ -72,9 +77,12 @@ def write_report_md(path: Path, report: Dict[str, Any]) -> None:
     for suite in report.get("suites", []):
         lines.append(f"## {suite['id']} ({suite['file']})\n\n")
         for r in suite.get("results", []):
-            ok = "PASS" if r["pass"] else "FAIL"
-            lines.append(f"- **{ok}** `{r['name']}` ({r['seconds']:.2f}s)\n")
-            if not r["pass"]:
+            ok = "PASS" if r["pass"] else "SKIP" if r.get("aborted") else "FAIL"
+            cache = f" · cache: {r['cache']}" if r.get("cache") else ""
+            lines.append(f"- **{ok}** `{r['name']}` ({r['seconds']:.2f}s){cache}\n")
+            if not r["pass"] and not r.get("aborted"):
+                if r.get("stdout_log"):
+                    lines.append(f"  - logs: `{r['stdout_log']}`, `{r.get('stderr_log', '')}`\n")
                 if r.get("stdout"):
                     tail = "\n".join(r["stdout"].splitlines()[-30:])
                     lines.append("  - stdout (tail):\n```\n" + tail + "\n```\n")
@@ -91,7 +99,7 @@ def write_error_set(out_dir: Path, repo: Path, ts: str, report: Dict[str, Any])
 
     for suite in report.get("suites", []):
         for r in suite.get("results", []):
-            if r.get("pass"):
+            if r.get("pass") or r.get("aborted"):
                 continue
             stdout = r.get("stdout", "") or ""
             stderr = r.get("stderr", "") or ""
@@ -109,7 +117,7 @@ def write_error_set(out_dir: Path, repo: Path, ts: str, report: Dict[str, Any])
                 "returncode": r.get("returncode"),
                 "symptoms": symptoms.strip(),
                 "quick_fix": quick_fix,
-                "artifacts_dir": str(artifacts_dir),
+                "artifacts_dir": r.get("artifacts_dir") or str(artifacts_dir),
                 "report_path": str(report_path),
             })
 
@@ -136,13 +144,24 @@ def main() -> int:
     ap.add_argument("--repo", default=".", help="repo root (auto detect upward)")
     ap.add_argument("--out", default="", help="output dir (default runs/self_check/<ts>)")
     ap.add_argument("--no-error-set", action="store_true", help="do not emit error_set / issue_memory")
+    ap.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help=f"max checks in flight (default {DEFAULT_JOBS})")
+    ap.add_argument("--no-cache", action="store_true", help="re-run checks even if their declared inputs are unchanged")
+    ap.add_argument("--tail-lines", type=int, default=DEFAULT_TAIL_LINES, help="stdout/stderr lines kept in report.json per check")
+    ap.add_argument("--max-log-mb", type=float, default=DEFAULT_MAX_LOG_BYTES / (1024 * 1024), help="cap per check log file size")
+    ap.add_argument("--event-log-lines", type=int, default=200, help="max 'log' events per check in events.jsonl (full output stays in logs/)")
+    ap.add_argument("--only", action="append", metavar="SUITE::CHECK",
+                    help="run only these checks (check id, suite id or glob; repeatable or comma-separated); their dependencies run too")
+    ap.add_argument("--skip", action="append", metavar="SUITE::CHECK", help="do not run these checks (same patterns as --only)")
+    ap.add_argument("--fail-fast", action="store_true", help="stop at the first failing check: running checks are killed, the rest skipped")
     args = ap.parse_args()
+    only, skip = split_patterns(args.only), split_patterns(args.skip)
 
     repo = find_repo_root(Path(args.repo))
     ts = now_stamp()
     out_dir = Path(args.out) if args.out else (repo / "runs" / "self_check" / ts)
     artifacts_dir = out_dir / "artifacts"
     artifacts_dir.mkdir(parents=True, exist_ok=True)
+    logs_dir = out_dir / "logs"
 
     suites = load_suites(repo)
     if not suites:
@@ -152,34 +171,112 @@ def main() -> int:
         print(report["error"])
         return 2
 
+    nodes = select_checks(plan_checks(suites), only)
+    selection = {"only": only, "skip": skip, "fail_fast": args.fail_fast} if (only or skip or args.fail_fast) else None
+    if not nodes:
+        # a typo in --only must not pass as "nothing failed"; --skip leaving nothing to run is fine
+        report = {"timestamp": ts, "repo_root": str(repo), "pass": False, "suites": [], "selection": selection,
+                  "error": f"No check matches --only {', '.join(only)}"}
+        (out_dir / "report.json").write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        write_report_md(out_dir / "report.md", report)
+        print(report["error"])
+        return 2
+    nodes = select_checks(nodes, skip=skip)
+
     os.environ["SDDAI_SELF_CHECK_OUT"] = str(out_dir)
     os.environ["SDDAI_SELF_CHECK_ARTIFACTS"] = str(artifacts_dir)
+    stop = threading.Event()
 
-    all_pass = True
-    report_suites: List[Dict[str, Any]] = []
-
-    for suite in suites:
-        results = []
-        for chk in suite["checks"]:
-            name = chk.get("name", "unnamed")
-            cmd = chk.get("cmd", "")
-            timeout_sec = int(chk.get("timeout_sec", 120))
-            if not cmd:
-                all_pass = False
-                results.append({"name": name, "pass": False, "returncode": 2, "stdout": "", "stderr": "missing cmd", "seconds": 0.0, "cmd": cmd})
-                continue
+    # live progress: events.jsonl (run_events.schema.json), flushed per line
+    events = EventWriter(out_dir / "events.jsonl", run_id=ts)
+    events.step_enter("self_check", message=f"{len(nodes)} checks, jobs={args.jobs}" + (", fail-fast" if args.fail_fast else ""))
+
+    def log_sink(step_id: str, stream: str):
+        budget = [args.event_log_lines]
+
+        def _sink(line: str) -> None:
+            if budget[0] > 0:
+                events.emit("log", step_id, stream=stream, message=line)
+            elif budget[0] == 0:
+                events.emit("log", step_id, stream=stream, message="[further output only in logs/]")
+            budget[0] -= 1
+        return _sink
+
+    def run_one(node: Dict[str, Any]) -> Dict[str, Any]:
+        chk = node["chk"]
+        name = chk.get("name", "unnamed")
+        cmd = chk.get("cmd", "")
+        timeout_sec = int(chk.get("timeout_sec", 120))
+        if not cmd:
+            return {"name": name, "pass": False, "returncode": 2, "stdout": "", "stderr": "missing cmd", "seconds": 0.0, "cmd": cmd}
+        # every check gets its own artifacts dir so concurrent checks never overwrite each other
+        check_artifacts = artifacts_dir / slug(node["suite_id"]) / node["dir"]
+        check_artifacts.mkdir(parents=True, exist_ok=True)
+        log_prefix = logs_dir / slug(node["suite_id"]) / node["dir"]
+        events.step_enter(node["id"], message=cmd)
+        key = None if args.no_cache else _check_cache.cache_key(repo, chk)
+        if key:
+            hit = _check_cache.load(repo, key, check_artifacts, log_prefix)
+            if hit is not None:
+                return hit
+        env = dict(os.environ, SDDAI_SELF_CHECK_ARTIFACTS=str(check_artifacts), SDDAI_CHECK_ID=node["id"])
+        run = run_cmd(cmd, repo, timeout_sec, log_prefix, env=env,
+                      tail_lines=args.tail_lines, max_log_bytes=int(args.max_log_mb * 1024 * 1024),
+                      on_stdout=log_sink(node["id"], "stdout"), on_stderr=log_sink(node["id"], "stderr"),
+                      stop_event=stop)
+        res = {"name": name, "pass": run["returncode"] == 0, "cmd": cmd, "artifacts_dir": str(check_artifacts), **run}
+        if run["returncode"] == 130 and stop.is_set():
+            # killed by --fail-fast after another check failed: neither pass nor a failure of its own
+            res.update(skipped=True, aborted=True, stderr=(run["stderr"] + "\n[SKIPPED] fail-fast").strip())
+            return res
+        if chk.get("inputs"):
+            res["cache"] = "miss" if key else "off"
+        if key:
+            _check_cache.store(repo, key, chk, res, check_artifacts)
+        return res
+
+    def skip_result(node: Dict[str, Any], reason: str) -> Dict[str, Any]:
+        chk = node["chk"]
+        res = {"name": chk.get("name", "unnamed"), "pass": False, "returncode": 3, "stdout": "", "stderr": f"[SKIPPED] {reason}",
+               "seconds": 0.0, "cmd": chk.get("cmd", ""), "skipped": True}
+        if stop.is_set():
+            res["aborted"] = True  # never ran because of --fail-fast: not a failure of its own
+        return res
+
+    def on_done(node: Dict[str, Any], res: Dict[str, Any]) -> None:
+        sid = node["id"]
+        if not events.entered(sid):
+            events.step_enter(sid, message=res.get("cmd", ""))
+        outputs = [str(Path(res[k]).relative_to(out_dir)) for k in ("stdout_log", "stderr_log") if res.get(k)]
+        art = Path(res["artifacts_dir"]) if res.get("artifacts_dir") else None
+        if art is not None and art.exists():
+            outputs += sorted(str(f.relative_to(out_dir)) for f in art.rglob("*") if f.is_file())
+        if outputs:
+            events.emit("artifact", sid, outputs=outputs)
+        status = "skip" if res.get("skipped") else ("ok" if res["pass"] else "fail")
+        events.step_exit(sid, status, returncode=res.get("returncode"), seconds=round(res["seconds"], 3),
+                         cache=res.get("cache"), message=res["stderr"] if res.get("skipped") else None)
+        verdict = "PASS" if res["pass"] else "SKIP" if res.get("aborted") else "FAIL"
+        print(f"[self_check] {verdict} {sid} ({res['seconds']:.2f}s)", flush=True)
 
-            rc, out, err, sec = run_cmd(cmd, repo, timeout_sec)
-            ok = (rc == 0)
-            if not ok:
-                all_pass = False
-            results.append({"name": name, "pass": ok, "returncode": rc, "stdout": out, "stderr": err, "seconds": sec, "cmd": cmd})
+    results = run_scheduled(nodes, run_one, skip_result, jobs=args.jobs, on_done=on_done,
+                            fail_fast=args.fail_fast, stop_event=stop)
 
-        report_suites.append({"id": suite["id"], "file": suite["file"], "results": results})
+    all_pass = all(r["pass"] for r in results.values())
+    report_suites: List[Dict[str, Any]] = [
+        {"id": suite["id"], "file": suite["file"], "results": [results[n["id"]] for n in nodes if n["suite_index"] == si]}
+        for si, suite in enumerate(suites)
+        if any(n["suite_index"] == si for n in nodes)
+    ]
 
     report = {"timestamp": ts, "repo_root": str(repo), "pass": all_pass, "suites": report_suites}
+    if selection:
+        report["selection"] = selection
     (out_dir / "report.json").write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
     write_report_md(out_dir / "report.md", report)
+    events.emit("artifact", "self_check", outputs=["report.json", "report.md"])
+    events.step_exit("self_check", "ok" if all_pass else "fail")
+    events.close()
 
     if not args.no_error_set:
         es = write_error_set(out_dir, repo, ts, report)
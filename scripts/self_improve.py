@@ -2,15 +2,25 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+import json
 import os
 import re
+import shutil
 import subprocess
 import sys
+import tempfile
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+from _issue_memory import load_failure_stats, load_recent_errors
+from _proc_stream import run_streaming
 
 PATCH_START_RE = re.compile(r"^diff --git ", re.M)
+# tool output dirs: never mirrored into candidate worktrees
+LIVE_STATE_SKIP = ("runs/", "issue_memory/")
 
 def find_repo_root(start: Path) -> Path:
     cur = start.resolve()
@@ -24,15 +34,15 @@ def now_stamp() -> str:
     return time.strftime("%Y%m%d_%H%M%S", time.localtime())
 
 def run(cmd: str, cwd: Path, timeout_sec: int = 300) -> Tuple[int, str, str]:
+    """Short commands only (git); long/chatty ones go through run_streaming."""
     p = subprocess.run(cmd, cwd=str(cwd), shell=True, capture_output=True, text=True, timeout=timeout_sec)
     return p.returncode, p.stdout, p.stderr
 
-def latest_self_check_report(repo: Path) -> Optional[Path]:
-    root = repo / "runs" / "self_check"
-    if not root.exists():
-        return None
-    reports = sorted(root.glob("*/report.md"), key=lambda p: p.parent.name, reverse=True)
-    return reports[0] if reports else None
+def echo_line(stream):
+    def _echo(line: str) -> None:
+        stream.write(line + "\n")
+        stream.flush()
+    return _echo
 
 def extract_patch(stdout_text: str) -> Optional[str]:
     m = PATCH_START_RE.search(stdout_text)
@@ -62,6 +72,16 @@ def make_prompt(report_md: Path, out_dir: Path) -> Path:
                 prompt.append(f"  - {f.get('suite_id','')}::{f.get('check_name','')} | quick_fix: {f.get('quick_fix','')}\n")
         prompt.append("\n")
 
+    # 反复出现的失败（按次数），来自 issue_memory/errors/stats.json
+    recurring = sorted(load_failure_stats(repo).get("failures", {}).values(), key=lambda x: -x.get("count", 0))
+    recurring = [r for r in recurring if r.get("count", 0) > 1][:5]
+    if recurring:
+        prompt.append("## Recurring Failures\n\n")
+        for r in recurring:
+            prompt.append(f"- x{r['count']} {r.get('suite_id','')}::{r.get('check_name','')} "
+                          f"({r.get('first_seen','')} → {r.get('last_seen','')}) | quick_fix: {r.get('quick_fix','')}\n")
+        prompt.append("\n")
+
     prompt.append("## 当前 report.md\n\n")
     prompt.append(report_text)
     p = out_dir / "fix_prompt.md"
@@ -75,13 +95,196 @@ def git_apply(repo: Path, patch_path: Path) -> bool:
     sys.stderr.write("[git apply failed]\n" + out + "\n" + err + "\n")
     return False
 
+def live_state(repo: Path, out_dir: Path) -> Tuple[Optional[Path], List[str]]:
+    """Uncommitted state of the checkout: (`git diff HEAD --binary` saved as a patch or None, untracked files)."""
+    p = subprocess.run(["git", "diff", "HEAD", "--binary"], cwd=str(repo), capture_output=True)
+    base = None
+    if p.stdout.strip():
+        base = out_dir / "live_state.diff"
+        base.write_bytes(p.stdout)
+    p = subprocess.run(["git", "ls-files", "--others", "--exclude-standard", "-z"], cwd=str(repo), capture_output=True)
+    untracked = [f for f in p.stdout.decode("utf-8", errors="replace").split("\0") if f and not f.startswith(LIVE_STATE_SKIP)]
+    return base, untracked
+
+def add_worktree(repo: Path, wt: Path, base: Optional[Path], untracked: List[str]) -> Optional[str]:
+    """Detached worktree at HEAD plus the live checkout's uncommitted changes. Returns an error or None."""
+    rc, out, err = run(f'git worktree add --detach "{wt}" HEAD', repo, timeout_sec=300)
+    if rc != 0:
+        return "git worktree add failed: " + (err or out).strip()
+    if base is not None:
+        rc, out, err = run(f'git apply --whitespace=nowarn "{base}"', wt, timeout_sec=300)
+        if rc != 0:
+            return "live state does not apply: " + (err or out).strip()
+    for rel in untracked:
+        dst = wt / rel
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(repo / rel, dst)
+    return None
+
+def remove_worktree(repo: Path, wt: Path) -> None:
+    run(f'git worktree remove --force "{wt}"', repo, timeout_sec=300)
+    shutil.rmtree(wt, ignore_errors=True)
+
+def failing_checks(report_json: Path) -> Optional[List[str]]:
+    """Ids ("suite_id::check name") of checks that failed; checks skipped by --fail-fast are not failures."""
+    try:
+        report = json.loads(report_json.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return [f"{s.get('id')}::{r.get('name')}" for s in report.get("suites", []) for r in s.get("results", [])
+            if not r.get("pass") and not r.get("aborted")]
+
+def count_failures(report_json: Path) -> Optional[int]:
+    failed = failing_checks(report_json)
+    return None if failed is None else len(failed)
+
+def run_self_check(repo: Path, log_dir: Path, tag: str, select: List[str], max_log_bytes: int) -> Dict[str, Any]:
+    """One self_check run into runs/self_check/<ts>[_<tag>]; `select` are extra --only/--skip/--fail-fast args."""
+    out = repo / "runs" / "self_check" / (now_stamp() + (f"_{tag}" if tag else ""))
+    logs = f"self_check.{tag}" if tag else "self_check"
+    cmd = " ".join(["python scripts/self_check.py", f'--out "{out}"', *select])
+    sc = run_streaming(
+        cmd, repo, 900,
+        stdout_log=log_dir / f"{logs}.stdout.log", stderr_log=log_dir / f"{logs}.stderr.log",
+        max_log_bytes=max_log_bytes, on_stdout=echo_line(sys.stdout), on_stderr=echo_line(sys.stderr),
+    )
+    return {"phase": tag or "full", "cmd": cmd, "returncode": sc["returncode"], "seconds": round(sc["seconds"], 2),
+            "report": str(out / "report.md"), "failed": failing_checks(out / "report.json")}
+
+def verify(repo: Path, log_dir: Path, i: int, failed_before: List[str], full_seconds: Optional[float],
+           max_log_bytes: int) -> Dict[str, Any]:
+    """Check the tree: a full run, or -- once a full run has named the failures -- fail-first targeted runs.
+
+    Targeted: the previously failing checks alone (--only, all of them run so the next prompt sees
+    every remaining failure); if they pass, everything else (--skip, --fail-fast) to catch regressions. The result (also round_XX/verify.json) holds the
+    deciding phase's report and failures and, for targeted rounds, the time saved against the last full run.
+    """
+    if not failed_before or full_seconds is None:
+        phases = [run_self_check(repo, log_dir, "", [], max_log_bytes)]
+        record: Dict[str, Any] = {"round": i, "mode": "full"}
+    else:
+        quoted = [f'"{c}"' for c in failed_before]
+        phases = [run_self_check(repo, log_dir, f"r{i:02d}_failed", [a for c in quoted for a in ("--only", c)], max_log_bytes)]
+        if phases[0]["returncode"] == 0:
+            phases.append(run_self_check(repo, log_dir, f"r{i:02d}_rest", [a for c in quoted for a in ("--skip", c)] + ["--fail-fast"],
+                                         max_log_bytes))
+        record = {"round": i, "mode": "targeted", "previous_failures": failed_before}
+        if phases[-1]["returncode"] != 0 and not phases[-1]["failed"]:
+            # failed without a failing check (renamed check, no report): only a full run can tell
+            phases.append(run_self_check(repo, log_dir, "", [], max_log_bytes))
+            record["mode"] = "full"
+    last = phases[-1]
+    seconds = round(sum(p["seconds"] for p in phases), 2)
+    record.update(phases=phases, returncode=last["returncode"], report=last["report"], failed=last["failed"], seconds=seconds)
+    if record["mode"] == "targeted":
+        record.update(full_run_seconds=full_seconds, saved_seconds=round(max(0.0, full_seconds - seconds), 2))
+    log_dir.mkdir(parents=True, exist_ok=True)
+    (log_dir / "verify.json").write_text(json.dumps(record, ensure_ascii=False, indent=2), encoding="utf-8")
+    return record
+
+def run_candidate(k: int, wt: Path, cand_dir: Path, prompt_path: Path, patch_cmd_tpl: str,
+                  stop: threading.Event, max_log_bytes: int) -> Dict[str, Any]:
+    """Generate, apply and verify one candidate patch inside its worktree."""
+    t0 = time.time()
+    res: Dict[str, Any] = {"candidate": k, "worktree": str(wt), "pass": False}
+    cmd = patch_cmd_tpl.format(PROMPT_PATH=str(prompt_path), REPO_ROOT=str(wt), CANDIDATE=k)
+    env = dict(os.environ, SDDAI_CANDIDATE=str(k))
+    pc = run_streaming(cmd, wt, 1800, stdout_log=cand_dir / "patch_cmd.stdout.txt",
+                       stderr_log=cand_dir / "patch_cmd.stderr.txt", env=env,
+                       max_log_bytes=max_log_bytes, stop_event=stop)
+    res["patch_cmd_rc"] = pc["returncode"]
+    if stop.is_set():
+        return {**res, "status": "cancelled", "seconds": time.time() - t0}
+    patch_text = extract_patch((cand_dir / "patch_cmd.stdout.txt").read_text(encoding="utf-8", errors="replace"))
+    if not patch_text:
+        return {**res, "status": "no_patch", "seconds": time.time() - t0}
+    patch_path = cand_dir / f"candidate_{k:02d}.patch"
+    patch_path.write_text(patch_text, encoding="utf-8")
+    res["patch"] = str(patch_path)
+    rc, out, err = run(f'git apply "{patch_path}"', wt, timeout_sec=120)
+    if rc != 0:
+        return {**res, "status": "apply_failed", "error": (err or out).strip()[-2000:], "seconds": time.time() - t0}
+    sc_out = cand_dir / "self_check"
+    sc = run_streaming(f'python scripts/self_check.py --no-error-set --out "{sc_out}"', wt, 900,
+                       stdout_log=cand_dir / "self_check.stdout.log", stderr_log=cand_dir / "self_check.stderr.log",
+                       max_log_bytes=max_log_bytes, stop_event=stop)
+    status = "cancelled" if sc["returncode"] == 130 and stop.is_set() else ("pass" if sc["returncode"] == 0 else "fail")
+    return {**res, "status": status, "pass": status == "pass", "failures": count_failures(sc_out / "report.json"),
+            "report": str(sc_out / "report.md"), "seconds": time.time() - t0}
+
+def run_candidates(repo: Path, round_dir: Path, prompt_path: Path, patch_cmd_tpl: str, k: int,
+                   max_log_bytes: int, current_failures: Optional[int]) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """K candidates in parallel worktrees; the first to pass cancels the rest.
+
+    Returns (candidate to promote or None, all results). Without a passing
+    candidate, the one with the fewest failing checks is promoted only if that is
+    strictly fewer than `current_failures` (the live tree's count this round).
+    """
+    base, untracked = live_state(repo, round_dir)
+    wt_root = Path(tempfile.mkdtemp(prefix="sddai_candidates_"))
+    stop = threading.Event()
+    results: List[Dict[str, Any]] = []
+    winner: Optional[Dict[str, Any]] = None
+    worktrees: List[Path] = []
+    try:
+        jobs = {}
+        with ThreadPoolExecutor(max_workers=k) as ex:
+            for c in range(1, k + 1):
+                wt = wt_root / f"cand_{c:02d}"
+                # created one by one: concurrent `git worktree add` contend for the repo's locks
+                err = add_worktree(repo, wt, base, untracked)
+                worktrees.append(wt)
+                if err:
+                    results.append({"candidate": c, "status": "setup_failed", "pass": False, "error": err})
+                    continue
+                cand_dir = round_dir / f"cand_{c:02d}"
+                jobs[ex.submit(run_candidate, c, wt, cand_dir, prompt_path, patch_cmd_tpl, stop, max_log_bytes)] = c
+            pending = set(jobs)
+            try:
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        res = fut.result()
+                        results.append(res)
+                        print(f"[self_improve] candidate {res['candidate']}: {res['status']} ({res.get('seconds', 0):.1f}s)", flush=True)
+                        if res["pass"] and winner is None:
+                            winner = res
+                            stop.set()
+            except BaseException:
+                stop.set()
+                raise
+    finally:
+        for wt in worktrees:
+            remove_worktree(repo, wt)
+        run("git worktree prune", repo)
+        shutil.rmtree(wt_root, ignore_errors=True)
+
+    results.sort(key=lambda r: r["candidate"])
+    if winner is None and current_failures is not None:
+        applied = [r for r in results if r.get("status") == "fail" and r.get("failures") is not None]
+        best = min(applied, key=lambda r: (r["failures"], r["candidate"])) if applied else None
+        if best is not None and best["failures"] < current_failures:
+            winner = best
+    (round_dir / "candidates.json").write_text(json.dumps(
+        {"candidates": k, "current_failures": current_failures,
+         "winner": winner["candidate"] if winner else None, "winner_passed": bool(winner and winner["pass"]),
+         "results": results}, ensure_ascii=False, indent=2), encoding="utf-8")
+    return winner, results
+
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--repo", default=".")
     ap.add_argument("--max-rounds", type=int, default=3)
-    ap.add_argument("--patch-cmd", default="", help="override SDDAI_PATCH_CMD. supports {PROMPT_PATH} {REPO_ROOT}")
+    ap.add_argument("--patch-cmd", default="", help="override SDDAI_PATCH_CMD. supports {PROMPT_PATH} {REPO_ROOT} {CANDIDATE}")
     ap.add_argument("--no-apply", action="store_true", help="do not git apply (only generate prompts/patches)")
+    ap.add_argument("--candidates", type=int, default=1,
+                    help="K > 1: generate K patches concurrently, each applied and self-checked in its own git worktree; "
+                         "the first to pass is applied here")
+    ap.add_argument("--max-log-mb", type=float, default=256.0, help="cap for self_check / patch command log files")
+    ap.add_argument("--full-verify", action="store_true",
+                    help="run the full self_check every round (default: previous failures first, then the rest, fail-fast)")
     args = ap.parse_args()
+    max_log_bytes = int(args.max_log_mb * 1024 * 1024)
 
     repo = find_repo_root(Path(args.repo))
     ts = now_stamp()
@@ -90,19 +293,30 @@ def main() -> int:
 
     patch_cmd_tpl = (args.patch_cmd or os.environ.get("SDDAI_PATCH_CMD", "")).strip()
 
+    failed: List[str] = []
+    full_seconds: Optional[float] = None
+    saved = 0.0
     for i in range(1, args.max_rounds + 1):
-        rc, out, err = run("python scripts/self_check.py", repo, timeout_sec=900)
-        sys.stdout.write(out)
-        sys.stderr.write(err)
+        log_dir = out_root / f"round_{i:02d}"
+        v = verify(repo, log_dir, i, [] if args.full_verify else failed, full_seconds, max_log_bytes)
+        if v["mode"] == "full":
+            full_seconds = v["phases"][-1]["seconds"]
+        else:
+            saved += v["saved_seconds"]
+            print(f"[self_improve] targeted verify: {v['seconds']:.1f}s vs {full_seconds:.1f}s full run "
+                  f"(saved {v['saved_seconds']:.1f}s, {saved:.1f}s so far)")
+        rc = v["returncode"]
 
         if rc == 0:
             print(f"[self_improve] PASS at round {i}")
             return 0
 
-        report = latest_self_check_report(repo)
-        if not report:
+        report = Path(v["report"])
+        if not report.exists():
             print("[self_improve] report.md not found; stop")
             return 2
+        # unreadable report.json: fall back to a full run next round
+        failed = v["failed"] or []
 
         round_dir = out_root / f"round_{i:02d}"
         round_dir.mkdir(parents=True, exist_ok=True)
@@ -114,13 +328,32 @@ def main() -> int:
             print("[self_improve] SDDAI_PATCH_CMD not set; stop after generating prompt")
             return 3
 
-        cmd = patch_cmd_tpl.format(PROMPT_PATH=str(prompt_path), REPO_ROOT=str(repo))
+        if args.candidates > 1 and not args.no_apply:
+            print(f"[self_improve] {args.candidates} candidates in parallel worktrees")
+            winner, _ = run_candidates(repo, round_dir, prompt_path, patch_cmd_tpl, args.candidates, max_log_bytes,
+                                       len(v["failed"]) if v["failed"] is not None else None)
+            if winner is None:
+                print(f"[self_improve] no candidate passed or reduced the failures; patches kept in {round_dir}/cand_NN/; stop")
+                return 4
+            how = "passed self_check" if winner["pass"] else f"fewest failures ({winner['failures']})"
+            print(f"[self_improve] promoting candidate {winner['candidate']} ({how}): {winner['patch']}")
+            if not git_apply(repo, Path(winner["patch"])):
+                print("[self_improve] patch apply failed; stop")
+                return 5
+            continue
+
+        cmd = patch_cmd_tpl.format(PROMPT_PATH=str(prompt_path), REPO_ROOT=str(repo), CANDIDATE=1)
         print(f"[self_improve] running: {cmd}")
-        prc, pout, perr = run(cmd, repo, timeout_sec=1800)
-        (round_dir / "patch_cmd.stdout.txt").write_text(pout, encoding="utf-8")
-        (round_dir / "patch_cmd.stderr.txt").write_text(perr, encoding="utf-8")
+        # the patch command's stdout goes straight to disk; the patch is read back from the log
+        pc = run_streaming(
+            cmd, repo, 1800,
+            stdout_log=round_dir / "patch_cmd.stdout.txt", stderr_log=round_dir / "patch_cmd.stderr.txt",
+            max_log_bytes=max_log_bytes,
+        )
+        if pc["returncode"] != 0:
+            print(f"[self_improve] patch cmd exit {pc['returncode']} (see {pc['stderr_log']})")
 
-        patch_text = extract_patch(pout)
+        patch_text = extract_patch((round_dir / "patch_cmd.stdout.txt").read_text(encoding="utf-8", errors="replace"))
         if not patch_text:
             print("[self_improve] no patch found in stdout; stop")
             return 4
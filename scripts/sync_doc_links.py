@@ -4,14 +4,30 @@ Sync doc_links from meta/pipeline_graph.json to corresponding .md files.
 Updates only controlled blocks (<!-- SDDAI:LINKS:BEGIN --> ... <!-- SDDAI:LINKS:END -->).
 Idempotent: running multiple times produces the same result.
 
+The meta is read once; node paths/labels come from an id index and docs_link
+edges are grouped per source in one pass. Markdown files are processed on a
+thread pool, and a file whose block already matches is not rewritten.
+
+--incremental keeps a sidecar (meta/pipeline_graph.links_state.json) with the
+digest of each source's last synced block and the file's stat; sources whose
+block digest and file are both unchanged are skipped without opening the file.
+A source listed there that has lost its last docs_link edge gets an empty block.
+--watch polls the meta and runs an incremental sync after every change.
+
 Usage:
   python scripts/sync_doc_links.py          # Write links to md files
   python scripts/sync_doc_links.py --check  # Check only, no write (for verify)
+  python scripts/sync_doc_links.py --incremental
+  python scripts/sync_doc_links.py --watch [--interval 1]
+  python scripts/sync_doc_links.py --root <repo> --jobs 8
 """
+import argparse
+import hashlib
 import json
 import os
 import sys
-import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 ROOT = Path(__file__).parent.parent
@@ -20,165 +36,364 @@ META_GRAPH = ROOT / "meta" / "pipeline_graph.json"
 BEGIN_MARKER = "<!-- SDDAI:LINKS:BEGIN -->"
 END_MARKER = "<!-- SDDAI:LINKS:END -->"
 
+DEFAULT_JOBS = min(8, (os.cpu_count() or 1) + 4)  # file I/O bound
+PARALLEL_MIN_FILES = 32
+STATE_SUFFIX = ".links_state.json"
+STATE_VERSION = 1
+
+
+def load_meta(meta_path=META_GRAPH):
+    """Load pipeline graph (None if missing)."""
+    if not meta_path.exists():
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def group_doc_links(graph_data):
+    """docs_link targets per source, in edge order (one pass)."""
+    links_by_source = {}
+    for e in graph_data.get("edges", []):
+        if e.get("type") != "docs_link":
+            continue
+        src = e.get("source")
+        tgt = e.get("target")
+        if not src or not tgt:
+            continue
+        links_by_source.setdefault(src, []).append(tgt)
+    return links_by_source
+
+
+class GraphIndex:
+    """id -> module index plus memoized path / link-line lookups."""
+
+    def __init__(self, graph_data):
+        self.modules = {}
+        for m in graph_data.get("modules", []):
+            # first definition wins, like the old linear scan
+            self.modules.setdefault(m.get("id"), m)
+        self._lines = {}
 
-def load_graph():
-    """Load pipeline graph and extract docs_link edges."""
-    if not META_GRAPH.exists():
-        return []
-    with open(META_GRAPH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    edges = data.get("edges", [])
-    return [e for e in edges if e.get("type") == "docs_link"]
-
-
-def resolve_node_path(node_id, graph_data):
-    """Resolve node_id to .md file path."""
-    # Try modules first
-    for m in graph_data.get("modules", []):
-        if m.get("id") == node_id:
-            path = m.get("path", "")
-            if path.endswith(".md"):
-                return path
-            # Module spec: path might be like specs/xxx.md
-            return path
-    
-    # Try docs: doc:<name> → docs/<name>.md
-    if node_id.startswith("doc:"):
-        name = node_id[4:]
-        return f"docs/{name}.md"
-    
-    # Fallback: search for basename match in workspace
-    # (Not implemented for simplicity, just return empty)
-    return ""
-
-
-def find_md_file(rel_path):
+    def resolve_node_path(self, node_id):
+        """Resolve node_id to .md file path."""
+        m = self.modules.get(node_id)
+        if m is not None:
+            return m.get("path", "")
+        # docs: doc:<name> → docs/<name>.md
+        if node_id.startswith("doc:"):
+            return f"docs/{node_id[4:]}.md"
+        return ""
+
+    def label(self, node_id):
+        m = self.modules.get(node_id)
+        return m.get("label", node_id) if m is not None else node_id
+
+    def link_line(self, node_id):
+        """Markdown list item for a link target, or None if it has no path."""
+        try:
+            return self._lines[node_id]
+        except KeyError:
+            path = self.resolve_node_path(node_id)
+            line = f"- [{self.label(node_id)}]({path})" if path else None
+            self._lines[node_id] = line
+            return line
+
+
+def find_md_file(rel_path, root=ROOT):
     """Find absolute path of md file from relative path."""
     if not rel_path:
         return None
-    p = ROOT / rel_path
+    p = root / rel_path
     if p.exists() and p.suffix == ".md":
         return p
     # Try without extension if not found
     if not p.exists():
-        p = ROOT / (rel_path + ".md" if not rel_path.endswith(".md") else rel_path)
+        p = root / (rel_path + ".md" if not rel_path.endswith(".md") else rel_path)
     return p if p.exists() else None
 
 
-def generate_links_block(target_ids, graph_data):
+def generate_links_block(target_ids, index):
     """Generate markdown links block from target node IDs."""
     lines = [BEGIN_MARKER, "## Links", ""]
     for tid in target_ids:
-        target_path = resolve_node_path(tid, graph_data)
-        if not target_path:
-            continue
-        # Get label from modules or use tid
-        label = tid
-        for m in graph_data.get("modules", []):
-            if m.get("id") == tid:
-                label = m.get("label", tid)
-                break
-        lines.append(f"- [{label}]({target_path})")
+        line = index.link_line(tid)
+        if line is not None:
+            lines.append(line)
     lines.append("")
     lines.append(END_MARKER)
     return "\n".join(lines)
 
 
+def find_block(content, start=0):
+    """(begin, end) offsets of the first controlled block at/after `start`, or None."""
+    b = content.find(BEGIN_MARKER, start)
+    if b < 0:
+        return None
+    e = content.find(END_MARKER, b + len(BEGIN_MARKER))
+    if e < 0:
+        return None
+    return b, e + len(END_MARKER)
+
+
+def replace_blocks(content, new_block):
+    """Replace every controlled block with new_block."""
+    parts = []
+    pos = 0
+    span = find_block(content)
+    while span:
+        parts.append(content[pos:span[0]])
+        parts.append(new_block)
+        pos = span[1]
+        span = find_block(content, pos)
+    parts.append(content[pos:])
+    return "".join(parts)
+
+
 def update_md_file(md_path, new_block):
     """Update controlled block in md file. Return True if changed."""
     with open(md_path, "r", encoding="utf-8") as f:
         content = f.read()
-    
-    # Check if markers exist
+
     if BEGIN_MARKER not in content or END_MARKER not in content:
         # No controlled block, append to end
         new_content = content.rstrip() + "\n\n" + new_block + "\n"
     else:
-        # Replace existing block
-        pattern = re.escape(BEGIN_MARKER) + r".*?" + re.escape(END_MARKER)
-        new_content = re.sub(pattern, new_block, content, flags=re.DOTALL)
-    
+        span = find_block(content)
+        if span and content[span[0]:span[1]] == new_block and find_block(content, span[1]) is None:
+            return False  # block unchanged: skip the rewrite
+        new_content = replace_blocks(content, new_block)
+
     if new_content == content:
         return False
-    
+
     with open(md_path, "w", encoding="utf-8") as f:
         f.write(new_content)
     return True
 
 
-def main():
-    check_mode = "--check" in sys.argv
-    
-    if not META_GRAPH.exists():
-        print(f"[warn] {META_GRAPH} not found, skipping")
-        return 0
-    
-    with open(META_GRAPH, "r", encoding="utf-8") as f:
-        graph_data = json.load(f)
-    
-    doc_links = load_graph()
-    if not doc_links:
-        print("[ok] no docs_link edges found")
-        return 0
-    
-    # Group by source
-    links_by_source = {}
-    for e in doc_links:
-        src = e.get("source")
-        tgt = e.get("target")
-        if not src or not tgt:
-            continue
-        if src not in links_by_source:
-            links_by_source[src] = []
-        links_by_source[src].append(tgt)
-    
-    updated = []
-    errors = []
-    
-    for src_id, targets in links_by_source.items():
-        src_path = resolve_node_path(src_id, graph_data)
-        if not src_path:
-            errors.append(f"Cannot resolve path for {src_id}")
-            continue
-        
-        md_file = find_md_file(src_path)
-        if not md_file:
-            errors.append(f"Cannot find file: {src_path}")
-            continue
-        
-        new_block = generate_links_block(targets, graph_data)
-        
-        if check_mode:
-            # Check mode: just verify
-            with open(md_file, "r", encoding="utf-8") as f:
-                content = f.read()
-            if BEGIN_MARKER in content and END_MARKER in content:
-                pattern = re.escape(BEGIN_MARKER) + r".*?" + re.escape(END_MARKER)
-                existing = re.search(pattern, content, flags=re.DOTALL)
-                if existing and existing.group(0) != new_block:
-                    errors.append(f"Out of sync: {md_file.relative_to(ROOT)}")
+def check_md_file(md_path, new_block):
+    """None if in sync, else "out_of_sync" / "missing_markers"."""
+    with open(md_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    if BEGIN_MARKER in content and END_MARKER in content:
+        span = find_block(content)
+        if span and content[span[0]:span[1]] != new_block:
+            return "out_of_sync"
+        return None
+    return "missing_markers"
+
+
+def source_md_file(src_id, index, root):
+    """(md_file, None) or (None, error message)."""
+    src_path = index.resolve_node_path(src_id)
+    if not src_path:
+        return None, f"Cannot resolve path for {src_id}"
+    md_file = find_md_file(src_path, root)
+    if not md_file:
+        return None, f"Cannot find file: {src_path}"
+    return md_file, None
+
+
+def sync_source(src_id, new_block, index, root, check_mode):
+    """Sync one source's block. Returns (status, detail, md_file); status is ok/updated/error."""
+    md_file, err = source_md_file(src_id, index, root)
+    if err:
+        return "error", err, None
+
+    rel = md_file.relative_to(root)
+    if check_mode:
+        problem = check_md_file(md_file, new_block)
+        if problem == "out_of_sync":
+            return "error", f"Out of sync: {rel}", md_file
+        if problem == "missing_markers":
+            return "error", f"Missing markers: {rel}", md_file
+        return "ok", rel, md_file
+    if update_md_file(md_file, new_block):
+        return "updated", rel, md_file
+    return "ok", rel, md_file
+
+
+def sync_all(blocks, index, root, check_mode, jobs=DEFAULT_JOBS):
+    """Run sync_source for every (source, block); results keep the source order."""
+    items = list(blocks.items())
+
+    def one(item):
+        return sync_source(item[0], item[1], index, root, check_mode)
+
+    if jobs <= 1 or len(items) < PARALLEL_MIN_FILES:
+        return [one(it) for it in items]
+    with ThreadPoolExecutor(max_workers=jobs) as ex:
+        return list(ex.map(one, items))
+
+
+def state_path(meta_path):
+    return meta_path.with_name(meta_path.stem + STATE_SUFFIX)
+
+
+def load_state(path):
+    """{source_id: {"digest", "src_path", "path", "mtime_ns", "size"}} from the sidecar ({} if absent/stale)."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != STATE_VERSION:
+        return {}
+    return data.get("sources", {})
+
+
+def save_state(path, sources):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": STATE_VERSION, "sources": sources}, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def block_digest(block):
+    return hashlib.sha1(block.encode("utf-8")).hexdigest()
+
+
+def _unchanged(entry, digest, src_path, root):
+    if not entry or entry.get("digest") != digest or entry.get("src_path") != src_path:
+        return False
+    try:
+        st = (root / entry["path"]).stat()
+    except OSError:
+        return False
+    return st.st_mtime_ns == entry.get("mtime_ns") and st.st_size == entry.get("size")
+
+
+def clear_orphan(entry, empty_block, root, check_mode):
+    """Empty the block of a source whose docs_link edges are all gone (file taken from its state entry).
+
+    Returns (status, detail) like sync_source; a file without markers is left alone.
+    """
+    md_file = root / entry.get("path", "")
+    if not entry.get("path") or not md_file.is_file():
+        return "ok", None
+    rel = md_file.relative_to(root)
+    if check_mode:
+        if check_md_file(md_file, empty_block) == "out_of_sync":
+            return "error", f"Out of sync: {rel} (no docs_link edges left)"
+        return "ok", rel
+    with open(md_file, "r", encoding="utf-8") as f:
+        has_block = find_block(f.read()) is not None
+    if has_block and update_md_file(md_file, empty_block):
+        return "updated", rel
+    return "ok", rel
+
+
+def run_sync(root, meta_path, check_mode=False, incremental=False, jobs=DEFAULT_JOBS):
+    """One sync pass. Returns (exit_code, lines to print)."""
+    graph_data = load_meta(meta_path)
+    if graph_data is None:
+        return 0, [f"[warn] {meta_path} not found, skipping"]
+
+    links_by_source = group_doc_links(graph_data)
+    # the sidecar remembers which sources had links: one that lost its last edge gets an empty block
+    sidecar = state_path(meta_path)
+    old_state = load_state(sidecar)
+    orphans = {src: e for src, e in old_state.items() if src not in links_by_source}
+    if not links_by_source and not orphans:
+        return 0, ["[ok] no docs_link edges found"]
+
+    index = GraphIndex(graph_data)
+    blocks = {src: generate_links_block(targets, index) for src, targets in links_by_source.items()}
+    digests = {}
+    skipped = 0
+    if incremental:
+        todo = {}
+        for src, block in blocks.items():
+            digests[src] = d = block_digest(block)
+            if _unchanged(old_state.get(src), d, index.resolve_node_path(src), root):
+                skipped += 1
             else:
-                errors.append(f"Missing markers: {md_file.relative_to(ROOT)}")
-        else:
-            # Write mode
-            if update_md_file(md_file, new_block):
-                updated.append(md_file.relative_to(ROOT))
-    
+                todo[src] = block
+        blocks = todo
+
+    results = sync_all(blocks, index, root, check_mode, jobs)
+    empty_block = generate_links_block([], index)
+    cleared = {src: clear_orphan(e, empty_block, root, check_mode) for src, e in orphans.items()}
+    updated = [detail for status, detail, _ in results if status == "updated"]
+    updated += [detail for status, detail in cleared.values() if status == "updated"]
+    errors = [detail for status, detail, _ in results if status == "error"]
+    errors += [detail for status, detail in cleared.values() if status == "error"]
+
+    if incremental and not check_mode:
+        # cleared orphans drop out of the state; one that could not be cleared is retried next time
+        new_state = {src: old_state[src] for src in digests if src in old_state and src not in blocks}
+        new_state.update((src, orphans[src]) for src, (status, _) in cleared.items() if status == "error")
+        for src, (status, _, md_file) in zip(blocks, results):
+            if status == "error":
+                continue
+            st = md_file.stat()
+            new_state[src] = {"digest": digests[src], "src_path": index.resolve_node_path(src),
+                              "path": md_file.relative_to(root).as_posix(),
+                              "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+        save_state(sidecar, new_state)
+
+    lines = []
+    if incremental:
+        lines.append(f"[ok] incremental: {len(blocks)} source(s) to sync, {skipped} unchanged")
     if errors:
-        for e in errors:
-            print(f"[error] {e}")
-        return 1
-    
+        return 1, lines + [f"[error] {e}" for e in errors]
     if check_mode:
-        print("[ok] all docs_link blocks in sync")
+        lines.append("[ok] all docs_link blocks in sync")
+    elif updated:
+        lines += [f"[ok] updated: {u}" for u in updated]
     else:
-        if updated:
-            for u in updated:
-                print(f"[ok] updated: {u}")
-        else:
-            print("[ok] no changes needed")
-    
-    return 0
+        lines.append("[ok] no changes needed")
+    return 0, lines
+
+
+def _meta_stamp(meta_path):
+    try:
+        st = meta_path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def watch(root, meta_path, interval, jobs):
+    """Poll the meta and run an incremental sync whenever it changes (Ctrl-C stops)."""
+    print(f"[watch] {meta_path} (every {interval}s, Ctrl-C to stop)")
+    last = None
+    try:
+        while True:
+            stamp = _meta_stamp(meta_path)
+            if stamp is not None and stamp != last:
+                try:
+                    _, lines = run_sync(root, meta_path, incremental=True, jobs=jobs)
+                except ValueError as e:
+                    # the GUI may still be writing the meta: retry on the next tick
+                    print(f"[warn] cannot parse {meta_path}: {e}")
+                else:
+                    last = stamp
+                    for ln in lines:
+                        print(ln, flush=True)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sync docs_link edges into SDDAI:LINKS blocks of Markdown files.")
+    ap.add_argument("--check", action="store_true", help="check only, no write (for verify)")
+    ap.add_argument("--incremental", action="store_true",
+                    help=f"skip sources unchanged since the last sync (state in <meta stem>{STATE_SUFFIX})")
+    ap.add_argument("--watch", action="store_true", help="poll the meta and sync incrementally on every change")
+    ap.add_argument("--interval", type=float, default=1.0, help="--watch poll interval in seconds (default 1)")
+    ap.add_argument("--root", default=str(ROOT), help="repo root (default: this repo)")
+    ap.add_argument("--meta", default="", help="pipeline graph (default: <root>/meta/pipeline_graph.json)")
+    ap.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help=f"worker threads (default {DEFAULT_JOBS})")
+    args = ap.parse_args()
+    root = Path(args.root)
+    meta_path = Path(args.meta) if args.meta else root / "meta" / "pipeline_graph.json"
+
+    if args.watch:
+        return watch(root, meta_path, args.interval, args.jobs)
+    code, lines = run_sync(root, meta_path, args.check, args.incremental, args.jobs)
+    for ln in lines:
+        print(ln)
+    return code
 
 
 if __name__ == "__main__":
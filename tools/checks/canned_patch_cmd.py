@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Stand-in for SDDAI_PATCH_CMD that prints canned unified diffs (for exercising
+self_improve without a model).
+
+Candidate k (from --candidate or $SDDAI_CANDIDATE, 1-based) gets the k-th
+patch in sorted --dir order (wrapping around); --patch FILE always prints FILE.
+--delay simulates generation latency; a patch whose name contains "_slow"
+waits --slow-delay instead.
+
+Usage:
+  python scripts/self_improve.py --candidates 3 \\
+      --patch-cmd "python tools/checks/canned_patch_cmd.py --dir tests/self_improve_patches --candidate {CANDIDATE}"
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+
+def pick_patch(args: argparse.Namespace) -> Path:
+    if args.patch:
+        return Path(args.patch)
+    patches = sorted(p for p in Path(args.dir).iterdir() if p.suffix in (".patch", ".diff"))
+    if not patches:
+        raise SystemExit(f"[canned_patch] no .patch/.diff files in {args.dir}")
+    k = args.candidate or int(os.environ.get("SDDAI_CANDIDATE", "1") or 1)
+    return patches[(k - 1) % len(patches)]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Print a canned patch (SDDAI_PATCH_CMD stand-in).")
+    ap.add_argument("--dir", default="", help="directory of *.patch / *.diff files")
+    ap.add_argument("--patch", default="", help="always print this patch file")
+    ap.add_argument("--candidate", type=int, default=0, help="1-based candidate index (default $SDDAI_CANDIDATE or 1)")
+    ap.add_argument("--delay", type=float, default=0.0, help="seconds to wait before printing")
+    ap.add_argument("--slow-delay", type=float, default=5.0, help="delay for patches named *_slow*")
+    args = ap.parse_args()
+    if not args.dir and not args.patch:
+        ap.error("--dir or --patch is required")
+
+    patch = pick_patch(args)
+    time.sleep(args.slow_delay if "_slow" in patch.name else args.delay)
+    sys.stdout.write(patch.read_text(encoding="utf-8"))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
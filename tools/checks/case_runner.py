@@ -6,8 +6,12 @@ Generic case runner:
 - Reads tests/cases/*.case.json
 - Executes commands with placeholders
 - Stores artifacts under runs/self_check_artifacts/cases/<case_id> (overridable via env SDDAI_SELF_CHECK_ARTIFACTS or --artifacts)
-- Compares against golden outputs (tests/golden/<case_id>/) unless mode=schema
-- Supports --record to refresh golden
+- Compares against golden outputs (tests/golden/<case_id>/manifest.json + content-addressed
+  blobs, see golden_store.py; legacy full copies still work) unless mode=schema
+- Supports --record to refresh golden (writes the manifest/blob layout)
+- --jobs N runs cases concurrently (each already has its own artifacts dir)
+- --shard i/n keeps the cases whose stable id hash falls in shard i (1-based) of n;
+  --merge combines the shards' summary.json files into one
 """
 
 import argparse
@@ -17,16 +21,18 @@ import os
 import shutil
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
-try:
-    import jsonschema  # type: ignore
-except Exception:
-    jsonschema = None
+from golden_store import GoldenStore, sha256_file
+from json_diff import Hasher, compare_json_files, format_diffs
+from schema_cache import format_errors, jsonschema, validate_doc, validate_jsonl
 
 DEFAULT_ARTIFACT_ENV = "SDDAI_SELF_CHECK_ARTIFACTS"
 CASE_GLOB = "*.case.json"
+DEFAULT_JOBS = min(4, os.cpu_count() or 1)
 
 
 def find_repo_root(start: Path) -> Path:
@@ -54,37 +60,29 @@ def load_cases(cases_dir: Path) -> Dict[str, Dict[str, Any]]:
     return cases
 
 
-def sha256_file(path: Path) -> str:
-    h = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
-
-
-def normalize_json(data: Any, ignore_keys: List[str], sort_lists: bool) -> Any:
-    if isinstance(data, dict):
-        return {k: normalize_json(v, ignore_keys, sort_lists) for k, v in sorted(data.items()) if k not in ignore_keys}
-    if isinstance(data, list):
-        items = [normalize_json(x, ignore_keys, sort_lists) for x in data]
-        return sorted(items, key=lambda x: json.dumps(x, sort_keys=True)) if sort_lists else items
-    return data
-
-
 def normalize_text(s: str, strip_whitespace: bool) -> str:
     return "\n".join(line.strip() for line in s.splitlines()) if strip_whitespace else s
 
 
+def normalized_digest(kind: str, path: Path, normalize: Dict[str, Any]) -> str:
+    """Digest of `path` after the normalize rules compare_output applies (what the golden manifest stores)."""
+    normalize = normalize or {}
+    if kind == "json":
+        hasher = Hasher(normalize.get("ignore_keys", []), bool(normalize.get("sort_lists")))
+        token = hasher.hash(json.loads(path.read_bytes()))
+        return hashlib.sha256(token).hexdigest()
+    if kind == "text":
+        text = normalize_text(path.read_text(encoding="utf-8"), bool(normalize.get("strip_whitespace")))
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return sha256_file(path)
+
+
 def compare_output(kind: str, got: Path, golden: Path, normalize: Dict[str, Any]) -> Tuple[bool, str]:
     if kind == "json":
-        g1 = json.loads(got.read_text(encoding="utf-8"))
-        g2 = json.loads(golden.read_text(encoding="utf-8"))
         ignore_keys = normalize.get("ignore_keys", []) if normalize else []
         sort_lists = bool(normalize.get("sort_lists")) if normalize else False
-        g1n = normalize_json(g1, ignore_keys, sort_lists)
-        g2n = normalize_json(g2, ignore_keys, sort_lists)
-        ok = g1n == g2n
-        return ok, "" if ok else "json differs"
+        ok, diffs = compare_json_files(got, golden, ignore_keys, sort_lists)
+        return ok, "" if ok else f"json differs: {format_diffs(diffs)}"
     if kind == "text":
         t1 = got.read_text(encoding="utf-8")
         t2 = golden.read_text(encoding="utf-8")
@@ -131,6 +129,9 @@ def run_one_case(case: Dict[str, Any], repo: Path, artifacts_root: Path, record:
     outputs = case.get("outputs", [])
     results = []
     errors = []
+    store = GoldenStore(repo / "tests" / "golden")
+    manifest = store.load_manifest(cid)
+    recorded = []
 
     if proc.returncode != 0:
         errors.append(f"cmd exit {proc.returncode}")
@@ -158,29 +159,47 @@ def run_one_case(case: Dict[str, Any], repo: Path, artifacts_root: Path, record:
                 errors.append("jsonschema not installed (pip install jsonschema)")
                 results.append({"path": str(opath), "pass": False, "reason": "jsonschema missing"})
                 continue
-            sch = json.loads((repo / schema_path).read_text(encoding="utf-8"))
-            doc = json.loads(opath.read_text(encoding="utf-8"))
             try:
-                jsonschema.validate(doc, sch)  # type: ignore
+                if otype == "jsonl":
+                    found = validate_jsonl(repo / schema_path, opath)["errors"]
+                else:
+                    found = validate_doc(repo / schema_path, json.loads(opath.read_text(encoding="utf-8")))
+            except Exception as e:  # unreadable schema/doc
+                found = [{"path": "/", "message": str(e)}]
+            if found:
+                errors.append(f"schema fail: {format_errors(found)}")
+                results.append({"path": str(opath), "pass": False, "reason": format_errors(found), "schema_errors": found})
+            else:
                 results.append({"path": str(opath), "pass": True, "reason": "schema ok"})
-            except Exception as e:
-                errors.append(f"schema fail: {e}")
-                results.append({"path": str(opath), "pass": False, "reason": str(e)})
         else:
-            golden_path = repo / "tests" / "golden" / cid / out["path"]
+            normalize = out.get("normalize") or {}
             if record:
-                golden_path.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(opath, golden_path)
+                recorded.append(store.record(cid, out["path"], opath, otype, normalize, normalized_digest(otype, opath, normalize)))
                 results.append({"path": str(opath), "pass": True, "reason": "recorded"})
-            else:
-                if not golden_path.exists():
-                    errors.append(f"golden missing: {golden_path}")
-                    results.append({"path": str(opath), "pass": False, "reason": "golden missing"})
-                    continue
-                ok, reason = compare_output(otype, opath, golden_path, out.get("normalize") or {})
+                continue
+            entry = (manifest or {}).get(out["path"])
+            if entry is not None:
+                ok, reason, blob = store.check(entry, opath, otype, normalize, normalized_digest)
+                if blob is not None:
+                    # only now read the golden bytes, to say where they differ
+                    ok, reason = compare_output(otype, opath, blob, normalize)
+                    reason = reason or ("match" if ok else "normalized hash differs")
                 if not ok:
-                    errors.append(f"diff: {opath} vs {golden_path} ({reason})")
-                results.append({"path": str(opath), "pass": ok, "reason": reason or "match"})
+                    errors.append(f"diff: {opath} vs golden {entry['sha256'][:12]} ({reason})")
+                results.append({"path": str(opath), "pass": ok, "reason": reason})
+                continue
+            golden_path = repo / "tests" / "golden" / cid / out["path"]
+            if not golden_path.exists():
+                errors.append(f"golden missing: {golden_path}")
+                results.append({"path": str(opath), "pass": False, "reason": "golden missing"})
+                continue
+            ok, reason = compare_output(otype, opath, golden_path, normalize)
+            if not ok:
+                errors.append(f"diff: {opath} vs {golden_path} ({reason})")
+            results.append({"path": str(opath), "pass": ok, "reason": reason or "match"})
+
+    if record and recorded:
+        store.write_manifest(cid, recorded)
 
     case_report = {
         "id": cid,
@@ -195,15 +214,71 @@ def run_one_case(case: Dict[str, Any], repo: Path, artifacts_root: Path, record:
     return case_report
 
 
+def parse_shard(spec: str) -> Tuple[int, int]:
+    i, _, n = spec.partition("/")
+    try:
+        idx, total = int(i), int(n)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/n, got {spec!r}")
+    if total < 1 or not 1 <= idx <= total:
+        raise argparse.ArgumentTypeError(f"shard index must be in 1..n, got {spec!r}")
+    return idx, total
+
+
+def in_shard(cid: str, shard: Tuple[int, int]) -> bool:
+    # stable across machines and Python versions (unlike hash())
+    idx, total = shard
+    return int(hashlib.sha1(cid.encode("utf-8")).hexdigest(), 16) % total == idx - 1
+
+
+def merge_summaries(paths: List[Path]) -> Dict[str, Any]:
+    cases: Dict[str, Dict[str, Any]] = {}
+    shards = set()
+    total = None
+    errors = []
+    for p in paths:
+        data = json.loads(p.read_text(encoding="utf-8"))
+        if data.get("shard"):
+            idx, total = parse_shard(data["shard"])
+            shards.add(idx)
+        for rep in data.get("cases", []):
+            if rep["id"] in cases:
+                errors.append(f"case {rep['id']} appears in more than one summary")
+            cases[rep["id"]] = rep
+    if total is not None:
+        missing = sorted(set(range(1, total + 1)) - shards)
+        if missing:
+            errors.append(f"missing shards: {', '.join(f'{i}/{total}' for i in missing)}")
+    reports = [cases[k] for k in sorted(cases)]
+    ok = not errors and all(r.get("pass") for r in reports)
+    return {"pass": ok, "merged_from": [str(p) for p in paths], "errors": errors, "cases": reports}
+
+
 def main() -> int:
     ap = argparse.ArgumentParser(description="Run file-based cases and compare with golden/schema.")
     ap.add_argument("--case", action="append", help="run only specified case id (can repeat or comma separated)")
     ap.add_argument("--record", action="store_true", help="record outputs as golden")
     ap.add_argument("--artifacts", default="", help="override artifacts root (default: env or runs/self_check_artifacts)")
     ap.add_argument("--timeout", type=int, default=300, help="per-case timeout seconds")
+    ap.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help=f"cases run concurrently (default: {DEFAULT_JOBS})")
+    ap.add_argument("--shard", type=parse_shard, default=None, help="run only shard i of n (1-based), e.g. 2/4")
+    ap.add_argument("--merge", nargs="+", default=None, metavar="SUMMARY", help="merge shard summary.json files and exit")
+    ap.add_argument("--out", default="", help="with --merge: output path (default: <artifacts>/cases/summary.json)")
     args = ap.parse_args()
 
     repo = find_repo_root(Path("."))
+    if args.merge:
+        merged = merge_summaries([Path(x) for x in args.merge])
+        default_root = Path(args.artifacts) if args.artifacts else Path(os.environ.get(DEFAULT_ARTIFACT_ENV, repo / "runs" / "self_check_artifacts"))
+        out = Path(args.out) if args.out else default_root / "cases" / "summary.json"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(merged, ensure_ascii=False, indent=2), encoding="utf-8")
+        failed = [r["id"] for r in merged["cases"] if not r.get("pass")]
+        for e in merged["errors"]:
+            print(f"[FAIL] {e}")
+        print(f"[merge] {len(merged['cases'])} case(s), {len(failed)} failed -> {out}")
+        return 0 if merged["pass"] else 1
+
     cases_dir = repo / "tests" / "cases"
     all_cases = load_cases(cases_dir)
     if not all_cases:
@@ -226,21 +301,40 @@ def main() -> int:
     artifacts_root = Path(args.artifacts) if args.artifacts else Path(os.environ.get(DEFAULT_ARTIFACT_ENV, repo / "runs" / "self_check_artifacts"))
     artifacts_root.mkdir(parents=True, exist_ok=True)
 
+    if args.shard:
+        chosen = [c for c in chosen if in_shard(c, args.shard)]
+        print(f"[shard] {args.shard[0]}/{args.shard[1]}: {len(chosen)} case(s)")
+
+    t0 = time.time()
     failures = 0
-    reports = []
-    for cid in chosen:
+    by_id: Dict[str, Dict[str, Any]] = {}
+
+    def run_case(cid: str) -> Dict[str, Any]:
         case = all_cases[cid]
         case.setdefault("timeout", args.timeout)
-        print(f"[run] case {cid}")
-        report = run_one_case(case, repo, artifacts_root, record=args.record)
-        reports.append(report)
-        if report.get("pass"):
-            print(f"[PASS] {cid}")
-        else:
-            failures += 1
-            print(f"[FAIL] {cid}: {'; '.join(report.get('errors', []))}")
+        print(f"[run] case {cid}", flush=True)
+        return run_one_case(case, repo, artifacts_root, record=args.record)
 
-    summary = {"pass": failures == 0, "cases": reports}
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as ex:
+        futures = {ex.submit(run_case, cid): cid for cid in chosen}
+        for fut in as_completed(futures):
+            cid = futures[fut]
+            try:
+                report = fut.result()
+            except Exception as e:
+                report = {"id": cid, "pass": False, "errors": [f"runner error: {e}"]}
+            by_id[cid] = report
+            if report.get("pass"):
+                print(f"[PASS] {cid}", flush=True)
+            else:
+                failures += 1
+                print(f"[FAIL] {cid}: {'; '.join(report.get('errors', []) or [report.get('error', '')])}", flush=True)
+
+    reports = [by_id[cid] for cid in chosen]
+    summary = {"pass": failures == 0, "seconds": round(time.time() - t0, 3), "jobs": args.jobs, "cases": reports}
+    if args.shard:
+        summary["shard"] = f"{args.shard[0]}/{args.shard[1]}"
+    (artifacts_root / "cases").mkdir(parents=True, exist_ok=True)
     (artifacts_root / "cases" / "summary.json").write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
     return 0 if failures == 0 else 1
 
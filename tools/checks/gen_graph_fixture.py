@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Deterministic synthetic graph fixtures for performance work (GraphBuilder,
+web/graph_spider, sync_doc_links).
+
+Formats:
+- graph   graph.schema.json (Phase/Module/Contract/Doc nodes; phase_contains,
+          produces/consumes/verifies and docs_link edges)
+- meta    meta/pipeline_graph.json shape (phases/modules/contracts/edges)
+- spider  web/graph_spider/demo_graph.json shape (nodes/links, dir tree + files)
+
+Everything is derived from node indices and seeded random.Random streams, so
+output is streamed node by node / edge by edge and memory stays O(directories)
+even for million-edge fixtures. The same arguments always produce the same
+bytes (no generated_at).
+
+- --edges        total edge count (backbone edges first, then random ones)
+- --hub-exponent power-law exponent for edge targets (0 = uniform; higher =
+                 fewer, bigger hubs)
+- --depth        directory depth of module/spider paths
+- --docs-link    fraction of random edges that are docs_link
+
+Usage:
+  python tools/checks/gen_graph_fixture.py --format graph --nodes 100000 --edges 1000000 -o runs/fixtures/graph_1m.json
+  python tools/checks/gen_graph_fixture.py --format meta --nodes 5000 --docs-root runs/fixtures/meta_5k -o runs/fixtures/meta_5k/meta/pipeline_graph.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import math
+import random
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+FORMATS = ("graph", "meta", "spider")
+BASE_PHASES = ["Docs", "Core", "UI", "Web", "Unassigned"]
+CONTRACT_EDGE_TYPES = ("produces", "consumes", "verifies")
+
+
+@dataclass
+class FixtureSpec:
+    nodes: int = 1000
+    edges: int = -1              # -1: 2 * nodes
+    seed: int = 0
+    hub_exponent: float = 1.2
+    depth: int = 3
+    docs_link: float = 0.3
+    phases: int = 5
+    contracts: float = 0.05      # fraction of nodes (graph/meta)
+    docs: float = 0.3            # fraction of nodes (graph/meta)
+    dirs: float = 0.15           # fraction of nodes that are directories (spider) / module dirs
+
+    def edge_count(self) -> int:
+        return 2 * self.nodes if self.edges < 0 else self.edges
+
+
+def _rng(spec: FixtureSpec, stream: str) -> random.Random:
+    # independent streams: changing the edge count does not reshuffle the nodes
+    return random.Random(f"{spec.seed}:{stream}")
+
+
+class PowerLaw:
+    """Draw indices in [0, n) with P(rank k) ~ (k + 1) ** -exponent; ranks are
+    scattered over the range by an affine permutation so hubs are not all at
+    the start of a block."""
+
+    def __init__(self, n: int, exponent: float, rnd: random.Random):
+        self.n = max(1, n)
+        self.a = exponent
+        self.top = float(self.n + 1) ** (1.0 - exponent) if exponent != 1.0 else 0.0
+        stride = rnd.randrange(1, self.n + 1) if self.n > 1 else 1
+        while math.gcd(stride, self.n) != 1:
+            stride += 1
+        self.stride, self.offset = stride, rnd.randrange(self.n)
+
+    def rank(self, rnd: random.Random) -> int:
+        u = rnd.random()
+        if self.a == 0.0:
+            return int(u * self.n)
+        if self.a == 1.0:
+            x = float(self.n + 1) ** u
+        else:
+            x = (1.0 + u * (self.top - 1.0)) ** (1.0 / (1.0 - self.a))
+        return min(self.n - 1, max(0, int(x) - 1))
+
+    def draw(self, rnd: random.Random) -> int:
+        return (self.rank(rnd) * self.stride + self.offset) % self.n
+
+
+class DirTree:
+    """`count` directories numbered heap-style (parent of j is (j - 1) // fanout,
+    0 is the root) with the fanout chosen so the tree is `depth` levels deep."""
+
+    def __init__(self, count: int, depth: int):
+        self.count = max(1, count)
+        depth = max(1, depth)
+        fanout = 2
+        while fanout < self.count and sum(fanout ** k for k in range(depth + 1)) < self.count:
+            fanout += 1
+        self.fanout = fanout
+
+    def parent(self, j: int) -> int:
+        return (j - 1) // self.fanout
+
+    def path(self, j: int) -> str:
+        parts = []
+        while j > 0:
+            parts.append(f"d{(j - 1) % self.fanout:02d}")
+            j = self.parent(j)
+        return "/".join(reversed(parts))
+
+
+def _phase_ids(n: int) -> List[str]:
+    n = max(1, n)
+    return BASE_PHASES[:n] + [f"Phase{k:02d}" for k in range(len(BASE_PHASES), n)]
+
+
+class _Layout:
+    """Node index ranges for graph/meta: [phases][contracts][modules][docs]."""
+
+    def __init__(self, spec: FixtureSpec):
+        self.phase_ids = _phase_ids(spec.phases)
+        rest = max(0, spec.nodes - len(self.phase_ids))
+        self.n_contracts = max(1, int(rest * spec.contracts)) if rest > 2 else 0
+        self.n_docs = int(rest * spec.docs)
+        self.n_modules = rest - self.n_contracts - self.n_docs
+        if self.n_modules < 1 and rest:
+            self.n_docs = max(0, self.n_docs - 1)
+            self.n_modules = rest - self.n_contracts - self.n_docs
+        self.dirs = DirTree(max(1, int(self.n_modules * spec.dirs)), spec.depth)
+        self.doc_dirs = DirTree(max(1, int(self.n_docs * spec.dirs)), spec.depth)
+
+    @staticmethod
+    def contract_id(i: int) -> str:
+        return f"contract.c{i:06d}"
+
+    @staticmethod
+    def module_id(i: int) -> str:
+        return f"module.m{i:06d}"
+
+    def doc_name(self, i: int) -> str:
+        d = self.doc_dirs.path(1 + i % self.doc_dirs.count) if self.doc_dirs.count > 1 else ""
+        return f"{d}/doc_{i:06d}" if d else f"doc_{i:06d}"
+
+    def doc_id(self, i: int) -> str:
+        return f"doc:{self.doc_name(i)}"
+
+    def module_path(self, i: int) -> str:
+        d = self.dirs.path(1 + i % self.dirs.count) if self.dirs.count > 1 else ""
+        return f"specs/modules/{d + '/' if d else ''}m{i:06d}/spec.md"
+
+    def module_phase(self, i: int) -> str:
+        # modules spread over every phase but "Docs"
+        ph = self.phase_ids[1:] or self.phase_ids
+        return ph[i % len(ph)]
+
+    def md_node(self, k: int) -> Tuple[str, str]:
+        """(id, path) of the k-th Markdown-backed node (modules, then docs)."""
+        if k < self.n_modules:
+            return self.module_id(k), self.module_path(k)
+        i = k - self.n_modules
+        return self.doc_id(i), f"docs/{self.doc_name(i)}.md"
+
+
+def _random_edges(spec: FixtureSpec, lay: _Layout, count: int) -> Iterator[Tuple[str, str, str]]:
+    """(type, source, target) for `count` random edges; targets follow the power law."""
+    rnd = _rng(spec, "edges")
+    n_md = lay.n_modules + lay.n_docs
+    md_hubs = PowerLaw(n_md, spec.hub_exponent, rnd)
+    contract_hubs = PowerLaw(lay.n_contracts, spec.hub_exponent, rnd)
+    module_hubs = PowerLaw(lay.n_modules, spec.hub_exponent, rnd)
+    if n_md < 2 or lay.n_modules < 1:
+        return
+    emitted = 0
+    while emitted < count:
+        if rnd.random() < spec.docs_link or not lay.n_contracts:
+            s, t = rnd.randrange(n_md), md_hubs.draw(rnd)
+            if s == t:
+                continue
+            yield "docs_link", lay.md_node(s)[0], lay.md_node(t)[0]
+        else:
+            kind = CONTRACT_EDGE_TYPES[rnd.randrange(3)]
+            if kind == "consumes":
+                yield kind, lay.contract_id(contract_hubs.draw(rnd)), lay.module_id(rnd.randrange(lay.n_modules))
+            else:
+                # modules produce/verify a few popular contracts
+                yield kind, lay.module_id(module_hubs.draw(rnd)), lay.contract_id(contract_hubs.draw(rnd))
+        emitted += 1
+
+
+class _ArrayWriter:
+    """Writes `"key": [item, item, ...]` one item at a time."""
+
+    def __init__(self, out: TextIO, key: str, first_key: bool, indent: bool):
+        self.out, self.first, self.indent = out, True, indent
+        self.out.write(("" if first_key else ",\n") + f'  "{key}": [')
+
+    def add(self, obj: Dict) -> None:
+        self.out.write(("\n    " if self.first else ",\n    ") + json.dumps(obj, ensure_ascii=False, separators=(", ", ": ") if self.indent else (",", ":")))
+        self.first = False
+
+    def close(self) -> None:
+        self.out.write("]" if self.first else "\n  ]")
+
+
+def _write_object(out: TextIO, head: Dict, arrays, tail: Optional[Dict] = None, indent: bool = True) -> Dict[str, int]:
+    """Stream {**head, key: [...], ..., **tail}; `arrays` is [(key, iterator)]. Returns item counts."""
+    out.write("{\n")
+    first = True
+    for k, v in head.items():
+        out.write(("" if first else ",\n") + f"  {json.dumps(k)}: {json.dumps(v, ensure_ascii=False)}")
+        first = False
+    counts = {}
+    for key, items in arrays:
+        w = _ArrayWriter(out, key, first, indent)
+        first = False
+        n = 0
+        for obj in items:
+            w.add(obj)
+            n += 1
+        w.close()
+        counts[key] = n
+    for k, v in (tail or {}).items():
+        out.write(f",\n  {json.dumps(k)}: {json.dumps(v, ensure_ascii=False)}")
+    out.write("\n}\n")
+    return counts
+
+
+def write_graph(spec: FixtureSpec, out: TextIO, indent: bool = True) -> Dict[str, int]:
+    lay = _Layout(spec)
+
+    def nodes():
+        for order, pid in enumerate(lay.phase_ids):
+            yield {"id": pid, "type": "Phase", "label": pid, "meta": {"order": order * 10}, "view": "Pipeline"}
+        for i in range(lay.n_contracts):
+            yield {"id": lay.contract_id(i), "type": "Contract", "label": f"Contract {i}",
+                   "path": f"specs/contract_output/c{i:06d}.schema.json", "view": "Pipeline",
+                   "tier": "settings", "mutable": False, "category": "Contracts"}
+        for i in range(lay.n_modules):
+            ph = lay.module_phase(i)
+            yield {"id": lay.module_id(i), "type": "Module", "label": f"Module{i}", "phase": ph,
+                   "path": lay.module_path(i), "parent": ph, "view": "Pipeline",
+                   "tier": "core", "mutable": True, "category": "Modules"}
+        for i in range(lay.n_docs):
+            name = lay.doc_name(i)
+            yield {"id": f"doc:{name}", "type": "Doc", "label": name.rsplit("/", 1)[-1] + ".md",
+                   "path": f"docs/{name}.md", "parent": lay.phase_ids[0], "view": "Docs", "category": "Docs"}
+
+    def edges():
+        total = spec.edge_count()
+        n = 0
+        for i in range(min(total, lay.n_modules)):
+            ph, mid = lay.module_phase(i), lay.module_id(i)
+            yield {"id": f"phase_contains:{ph}->{mid}", "source": ph, "target": mid, "type": "phase_contains"}
+            n += 1
+        for k, (kind, s, t) in enumerate(_random_edges(spec, lay, total - n)):
+            yield {"id": f"e{k}:{kind}", "source": s, "target": t, "type": kind,
+                   "confidence": "low" if kind == "docs_link" else "auto"}
+
+    return _write_object(out, {"schema_version": "1.0.0"}, [("nodes", nodes()), ("edges", edges())], indent=indent)
+
+
+def write_meta(spec: FixtureSpec, out: TextIO, indent: bool = True) -> Dict[str, int]:
+    lay = _Layout(spec)
+
+    def phases():
+        for order, pid in enumerate(lay.phase_ids):
+            yield {"id": pid, "label": pid, "order": order * 10}
+
+    def modules():
+        for i in range(lay.n_modules):
+            yield {"id": lay.module_id(i), "label": f"Module{i}", "path": lay.module_path(i),
+                   "phase": lay.module_phase(i), "tier": "core", "mutable": True, "category": "Modules"}
+
+    def contracts():
+        for i in range(lay.n_contracts):
+            yield {"id": lay.contract_id(i), "label": f"Contract {i}",
+                   "schema_path": f"specs/contract_output/c{i:06d}.schema.json",
+                   "tier": "settings", "mutable": False, "pinned": False, "category": "Contracts"}
+
+    def edges():
+        for k, (kind, s, t) in enumerate(_random_edges(spec, lay, spec.edge_count())):
+            yield {"id": f"e{k}.{kind}", "source": s, "target": t, "type": kind}
+
+    ui = {"default_view": "Summary", "phase_order": lay.phase_ids,
+          "summary": {"categories": ["Docs", "Modules", "Contracts"], "pinned": []}}
+    return _write_object(out, {"schema_version": "1.0.0"},
+                         [("phases", phases()), ("modules", modules()), ("contracts", contracts()), ("edges", edges())],
+                         tail={"ui": ui}, indent=indent)
+
+
+def write_spider(spec: FixtureSpec, out: TextIO, indent: bool = True) -> Dict[str, int]:
+    """Exactly spec.nodes nodes: "repo", then dir nodes d<j>, then file nodes n<i>."""
+    n = max(1, spec.nodes)
+    n_dirs = min(n - 1, int(n * spec.dirs))
+    tree = DirTree(n_dirs + 1, spec.depth)
+    n_files = n - 1 - n_dirs
+
+    def dir_id(j: int) -> str:
+        return "repo" if j == 0 else f"d{j}"
+
+    def nodes():
+        yield {"id": "repo", "label": "repo", "group": "root", "r": 7, "meta": {"type": "root"}}
+        for j in range(1, n_dirs + 1):
+            p = tree.path(j)
+            yield {"id": dir_id(j), "label": p, "group": "dir", "r": 4, "meta": {"path": f"/bench/{p}", "kind": "dir"}}
+        for i in range(n_files):
+            yield {"id": f"n{i}", "label": f"file_{i:06d}", "group": "file", "r": 4,
+                   "meta": {"path": f"/bench/f/{i}", "kind": "file"}}
+
+    def links():
+        rnd = _rng(spec, "links")
+        dir_hubs = PowerLaw(n_dirs + 1, spec.hub_exponent, rnd)
+        node_hubs = PowerLaw(n, spec.hub_exponent, rnd)
+        total = spec.edge_count()
+        emitted = 0
+        # backbone: dir tree, then every file under a (power-law) directory
+        for j in range(1, n_dirs + 1):
+            if emitted >= total:
+                return
+            yield {"source": dir_id(tree.parent(j)), "target": dir_id(j)}
+            emitted += 1
+        for i in range(n_files):
+            if emitted >= total:
+                return
+            yield {"source": dir_id(dir_hubs.draw(rnd)), "target": f"n{i}"}
+            emitted += 1
+
+        def node_id(k: int) -> str:
+            return dir_id(k) if k <= n_dirs else f"n{k - n_dirs - 1}"
+
+        while emitted < total and n > 1:
+            a, b = rnd.randrange(n), node_hubs.draw(rnd)
+            if a == b:
+                continue
+            yield {"source": node_id(a), "target": node_id(b)}
+            emitted += 1
+
+    return _write_object(out, {}, [("nodes", nodes()), ("links", links())], indent=indent)
+
+
+WRITERS = {"graph": write_graph, "meta": write_meta, "spider": write_spider}
+
+
+def render(fmt: str, spec: FixtureSpec, indent: bool = False) -> str:
+    """The whole fixture as a string (for in-process users such as spider_render_bench)."""
+    buf = io.StringIO()
+    WRITERS[fmt](spec, buf, indent=indent)
+    return buf.getvalue()
+
+
+def write_docs_tree(spec: FixtureSpec, root: Path) -> int:
+    """Create the Markdown files a meta fixture's docs_link edges point at (for sync_doc_links runs)."""
+    lay = _Layout(spec)
+    made = 0
+    for k in range(lay.n_modules + lay.n_docs):
+        nid, rel = lay.md_node(k)
+        p = root / rel
+        if p.exists():
+            continue
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(f"# {nid}\n\nSynthetic fixture document.\n", encoding="utf-8")
+        made += 1
+    return made
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Generate deterministic synthetic graph fixtures (streamed).")
+    ap.add_argument("--format", choices=FORMATS, default="graph")
+    ap.add_argument("--nodes", type=int, default=FixtureSpec.nodes)
+    ap.add_argument("--edges", type=int, default=-1, help="total edges (default: 2 * nodes)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--hub-exponent", type=float, default=FixtureSpec.hub_exponent,
+                    help="power-law exponent of edge targets; 0 = uniform (default %(default)s)")
+    ap.add_argument("--depth", type=int, default=FixtureSpec.depth, help="directory depth (default %(default)s)")
+    ap.add_argument("--docs-link", type=float, default=FixtureSpec.docs_link,
+                    help="fraction of random edges that are docs_link (default %(default)s)")
+    ap.add_argument("--phases", type=int, default=FixtureSpec.phases)
+    ap.add_argument("--contracts", type=float, default=FixtureSpec.contracts, help="fraction of nodes that are contracts")
+    ap.add_argument("--docs", type=float, default=FixtureSpec.docs, help="fraction of nodes that are docs")
+    ap.add_argument("--dirs", type=float, default=FixtureSpec.dirs, help="directories per node (module dirs / spider dir nodes)")
+    ap.add_argument("--compact", action="store_true", help="no whitespace between items")
+    ap.add_argument("--docs-root", default="", help="meta only: also create the referenced .md files under this root")
+    ap.add_argument("-o", "--out", default="-", help="output file (default: stdout)")
+    args = ap.parse_args()
+
+    spec = FixtureSpec(nodes=args.nodes, edges=args.edges, seed=args.seed, hub_exponent=args.hub_exponent,
+                       depth=args.depth, docs_link=args.docs_link, phases=args.phases,
+                       contracts=args.contracts, docs=args.docs, dirs=args.dirs)
+    writer = WRITERS[args.format]
+    if args.out == "-":
+        counts = writer(spec, sys.stdout, indent=not args.compact)
+    else:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with out.open("w", encoding="utf-8", newline="\n", buffering=1 << 20) as f:
+            counts = writer(spec, f, indent=not args.compact)
+    if args.docs_root:
+        if args.format != "meta":
+            print("[warn] --docs-root only applies to --format meta", file=sys.stderr)
+        else:
+            made = write_docs_tree(spec, Path(args.docs_root))
+            print(f"[fixture] {made} markdown file(s) created under {args.docs_root}", file=sys.stderr)
+    print(f"[fixture] {args.format}: " + ", ".join(f"{k}={v}" for k, v in counts.items()), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Content-addressed golden store used by case_runner.
+
+Layout under tests/golden/:
+- _blobs/<sha256[:2]>/<sha256>   recorded output bytes, deduplicated across cases
+- <case_id>/manifest.json        {"version": 1, "outputs": [{path, type, sha256, size, normalized, normalize}]}
+
+`normalized` is the digest of the output after the case's normalize rules
+(`normalize` records which rules, so a changed rule set falls back to a full
+compare). A check hashes only the fresh output; the blob is read only when a
+diff report is needed. Cases without a manifest still use the legacy
+tests/golden/<case_id>/<path> copies.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+MANIFEST_NAME = "manifest.json"
+BLOBS_DIR = "_blobs"
+MANIFEST_VERSION = 1
+READ_BUF = 1 << 20
+MMAP_MIN_BYTES = 8 << 20
+
+
+def sha256_file(path: Path) -> str:
+    """SHA-256 of a file: mmap for large files, 1 MiB reads otherwise."""
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_MIN_BYTES:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                h.update(m)
+        else:
+            for chunk in iter(lambda: f.read(READ_BUF), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def normalize_signature(kind: str, normalize: Optional[Dict[str, Any]]) -> str:
+    return json.dumps({"type": kind, "normalize": normalize or {}}, sort_keys=True)
+
+
+class GoldenStore:
+    def __init__(self, root: Path):
+        self.root = root
+
+    def blob_path(self, sha: str) -> Path:
+        return self.root / BLOBS_DIR / sha[:2] / sha
+
+    def put_blob(self, src: Path) -> str:
+        sha = sha256_file(src)
+        dst = self.blob_path(sha)
+        if not dst.exists():
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dst.with_name(f".{sha}.{uuid.uuid4().hex}.tmp")
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)
+        return sha
+
+    def manifest_path(self, case_id: str) -> Path:
+        return self.root / case_id / MANIFEST_NAME
+
+    def load_manifest(self, case_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Entries keyed by output path, or None when the case has no manifest (legacy layout)."""
+        try:
+            data = json.loads(self.manifest_path(case_id).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return {e["path"]: e for e in data.get("outputs", [])}
+
+    def write_manifest(self, case_id: str, entries: list) -> Path:
+        p = self.manifest_path(case_id)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": MANIFEST_VERSION, "outputs": sorted(entries, key=lambda e: e["path"])}
+        p.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        return p
+
+    def record(self, case_id: str, rel: str, src: Path, kind: str, normalize: Optional[Dict[str, Any]], normalized: str) -> Dict[str, Any]:
+        """Store `src` as a blob; return its manifest entry. Drops a legacy full copy of the same output."""
+        sha = self.put_blob(src)
+        legacy = self.root / case_id / rel
+        if legacy.is_file():
+            legacy.unlink()
+        return {
+            "path": rel,
+            "type": kind,
+            "sha256": sha,
+            "size": src.stat().st_size,
+            "normalized": normalized,
+            "normalize": normalize or {},
+        }
+
+    def check(self, entry: Dict[str, Any], got: Path, kind: str, normalize: Optional[Dict[str, Any]], normalized_digest) -> tuple:
+        """(ok, reason, blob_path_or_None). blob_path is returned only when a diff report needs the golden bytes.
+
+        `normalized_digest(kind, path, normalize)` is only called when the raw hashes differ.
+        """
+        if got.stat().st_size == entry.get("size") and sha256_file(got) == entry["sha256"]:
+            return True, "match", None
+        if kind != "binary" and normalize_signature(kind, normalize) == normalize_signature(entry.get("type", kind), entry.get("normalize")):
+            if normalized_digest(kind, got, normalize) == entry.get("normalized"):
+                return True, "match (normalized)", None
+        if kind == "binary":
+            return False, "binary hash differs", None
+        blob = self.blob_path(entry["sha256"])
+        if not blob.exists():
+            return False, f"golden blob missing: {blob}", None
+        return False, "", blob
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Structural JSON comparison for golden checks.
+
+- byte-identical files are equal without parsing;
+- with ignore_keys / sort_lists, every subtree gets a canonical hash computed
+  bottom-up exactly once (blake2b over the children's tokens), lists compare as
+  multisets of child hashes and nothing is re-serialized; without them the
+  parsed documents are compared with plain ==;
+- when they differ, the diff walk only descends into unequal subtrees and stops
+  after `max_diffs` differences, reported as JSON-pointer paths.
+
+Equality is == after dropping ignore_keys at any depth and, with sort_lists,
+ignoring list order (1 == 1.0 == true, as in Python).
+
+Usage: python tools/checks/json_diff.py <got.json> <golden.json> [--ignore-key K] [--sort-lists] [--max-diffs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+DEFAULT_MAX_DIFFS = 20
+PREVIEW_CHARS = 80
+
+
+class Hasher:
+    """Canonical subtree tokens of parsed documents, memoized by container identity.
+
+    A scalar's token is its tagged, length-delimited encoding; a container's is
+    b"H" + a 16-byte blake2b over its children's tokens. Equal tokens <=> equal
+    normalized values.
+    """
+
+    def __init__(self, ignore_keys: Iterable[str] = (), sort_lists: bool = False):
+        self.ignore_keys = set(ignore_keys)
+        self.sort_lists = sort_lists
+        self._memo: Dict[int, bytes] = {}
+        self._keep: List[Any] = []  # pins memoized containers so their ids stay unique
+
+    def hash(self, v: Any) -> bytes:
+        if isinstance(v, str):
+            raw = v.encode("utf-8", "surrogatepass")
+            return b"s%d:%s" % (len(raw), raw)
+        if isinstance(v, (dict, list)):
+            h = self._memo.get(id(v))
+            if h is None:
+                h = self._hash_container(v)
+                self._memo[id(v)] = h
+                self._keep.append(v)
+            return h
+        if v is None:
+            return b"n"
+        if isinstance(v, float):
+            return b"i%d;" % v if v.is_integer() else b"d%r;" % v
+        return b"i%d;" % v
+
+    def equal(self, a: Any, b: Any) -> bool:
+        if not self.ignore_keys and not self.sort_lists:
+            return a == b
+        return self.hash(a) == self.hash(b)
+
+    def _hash_container(self, v: Any) -> bytes:
+        tok = self.hash
+        parts = []
+        add = parts.append
+        if isinstance(v, dict):
+            ignore = self.ignore_keys
+            add(b"{")
+            for k in sorted(v):
+                if k in ignore:
+                    continue
+                raw = k.encode("utf-8", "surrogatepass")
+                add(b"s%d:%s" % (len(raw), raw))
+                x = v[k]
+                if type(x) is str:  # inlined hot path of tok()
+                    raw = x.encode("utf-8", "surrogatepass")
+                    add(b"s%d:%s" % (len(raw), raw))
+                else:
+                    add(tok(x))
+        else:
+            add(b"[")
+            children = [tok(x) for x in v]
+            if self.sort_lists:
+                children.sort()
+            parts.extend(children)
+        return b"H" + hashlib.blake2b(b"".join(parts), digest_size=16).digest()
+
+
+def _ptr(path: str, key: Any) -> str:
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+
+def _preview(v: Any) -> str:
+    s = json.dumps(v, ensure_ascii=False, sort_keys=True)
+    return s if len(s) <= PREVIEW_CHARS else s[: PREVIEW_CHARS - 3] + "..."
+
+
+def _kind(v: Any) -> str:
+    if v is None:
+        return "null"
+    if isinstance(v, (int, float)):
+        return "number"
+    return type(v).__name__
+
+
+def structural_diff(got: Any, expected: Any, hasher: Hasher, max_diffs: int = DEFAULT_MAX_DIFFS) -> List[Dict[str, str]]:
+    """First `max_diffs` differences as {op, path, got?, expected?}; empty when equal."""
+    diffs: List[Dict[str, str]] = []
+
+    def add(op: str, path: str, **vals: Any) -> None:
+        diffs.append({"op": op, "path": path or "/", **{k: _preview(v) for k, v in vals.items()}})
+
+    def walk(a: Any, b: Any, path: str) -> None:
+        if len(diffs) >= max_diffs or hasher.equal(a, b):
+            return
+        if isinstance(a, dict) and isinstance(b, dict):
+            for k in sorted(set(a) | set(b)):
+                if len(diffs) >= max_diffs:
+                    return
+                if k in hasher.ignore_keys:
+                    continue
+                if k not in b:
+                    add("added", _ptr(path, k), got=a[k])
+                elif k not in a:
+                    add("removed", _ptr(path, k), expected=b[k])
+                else:
+                    walk(a[k], b[k], _ptr(path, k))
+        elif isinstance(a, list) and isinstance(b, list):
+            if hasher.sort_lists:
+                # multiset: report elements present on one side only, by their index on that side
+                ca = Counter(hasher.hash(x) for x in a)
+                cb = Counter(hasher.hash(x) for x in b)
+                only_a, only_b = ca - cb, cb - ca
+                for i, x in enumerate(a):
+                    h = hasher.hash(x)
+                    if only_a[h] > 0 and len(diffs) < max_diffs:
+                        only_a[h] -= 1
+                        add("added", _ptr(path, i), got=x)
+                for j, y in enumerate(b):
+                    h = hasher.hash(y)
+                    if only_b[h] > 0 and len(diffs) < max_diffs:
+                        only_b[h] -= 1
+                        add("removed", _ptr(path, j), expected=y)
+                return
+            for i in range(min(len(a), len(b))):
+                walk(a[i], b[i], _ptr(path, i))
+            for i in range(len(b), len(a)):
+                if len(diffs) < max_diffs:
+                    add("added", _ptr(path, i), got=a[i])
+            for i in range(len(a), len(b)):
+                if len(diffs) < max_diffs:
+                    add("removed", _ptr(path, i), expected=b[i])
+        elif _kind(a) != _kind(b):
+            add("type", path, got=a, expected=b)
+        else:
+            add("changed", path, got=a, expected=b)
+
+    walk(got, expected, "")
+    return diffs
+
+
+def compare_json_files(
+    got: Path,
+    golden: Path,
+    ignore_keys: Iterable[str] = (),
+    sort_lists: bool = False,
+    max_diffs: int = DEFAULT_MAX_DIFFS,
+) -> Tuple[bool, List[Dict[str, str]]]:
+    """(equal, first differences). Byte-identical files are never parsed."""
+    b1 = got.read_bytes()
+    b2 = golden.read_bytes()
+    if b1 == b2:
+        return True, []
+    a = json.loads(b1)
+    b = json.loads(b2)
+    hasher = Hasher(ignore_keys, sort_lists)
+    if hasher.equal(a, b):
+        return True, []
+    return False, structural_diff(a, b, hasher, max_diffs)
+
+
+def format_diffs(diffs: List[Dict[str, str]], limit: int = 5) -> str:
+    parts = []
+    for d in diffs[:limit]:
+        vals = " ".join(f"{k}={d[k]}" for k in ("got", "expected") if k in d)
+        parts.append(f"{d['op']} {d['path']}" + (f" ({vals})" if vals else ""))
+    more = f"; +{len(diffs) - limit} more" if len(diffs) > limit else ""
+    return "; ".join(parts) + more
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Structural JSON diff (canonical subtree hashes).")
+    ap.add_argument("got")
+    ap.add_argument("golden")
+    ap.add_argument("--ignore-key", action="append", default=[], help="key to ignore at any depth (repeatable)")
+    ap.add_argument("--sort-lists", action="store_true", help="compare lists as multisets")
+    ap.add_argument("--max-diffs", type=int, default=DEFAULT_MAX_DIFFS)
+    args = ap.parse_args()
+
+    ok, diffs = compare_json_files(Path(args.got), Path(args.golden), args.ignore_key, args.sort_lists, args.max_diffs)
+    if ok:
+        print("[ok] equal")
+        return 0
+    print(json.dumps(diffs, ensure_ascii=False, indent=2))
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
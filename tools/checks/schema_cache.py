@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Compiled, cached JSON Schema validators (specs/contract_output/*.schema.json etc.).
+
+- Each schema is read, meta-checked and compiled once per process; the cache is
+  keyed by (path, mtime_ns, size), so an edited schema is picked up, and is
+  shared by all threads (case_runner --jobs). Cache and error format are
+  scripts/_schema_lite.py's, so both validation paths report alike.
+- validate_doc() reports every error (up to a bound), not just the first.
+- validate_jsonl() streams events.jsonl-style files line by line.
+
+Usage:
+  python tools/checks/schema_cache.py <schema.json> <doc.json>
+  python tools/checks/schema_cache.py specs/contract_output/run_events.schema.json runs/<ts>/events.jsonl --jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+from _schema_lite import get_jsonschema_validator as get_validator, jsonschema, jsonschema_errors as _errors  # noqa: E402
+
+DEFAULT_MAX_ERRORS = 50
+
+
+def validate_doc(schema_path: Path, doc: Any, max_errors: int = DEFAULT_MAX_ERRORS) -> List[Dict[str, str]]:
+    """All validation errors (at most `max_errors`) as {path, message, validator}; empty when valid."""
+    return _errors(get_validator(schema_path), doc, max_errors)
+
+
+def validate_jsonl(schema_path: Path, jsonl_path: Path, max_errors: int = DEFAULT_MAX_ERRORS) -> Dict[str, Any]:
+    """Validate every non-empty line of `jsonl_path` without loading the file; errors carry a 1-based `line`."""
+    validator = get_validator(schema_path)
+    lines = invalid = 0
+    errors: List[Dict[str, Any]] = []
+    with jsonl_path.open("r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            lines += 1
+            try:
+                doc = json.loads(line)
+            except ValueError as e:
+                found = [{"path": "/", "message": f"invalid JSON: {e}", "validator": "json"}]
+            else:
+                found = _errors(validator, doc, max(1, max_errors - len(errors)))
+            if found:
+                invalid += 1
+                errors.extend({"line": lineno, **err} for err in found[: max(0, max_errors - len(errors))])
+    return {"lines": lines, "invalid": invalid, "errors": errors}
+
+
+def format_errors(errors: List[Dict[str, Any]], limit: int = 5) -> str:
+    parts = [(f"line {e['line']}: " if "line" in e else "") + f"{e['path']}: {e['message']}" for e in errors[:limit]]
+    more = f"; +{len(errors) - limit} more" if len(errors) > limit else ""
+    return "; ".join(parts) + more
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Validate a JSON document (or JSONL stream) with a cached validator.")
+    ap.add_argument("schema")
+    ap.add_argument("doc")
+    ap.add_argument("--jsonl", action="store_true", help="validate each line of DOC separately (streaming)")
+    ap.add_argument("--max-errors", type=int, default=DEFAULT_MAX_ERRORS)
+    args = ap.parse_args()
+
+    if jsonschema is None:
+        print("[FAIL] jsonschema not installed (pip install jsonschema)")
+        return 2
+    schema, doc = Path(args.schema), Path(args.doc)
+    if args.jsonl:
+        res = validate_jsonl(schema, doc, args.max_errors)
+        errors = res["errors"]
+        print(f"[{'ok' if not res['invalid'] else 'FAIL'}] {res['lines']} line(s), {res['invalid']} invalid")
+    else:
+        errors = validate_doc(schema, json.loads(doc.read_text(encoding="utf-8")), args.max_errors)
+        print(f"[{'ok' if not errors else 'FAIL'}] {len(errors)} error(s)")
+    for e in errors:
+        print(f"  {'line ' + str(e['line']) + ' ' if 'line' in e else ''}{e['path']}: {e['message']}")
+    return 0 if not errors else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
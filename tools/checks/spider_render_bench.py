@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Rendering benchmark for web/graph_spider (canvas tick/forces/draw).
+
+For each graph size a synthetic graph in the demo_graph.json shape
+(gen_graph_fixture.py --format spider) is served in place of demo_graph.json
+(Playwright route), the page is opened with ?perf=1 so spider.js fills
+window.__SPIDER_PERF__, and after --sample-sec we collect:
+- frame time p50/p95 (rAF intervals) and forces()/draw() p50/p95
+- setGraph time, time to first paint, settle time (simulation energy at its floor)
+- JS heap (performance.memory, Chromium only)
+
+Results go to runs/perf/spider_bench/<ts>/report.{json,md}; every run is also
+appended to runs/perf/spider_bench/history.jsonl. A size regresses when its
+frame p95 exceeds the last clean run's (or --baseline's) by more than
+--max-regression (relative) and --min-regression-ms (absolute); any regression
+fails the check (exit 1).
+
+Usage:
+  python tools/checks/spider_render_bench.py                         # 1k/5k/20k/50k nodes
+  python tools/checks/spider_render_bench.py --sizes 1000,5000 --sample-sec 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from gen_graph_fixture import FixtureSpec, render
+from visual_harness import BROWSER_MISSING, PLAYWRIGHT_MISSING, find_repo_root, launch_browser, serve_dir
+
+DEFAULT_SIZES = "1000,5000,20000,50000"
+ENTRY = "web/graph_spider/index.html"
+BENCH_REL = Path("runs") / "perf" / "spider_bench"
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    s = sorted(values)
+    k = (len(s) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+
+def _r(v: Optional[float]) -> Optional[float]:
+    return None if v is None else round(v, 3)
+
+
+async def bench_size(browser, base_url: str, n: int, args: argparse.Namespace) -> Dict[str, Any]:
+    body = render("spider", FixtureSpec(nodes=n, edges=int(n * args.avg_degree), seed=args.seed))
+    context = await browser.new_context(viewport={"width": 1400, "height": 900})
+    try:
+        page = await context.new_page()
+        await page.route("**/demo_graph.json", lambda route: route.fulfill(status=200, content_type="application/json", body=body))
+        await page.goto(f"{base_url}/{ENTRY}?perf=1", wait_until="load", timeout=args.timeout_sec * 1000)
+        await page.wait_for_function(f"window.__SPIDER_PERF__ && window.__SPIDER_PERF__.nodes === {n} "
+                                     "&& window.__SPIDER_PERF__.firstPaintMs !== null", timeout=args.timeout_sec * 1000)
+        await page.wait_for_timeout(int(args.sample_sec * 1000))
+        perf = await page.evaluate("""() => {
+            const p = window.__SPIDER_PERF__;
+            const m = performance.memory || {};
+            return {nodes: p.nodes, links: p.links, frames: p.frames, setGraphMs: p.setGraphMs,
+                    firstPaintMs: p.firstPaintMs, settleMs: p.settleMs,
+                    frameMs: p.frameMs, forcesMs: p.forcesMs, drawMs: p.drawMs,
+                    heapUsed: m.usedJSHeapSize || null, heapTotal: m.totalJSHeapSize || null};
+        }""")
+    finally:
+        await context.close()
+    return {
+        "size": n,
+        "nodes": perf["nodes"],
+        "links": perf["links"],
+        "frames": perf["frames"],
+        "frame_p50_ms": _r(percentile(perf["frameMs"], 0.5)),
+        "frame_p95_ms": _r(percentile(perf["frameMs"], 0.95)),
+        "forces_p50_ms": _r(percentile(perf["forcesMs"], 0.5)),
+        "forces_p95_ms": _r(percentile(perf["forcesMs"], 0.95)),
+        "draw_p50_ms": _r(percentile(perf["drawMs"], 0.5)),
+        "draw_p95_ms": _r(percentile(perf["drawMs"], 0.95)),
+        "set_graph_ms": _r(perf["setGraphMs"]),
+        "first_paint_ms": _r(perf["firstPaintMs"]),
+        "settle_ms": _r(perf["settleMs"]),
+        "heap_used_mb": _r(perf["heapUsed"] / 1e6) if perf["heapUsed"] else None,
+    }
+
+
+async def run_bench(repo: Path, sizes: List[int], args: argparse.Namespace) -> Optional[List[Dict[str, Any]]]:
+    from playwright.async_api import async_playwright
+
+    with serve_dir(repo) as (host, port):
+        async with async_playwright() as play:
+            browser = await launch_browser(play, repo)
+            if browser is None:
+                return None
+            try:
+                results = []
+                # sizes run one at a time: concurrent pages would skew each other's frame times
+                for n in sizes:
+                    try:
+                        res = await bench_size(browser, f"http://{host}:{port}", n, args)
+                    except Exception as e:
+                        res = {"size": n, "error": f"{type(e).__name__}: {e}"}
+                    print(f"[bench] {n} nodes: " + (res.get("error") or
+                          f"frame p50/p95={res['frame_p50_ms']}/{res['frame_p95_ms']} ms, "
+                          f"first paint={res['first_paint_ms']} ms, settle={res['settle_ms']} ms, heap={res['heap_used_mb']} MB"))
+                    results.append(res)
+                return results
+            finally:
+                await browser.close()
+
+
+def load_baseline(bench_dir: Path, baseline: str) -> Dict[int, Dict[str, Any]]:
+    """Per-size results of --baseline (a report.json) or of the last clean run in history.jsonl."""
+    data = None
+    if baseline:
+        data = json.loads(Path(baseline).read_text(encoding="utf-8"))
+    else:
+        hist = bench_dir / "history.jsonl"
+        if hist.exists():
+            # a regressed run never becomes the baseline, so a slowdown cannot hide by repetition
+            for ln in hist.read_text(encoding="utf-8").splitlines():
+                if ln.strip():
+                    rec = json.loads(ln)
+                    if not rec.get("regressions"):
+                        data = rec
+    if not data:
+        return {}
+    return {r["size"]: r for r in data.get("results", []) if "error" not in r}
+
+
+def find_regressions(results: List[Dict[str, Any]], base: Dict[int, Dict[str, Any]], args: argparse.Namespace) -> List[str]:
+    out = []
+    for r in results:
+        if "error" in r:
+            out.append(f"{r['size']} nodes: {r['error']}")
+            continue
+        prev = base.get(r["size"])
+        if not prev or prev.get("frame_p95_ms") is None or r.get("frame_p95_ms") is None:
+            continue
+        old, new = prev["frame_p95_ms"], r["frame_p95_ms"]
+        if new - old > args.min_regression_ms and new > old * (1 + args.max_regression):
+            out.append(f"{r['size']} nodes: frame p95 {old:.2f} -> {new:.2f} ms (+{(new / old - 1) * 100:.0f}%)")
+    return out
+
+
+def write_report(out_dir: Path, report: Dict[str, Any]) -> None:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "report.json").write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    cols = ["size", "links", "frame_p50_ms", "frame_p95_ms", "forces_p95_ms", "draw_p95_ms",
+            "first_paint_ms", "settle_ms", "heap_used_mb"]
+    lines = [f"# Spider render bench ({report['ts']})", "",
+             "| " + " | ".join(cols) + " |", "|" + "---|" * len(cols)]
+    for r in report["results"]:
+        if "error" in r:
+            lines.append(f"| {r['size']} | error: {r['error']} |")
+        else:
+            lines.append("| " + " | ".join("" if r.get(c) is None else str(r.get(c)) for c in cols) + " |")
+    lines += ["", f"Baseline: {report['baseline'] or 'none'}", ""]
+    if report["regressions"]:
+        lines += ["## Regressions", *[f"- {x}" for x in report["regressions"]]]
+    else:
+        lines.append("No regressions.")
+    (out_dir / "report.md").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark graph_spider canvas rendering on synthetic graphs.")
+    ap.add_argument("--sizes", default=DEFAULT_SIZES, help=f"comma-separated node counts (default {DEFAULT_SIZES})")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--avg-degree", type=float, default=1.5, help="links per node (default 1.5)")
+    ap.add_argument("--sample-sec", type=float, default=5.0, help="how long to sample frames after the first paint")
+    ap.add_argument("--timeout-sec", type=int, default=120)
+    ap.add_argument("--baseline", default="", help="report.json to compare against (default: last run in history.jsonl)")
+    ap.add_argument("--max-regression", type=float, default=0.25, help="relative frame p95 increase that fails (default 0.25)")
+    ap.add_argument("--min-regression-ms", type=float, default=2.0, help="ignore p95 increases below this many ms")
+    ap.add_argument("--no-history", action="store_true", help="do not append this run to history.jsonl")
+    args = ap.parse_args()
+
+    repo = find_repo_root(Path("."))
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    try:
+        import playwright.async_api  # noqa: F401
+    except Exception:
+        print(PLAYWRIGHT_MISSING)
+        return 2
+
+    results = asyncio.run(run_bench(repo, sizes, args))
+    if results is None:
+        print(BROWSER_MISSING)
+        return 2
+
+    bench_dir = repo / BENCH_REL
+    base = load_baseline(bench_dir, args.baseline)
+    regressions = find_regressions(results, base, args)
+    ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    report = {
+        "ts": ts,
+        "entry": ENTRY,
+        "seed": args.seed,
+        "avg_degree": args.avg_degree,
+        "sample_sec": args.sample_sec,
+        "baseline": args.baseline or ("history.jsonl (last clean run)" if base else ""),
+        "thresholds": {"max_regression": args.max_regression, "min_regression_ms": args.min_regression_ms},
+        "results": results,
+        "regressions": regressions,
+    }
+    out_dir = bench_dir / ts
+    write_report(out_dir, report)
+    if not args.no_history:
+        with (bench_dir / "history.jsonl").open("a", encoding="utf-8") as f:
+            f.write(json.dumps(report, ensure_ascii=False) + "\n")
+
+    print(f"[bench] report: {out_dir / 'report.md'}")
+    for x in regressions:
+        print(f"[FAIL] regression: {x}")
+    if regressions:
+        return 1
+    print("[PASS] no render regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
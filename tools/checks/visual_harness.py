@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Visual-check harness: one HTTP server + one warm Chromium for many entries/viewports.
+
+- The static server binds its handler with `directory=` (no process-global chdir).
+- The browser launch strategy that worked last time is cached in
+  .sddai/browser_launch.json (keyed by PLAYWRIGHT_BROWSER_CHANNEL /
+  PLAYWRIGHT_CHROMIUM_PATH) and tried first, so later runs skip failed attempts.
+- Every (entry, viewport) target runs in its own browser context, up to
+  --parallel at a time, all in one browser process.
+
+Usage:
+  python tools/checks/visual_harness.py                       # web/graph_spider, web/graph_force, web/index.html
+  python tools/checks/visual_harness.py --entry web/graph_spider/index.html --viewport 1400x900 --viewport 800x600
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import re
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_ENTRIES = ["web/graph_spider/index.html", "web/graph_force/index.html", "web/index.html"]
+DEFAULT_VIEWPORT = (1400, 900)
+LAUNCH_CACHE_REL = Path(".sddai") / "browser_launch.json"
+PLAYWRIGHT_MISSING = "Playwright missing. Install: pip install -r requirements-dev.txt && python -m playwright install"
+BROWSER_MISSING = ("Playwright browser not available. Set PLAYWRIGHT_CHROMIUM_PATH to an existing Chrome/Edge executable, "
+                   "or run: python -m playwright install chromium")
+
+
+def find_repo_root(start: Path) -> Path:
+    cur = start.resolve()
+    for _ in range(12):
+        if (cur / ".git").exists() or ((cur / "README.md").exists() and (cur / "specs").exists()):
+            return cur
+        cur = cur.parent
+    return start.resolve()
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, fmt, *args):
+        return
+
+
+@contextlib.contextmanager
+def serve_dir(root: Path):
+    """Serve `root` on a random localhost port; yields (host, port)."""
+    host = "127.0.0.1"
+    httpd = ThreadingHTTPServer((host, 0), partial(QuietHandler, directory=str(root)))
+    port = httpd.server_address[1]
+    t = threading.Thread(target=httpd.serve_forever, daemon=True)
+    t.start()
+    try:
+        yield host, port
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def launch_attempts() -> List[Dict[str, str]]:
+    """
+    Strategies that avoid downloading Playwright browsers on locked-down machines:
+    1) env PLAYWRIGHT_BROWSER_CHANNEL (e.g., 'msedge' or 'chrome')
+    2) system Edge / Chrome channels
+    3) executable_path from common install locations
+    4) fallback to bundled Playwright Chromium (requires playwright install)
+    """
+    attempts: List[Dict[str, str]] = []
+    env_chan = os.environ.get("PLAYWRIGHT_BROWSER_CHANNEL", "").strip()
+    if env_chan:
+        attempts.append({"channel": env_chan})
+    attempts.append({"channel": "msedge"})
+    attempts.append({"channel": "chrome"})
+
+    common_paths = [
+        r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+        r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+        r"C:\Program Files\Microsoft\Edge\Application\msedge.exe",
+        r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
+    ]
+    env_path = os.environ.get("PLAYWRIGHT_CHROMIUM_PATH")
+    if env_path:
+        common_paths.insert(0, env_path)
+    for pth in common_paths:
+        if Path(pth).exists():
+            attempts.append({"executable_path": pth})
+
+    attempts.append({})
+    return attempts
+
+
+def _launch_key() -> str:
+    return json.dumps({k: os.environ.get(k, "") for k in ("PLAYWRIGHT_BROWSER_CHANNEL", "PLAYWRIGHT_CHROMIUM_PATH")}, sort_keys=True)
+
+
+def _load_launch_cache(repo: Path) -> Optional[Dict[str, str]]:
+    try:
+        data = json.loads((repo / LAUNCH_CACHE_REL).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data.get("opts") if data.get("key") == _launch_key() else None
+
+
+def _save_launch_cache(repo: Path, opts: Dict[str, str]) -> None:
+    try:
+        p = repo / LAUNCH_CACHE_REL
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(json.dumps({"key": _launch_key(), "opts": opts}), encoding="utf-8")
+    except OSError:
+        pass
+
+
+async def launch_browser(play, repo: Path):
+    """Launch headless Chromium, cached strategy first. Returns the browser or None."""
+    attempts = launch_attempts()
+    cached = _load_launch_cache(repo)
+    if cached is not None:
+        attempts = [cached] + [a for a in attempts if a != cached]
+    last_err = None
+    for opts in attempts:
+        try:
+            browser = await play.chromium.launch(headless=True, **opts)
+        except Exception as e:
+            last_err = e
+            continue
+        used = opts.get("channel") or opts.get("executable_path") or "bundled"
+        print(f"[self_check] playwright chromium launched via {used}{' (cached)' if opts == cached else ''}")
+        if opts != cached:
+            _save_launch_cache(repo, opts)
+        return browser
+    print(f"[FAIL] playwright could not launch any browser: {last_err}")
+    return None
+
+
+def evaluate(debug: Any, base_png: bytes, hover_png: bytes, opts: argparse.Namespace) -> Dict[str, Any]:
+    """Pass/fail for one target: deterministic __SPIDER_DEBUG__ checks when exposed, image heuristics otherwise."""
+    from visual_metrics import compare, gray_stats, load_png  # PIL only needed here
+
+    if debug and isinstance(debug, dict):
+        nodes = debug.get("nodesVisible") or debug.get("nodes") or 0
+        edges = debug.get("edgesVisible") or debug.get("edges") or 0
+        hi = debug.get("highlightEdgeCount")
+        fails = []
+        if int(nodes) <= 0:
+            fails.append(f"debug nodesVisible={nodes}")
+        elif int(edges) <= 0:
+            fails.append(f"debug edgesVisible={edges}")
+        elif hi is not None and int(hi) <= 0:
+            fails.append(f"debug highlightEdgeCount={hi}")
+        return {"ok": not fails, "mode": "debug", "fails": fails, "metrics": {"nodes": nodes, "edges": edges},
+                "summary": f"debug ok: nodes={nodes} edges={edges}"}
+
+    base_img, hover_img = load_png(base_png), load_png(hover_png)
+    st = gray_stats(base_img)
+    metrics = {"std": st["std"], "bright": st["bright"], **compare(base_img, hover_img, tiles=opts.tiles)}
+    diff_mean, tile_max = metrics["mean_diff"], metrics["tile_max_diff"]
+    fails = []
+    if st["std"] < opts.min_std:
+        fails.append(f"blank-like: std={st['std']:.2f} < {opts.min_std}")
+    if st["bright"] < opts.min_bright:
+        fails.append(f"too few bright pixels: bright={st['bright']} < {opts.min_bright}")
+    # a hover highlight is small: a whole-image mean dilutes it, the hottest tile does not
+    if diff_mean < opts.min_diff and tile_max < opts.min_tile_diff:
+        fails.append(f"hover interaction not detected (img diff): diff={diff_mean:.2f} < {opts.min_diff}, "
+                     f"tile max={tile_max:.2f} < {opts.min_tile_diff}")
+    summary = (f"render+hover ok | std={st['std']:.2f} bright={st['bright']} diff={diff_mean:.2f} "
+               f"tile_max={tile_max:.2f}@{metrics['tile_max_at']} ssim={metrics['ssim']:.3f} "
+               f"edges={metrics['edge_density_a']:.3f}")
+    return {"ok": not fails, "mode": "image", "fails": fails, "metrics": metrics, "summary": summary}
+
+
+def target_slug(rel: str, viewport: Tuple[int, int]) -> str:
+    stem = re.sub(r"[^A-Za-z0-9]+", "_", rel.rsplit(".", 1)[0]).strip("_")
+    return f"{stem}_{viewport[0]}x{viewport[1]}"
+
+
+async def check_target(browser, base_url: str, rel: str, viewport: Tuple[int, int], opts: argparse.Namespace,
+                       artifacts_dir: Optional[Path], prefix: str = "") -> Dict[str, Any]:
+    w, h = viewport
+    context = await browser.new_context(viewport={"width": w, "height": h})
+    try:
+        page = await context.new_page()
+        await page.goto(f"{base_url}/{rel}", wait_until="load", timeout=opts.timeout_sec * 1000)
+        await page.wait_for_timeout(800)
+        try:
+            debug = await page.evaluate("window.__SPIDER_DEBUG__ || null")
+        except Exception:
+            debug = None
+        base_png = await page.screenshot(full_page=True)
+
+        # hover sweep to trigger highlight, then a click to select
+        for x, y in [(w // 2, h // 2), (w // 2 + 140, h // 2), (w // 2 - 140, h // 2), (w // 2, h // 2 + 120), (w // 2, h // 2 - 120)]:
+            await page.mouse.move(x, y)
+            await page.wait_for_timeout(120)
+        await page.mouse.click(w // 2, h // 2)
+        await page.wait_for_timeout(200)
+        hover_png = await page.screenshot(full_page=True)
+    finally:
+        await context.close()
+
+    # image metrics are CPU-bound; keep the event loop free for the other contexts
+    res = await asyncio.to_thread(evaluate, debug, base_png, hover_png, opts)
+    res.update({"entry": rel, "viewport": f"{w}x{h}"})
+    if artifacts_dir is not None:
+        stem = prefix or target_slug(rel, viewport)
+        artifacts_dir.mkdir(parents=True, exist_ok=True)
+        (artifacts_dir / f"{stem}_base.png").write_bytes(base_png)
+        (artifacts_dir / f"{stem}_hover.png").write_bytes(hover_png)
+        (artifacts_dir / f"{stem}_metrics.json").write_text(json.dumps(res, indent=2, default=str), encoding="utf-8")
+    return res
+
+
+async def run_targets(repo: Path, targets: List[Tuple[str, Tuple[int, int]]], opts: argparse.Namespace,
+                      artifacts_dir: Optional[Path] = None, prefix: str = "") -> Optional[List[Dict[str, Any]]]:
+    """Check every (entry rel path, viewport) with one server and one browser. None if no browser could start."""
+    from playwright.async_api import async_playwright
+
+    sem = asyncio.Semaphore(max(1, opts.parallel))
+    with serve_dir(repo) as (host, port):
+        base_url = f"http://{host}:{port}"
+        async with async_playwright() as play:
+            browser = await launch_browser(play, repo)
+            if browser is None:
+                return None
+
+            async def one(rel: str, vp: Tuple[int, int]) -> Dict[str, Any]:
+                async with sem:
+                    try:
+                        return await check_target(browser, base_url, rel, vp, opts, artifacts_dir, prefix)
+                    except Exception as e:
+                        return {"entry": rel, "viewport": f"{vp[0]}x{vp[1]}", "ok": False, "mode": "error",
+                                "fails": [f"{type(e).__name__}: {e}"], "metrics": {}, "summary": ""}
+
+            try:
+                return list(await asyncio.gather(*(one(rel, vp) for rel, vp in targets)))
+            finally:
+                await browser.close()
+
+
+def parse_viewport(s: str) -> Tuple[int, int]:
+    m = re.fullmatch(r"(\d+)[xX](\d+)", s.strip())
+    if not m:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {s!r}")
+    return int(m.group(1)), int(m.group(2))
+
+
+def add_threshold_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--timeout-sec", type=int, default=90)
+    ap.add_argument("--min-std", type=float, default=10.0)
+    ap.add_argument("--min-bright", type=int, default=1800)
+    ap.add_argument("--min-diff", type=float, default=1.5)
+    ap.add_argument("--tiles", type=int, default=16, help="hover diff grid (tiles x tiles)")
+    ap.add_argument("--min-tile-diff", type=float, default=4.0,
+                    help="hover also counts as detected when one tile's mean diff reaches this")
+    ap.add_argument("--parallel", type=int, default=4, help="browser contexts in flight")
+
+
+def report(results: List[Dict[str, Any]]) -> int:
+    failures = 0
+    for r in results:
+        label = f"{r['entry']} @ {r['viewport']}"
+        if r["ok"]:
+            print(f"[PASS] {label}: {r['summary']}")
+        else:
+            failures += 1
+            for f in r["fails"]:
+                print(f"[FAIL] {label}: {f}")
+    return failures
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Run visual checks for several entries/viewports in one browser.")
+    ap.add_argument("--entry", action="append", default=[], help=f"entry html relative to repo root (default: {', '.join(DEFAULT_ENTRIES)})")
+    ap.add_argument("--viewport", action="append", type=parse_viewport, default=[], help="WIDTHxHEIGHT (repeatable; default 1400x900)")
+    ap.add_argument("--save-artifacts", action="store_true")
+    add_threshold_args(ap)
+    args = ap.parse_args()
+
+    repo = find_repo_root(Path("."))
+    entries = args.entry or [e for e in DEFAULT_ENTRIES if (repo / e).exists()]
+    missing = [e for e in entries if not (repo / e).exists()]
+    if missing or not entries:
+        print(f"[FAIL] entry not found: {', '.join(missing) or 'none of ' + ', '.join(DEFAULT_ENTRIES)}")
+        return 2
+    viewports = args.viewport or [DEFAULT_VIEWPORT]
+
+    try:
+        import playwright.async_api  # noqa: F401
+    except Exception:
+        print(PLAYWRIGHT_MISSING)
+        return 2
+
+    artifacts_dir = None
+    if args.save_artifacts:
+        artifacts_dir = Path(os.environ.get("SDDAI_SELF_CHECK_ARTIFACTS", str(repo / "runs" / "self_check_artifacts"))) / "visual"
+    targets = [(e, vp) for e in entries for vp in viewports]
+    results = asyncio.run(run_targets(repo, targets, args, artifacts_dir))
+    if results is None:
+        print(BROWSER_MISSING)
+        return 2
+    failures = report(results)
+    print(f"[visual] {len(results) - failures}/{len(results)} target(s) passed")
+    return 0 if failures == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
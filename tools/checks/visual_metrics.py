@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Image metrics for visual checks (screenshots from Playwright).
+
+Uses NumPy arrays of the decoded images when NumPy is installed, otherwise
+PIL's C-side ImageStat/ImageFilter (no per-pixel Python loops, except SSIM,
+which then runs on a downscaled copy).
+
+- gray_stats(img)             -> {"mean", "std", "bright"}   (bright: pixels >= 70)
+- mean_abs_diff(a, b)         -> whole-image mean |a-b| in luma
+- tile_diff(a, b, tiles)      -> per-tile mean |a-b| grid (localized changes, e.g. a hover highlight)
+- ssim(a, b)                  -> SSIM over 8x8 blocks, 1.0 = identical
+- edge_density(img)           -> fraction of pixels on an edge
+- compare(a, b)               -> all of the above in one dict
+"""
+
+from __future__ import annotations
+
+import io
+from typing import Any, Dict, List
+
+from PIL import Image, ImageChops, ImageFilter, ImageStat
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None
+
+BRIGHT_MIN = 70
+EDGE_THRESHOLD = 32
+SSIM_BLOCK = 8
+SSIM_FALLBACK_WIDTH = 320
+_C1 = (0.01 * 255) ** 2
+_C2 = (0.03 * 255) ** 2
+
+
+def load_png(data: bytes) -> Image.Image:
+    return Image.open(io.BytesIO(data)).convert("RGB")
+
+
+def _gray(img: Image.Image) -> Image.Image:
+    return img if img.mode == "L" else img.convert("L")
+
+
+def _same_size(a: Image.Image, b: Image.Image) -> Image.Image:
+    return b if a.size == b.size else b.resize(a.size)
+
+
+def gray_stats(img: Image.Image) -> Dict[str, float]:
+    g = _gray(img)
+    if np is not None:
+        arr = np.asarray(g)
+        return {"mean": float(arr.mean()), "std": float(arr.std()), "bright": int(np.count_nonzero(arr >= BRIGHT_MIN))}
+    st = ImageStat.Stat(g)
+    return {"mean": st.mean[0], "std": st.stddev[0], "bright": sum(g.histogram()[BRIGHT_MIN:])}
+
+
+def _diff_gray(a: Image.Image, b: Image.Image) -> Image.Image:
+    return ImageChops.difference(a, _same_size(a, b)).convert("L")
+
+
+def mean_abs_diff(a: Image.Image, b: Image.Image) -> float:
+    return float(ImageStat.Stat(_diff_gray(a, b)).mean[0])
+
+
+def tile_diff(a: Image.Image, b: Image.Image, tiles: int = 16) -> List[List[float]]:
+    """tiles x tiles grid of mean luma differences (edge remainders fold into the last row/column)."""
+    d = _diff_gray(a, b)
+    w, h = d.size
+    xs = [w * i // tiles for i in range(tiles + 1)]
+    ys = [h * j // tiles for j in range(tiles + 1)]
+    if np is not None:
+        arr = np.asarray(d, dtype=np.float64)
+        # 2D prefix sums: every tile mean is four lookups
+        s = np.zeros((h + 1, w + 1))
+        s[1:, 1:] = arr.cumsum(0).cumsum(1)
+        grid = []
+        for j in range(tiles):
+            row = []
+            for i in range(tiles):
+                y0, y1, x0, x1 = ys[j], ys[j + 1], xs[i], xs[i + 1]
+                area = max(1, (y1 - y0) * (x1 - x0))
+                row.append(float((s[y1, x1] - s[y0, x1] - s[y1, x0] + s[y0, x0]) / area))
+            grid.append(row)
+        return grid
+    return [
+        [ImageStat.Stat(d.crop((xs[i], ys[j], xs[i + 1], ys[j + 1]))).mean[0] for i in range(tiles)]
+        for j in range(tiles)
+    ]
+
+
+def _ssim_blocks(mx, my, vx, vy, cxy) -> float:
+    return ((2 * mx * my + _C1) * (2 * cxy + _C2)) / ((mx * mx + my * my + _C1) * (vx + vy + _C2))
+
+
+def ssim(a: Image.Image, b: Image.Image, block: int = SSIM_BLOCK) -> float:
+    ga, gb = _gray(a), _gray(_same_size(a, b))
+    if np is None:
+        # pure-Python block stats on a downscaled copy
+        if ga.width > SSIM_FALLBACK_WIDTH:
+            size = (SSIM_FALLBACK_WIDTH, max(block, ga.height * SSIM_FALLBACK_WIDTH // ga.width))
+            ga, gb = ga.resize(size, Image.BOX), gb.resize(size, Image.BOX)
+        w, h = ga.size
+        pa, pb = list(ga.getdata()), list(gb.getdata())
+        scores = []
+        n = block * block
+        for y0 in range(0, h - block + 1, block):
+            for x0 in range(0, w - block + 1, block):
+                xs = [pa[(y0 + dy) * w + x0 + dx] for dy in range(block) for dx in range(block)]
+                ys = [pb[(y0 + dy) * w + x0 + dx] for dy in range(block) for dx in range(block)]
+                mx, my = sum(xs) / n, sum(ys) / n
+                vx = sum((v - mx) ** 2 for v in xs) / n
+                vy = sum((v - my) ** 2 for v in ys) / n
+                cxy = sum((p - mx) * (q - my) for p, q in zip(xs, ys)) / n
+                scores.append(_ssim_blocks(mx, my, vx, vy, cxy))
+        return float(sum(scores) / len(scores)) if scores else 1.0
+    x = np.asarray(ga, dtype=np.float64)
+    y = np.asarray(gb, dtype=np.float64)
+    h, w = (x.shape[0] // block) * block, (x.shape[1] // block) * block
+    if h == 0 or w == 0:
+        return 1.0
+
+    def blocks(arr):
+        return arr[:h, :w].reshape(h // block, block, w // block, block)
+
+    bx, by = blocks(x), blocks(y)
+    mx, my = bx.mean(axis=(1, 3)), by.mean(axis=(1, 3))
+    vx, vy = bx.var(axis=(1, 3)), by.var(axis=(1, 3))
+    cxy = (bx * by).mean(axis=(1, 3)) - mx * my
+    return float(_ssim_blocks(mx, my, vx, vy, cxy).mean())
+
+
+def edge_density(img: Image.Image, threshold: int = EDGE_THRESHOLD) -> float:
+    edges = _gray(img).filter(ImageFilter.FIND_EDGES)
+    total = edges.width * edges.height or 1
+    if np is not None:
+        return float(np.count_nonzero(np.asarray(edges) >= threshold) / total)
+    return sum(edges.histogram()[threshold:]) / total
+
+
+def compare(a: Image.Image, b: Image.Image, tiles: int = 16) -> Dict[str, Any]:
+    grid = tile_diff(a, b, tiles)
+    flat = [(v, j, i) for j, row in enumerate(grid) for i, v in enumerate(row)]
+    peak = max(flat) if flat else (0.0, 0, 0)
+    return {
+        "mean_diff": mean_abs_diff(a, b),
+        "tile_max_diff": peak[0],
+        "tile_max_at": [peak[1], peak[2]],
+        "tiles": tiles,
+        "tile_diff": grid,
+        "ssim": ssim(a, b),
+        "edge_density_a": edge_density(a),
+        "edge_density_b": edge_density(b),
+    }
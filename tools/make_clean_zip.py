@@ -2,15 +2,38 @@
 """
 Create a clean zip of the repository that excludes build artifacts and caches.
 Default output: dist/clean_repo.zip
+
+Members are deflated in worker processes (raw deflate streams) and stitched
+into the archive in path order; already-compressed types are stored as-is.
+With --update, members of the previous zip whose size and CRC still match are
+copied over byte-for-byte without recompressing (the file is read, not deflated;
+zip mtimes have 2 s resolution, so they are not trusted on their own).
 """
 
 import argparse
+import os
+import struct
+import sys
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import zipfile
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from ai_apply.util import walk_files  # noqa: E402
+
 EXCLUDE_DIRS = {"build", "dist", "runs", ".git", "__pycache__"}
 EXCLUDE_FILES = {"patch_debug.txt"}
 EXCLUDE_SUFFIXES = {".log", ".tmp"}
+# deflating these costs CPU and saves (almost) nothing
+STORED_SUFFIXES = {
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".ico", ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z",
+    ".woff", ".woff2", ".mp3", ".mp4", ".webm", ".pdf", ".sqlite",
+}
+CHUNK_BYTES = 4 * 1024 * 1024
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")
 
 
 def should_skip(rel_path: Path, output_path: Path) -> bool:
@@ -27,22 +50,180 @@ def should_skip(rel_path: Path, output_path: Path) -> bool:
     return False
 
 
-def make_clean_zip(root: Path, out: Path) -> Path:
+def _compress_file(path: str, store: bool) -> tuple:
+    """-> (crc, file_size, compress_type, payload)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    crc = zlib.crc32(data)
+    if not store:
+        co = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        packed = co.compress(data) + co.flush()
+        if len(packed) < len(data):
+            return crc, len(data), zipfile.ZIP_DEFLATED, packed
+    return crc, len(data), zipfile.ZIP_STORED, data
+
+
+def _compress_chunk(items: list) -> list:
+    return [_compress_file(path, store) for path, store in items]
+
+
+def _file_crc(path: str) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+def _raw_member(fp, info: zipfile.ZipInfo) -> bytes:
+    """Compressed bytes of `info` exactly as stored in the old archive."""
+    fp.seek(info.header_offset)
+    header = LOCAL_HEADER.unpack(fp.read(LOCAL_HEADER.size))
+    fp.seek(header[-2] + header[-1], os.SEEK_CUR)  # name + extra
+    return fp.read(info.compress_size)
+
+
+def _add_raw(zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, crc: int, size: int, compress_type: int, payload: bytes) -> None:
+    """Append an already-compressed member (what ZipFile.write does, minus the compression)."""
+    zinfo.compress_type = compress_type
+    zinfo.CRC = crc
+    zinfo.file_size = size
+    zinfo.compress_size = len(payload)
+    zinfo.flag_bits = 0
+    zip64 = size > zipfile.ZIP64_LIMIT or len(payload) > zipfile.ZIP64_LIMIT
+    zf.fp.seek(zf.start_dir)
+    zinfo.header_offset = zf.fp.tell()
+    zf._writecheck(zinfo)
+    zf._didModify = True
+    zf.fp.write(zinfo.FileHeader(zip64))
+    zf.fp.write(payload)
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+    zf.start_dir = zf.fp.tell()
+
+
+def _chunks(todo: list) -> list:
+    out, cur, size = [], [], 0
+    for item, nbytes in todo:
+        cur.append(item)
+        size += nbytes
+        if size >= CHUNK_BYTES:
+            out.append(cur)
+            cur, size = [], 0
+    if cur:
+        out.append(cur)
+    return out
+
+
+def _compressed(chunks: list, jobs: int):
+    """Yield compressed members in chunk order; at most 2*jobs chunks are in flight."""
+    if jobs <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from _compress_chunk(chunk)
+        return
+    it = iter(chunks)
+    pending = deque()
+    ex = ProcessPoolExecutor(max_workers=min(jobs, len(chunks)))
+    try:
+        while True:
+            while len(pending) < 2 * jobs:
+                chunk = next(it, None)
+                if chunk is None:
+                    break
+                pending.append(ex.submit(_compress_chunk, chunk))
+            if not pending:
+                break
+            yield from pending.popleft().result()
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+
+
+def make_clean_zip(root: Path, out: Path, jobs: int = 0, update: bool = False, stats: dict = None) -> Path:
     root = root.resolve()
     out = out.resolve()
     out.parent.mkdir(parents=True, exist_ok=True)
     rel_out = out.relative_to(root) if out.is_relative_to(root) else None
+    stats = stats if stats is not None else {}
+    t0 = time.perf_counter()
 
-    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        for path in root.rglob("*"):
-            if path.is_dir():
-                continue
-            rel = path.relative_to(root)
-            if rel_out is not None and rel == rel_out:
-                continue
-            if should_skip(rel, rel_out or Path("")):
+    # excluded dirs are pruned before descending; .gitignore/.sddaiignore are honored
+    walked = walk_files(root, skip_dirs=EXCLUDE_DIRS)
+    members = []
+    for fe in walked.files:
+        rel = Path(fe.rel)
+        if rel_out is not None and rel == rel_out:
+            continue
+        if should_skip(rel, rel_out or Path("")):
+            continue
+        members.append((fe, zipfile.ZipInfo.from_file(fe.path, fe.rel)))
+
+    old = None
+    if update and out.exists():
+        try:
+            old = zipfile.ZipFile(out)
+        except zipfile.BadZipFile:
+            old = None
+    old_fp = open(out, "rb") if old is not None else None
+
+    # decide per member: reuse from the old zip, or (re)compress
+    plan = []  # (zinfo, old ZipInfo to copy | index into todo)
+    todo = []
+    reused = crc_checked = 0
+    for fe, zinfo in members:
+        prev = old.NameToInfo.get(fe.rel) if old is not None else None
+        if prev is not None and prev.file_size == fe.size and prev.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            crc_checked += 1
+            if _file_crc(fe.path) == prev.CRC:
+                plan.append((zinfo, prev))
+                reused += 1
                 continue
-            zf.write(path, rel.as_posix())
+        store = Path(fe.rel).suffix.lower() in STORED_SUFFIXES
+        plan.append((zinfo, len(todo)))
+        todo.append(((fe.path, store), fe.size))
+
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    chunks = _chunks(todo)
+    tmp = out.with_name(out.name + ".part")
+    in_bytes = out_bytes = stored = 0
+    try:
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            compressed = _compressed(chunks, jobs)
+            try:
+                for zinfo, src in plan:
+                    if isinstance(src, zipfile.ZipInfo):
+                        payload = _raw_member(old_fp, src)
+                        _add_raw(zf, zinfo, src.CRC, src.file_size, src.compress_type, payload)
+                        crc, size, ctype = src.CRC, src.file_size, src.compress_type
+                    else:
+                        crc, size, ctype, payload = next(compressed)
+                        _add_raw(zf, zinfo, crc, size, ctype, payload)
+                    in_bytes += size
+                    out_bytes += len(payload)
+                    stored += ctype == zipfile.ZIP_STORED
+            finally:
+                compressed.close()
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    finally:
+        if old_fp is not None:
+            old_fp.close()
+        if old is not None:
+            old.close()
+    os.replace(tmp, out)
+
+    stats.update({
+        "files": len(plan),
+        "reused": reused,
+        "crc_checked": crc_checked,
+        "compressed": len(todo),
+        "stored": stored,
+        "jobs": jobs,
+        "in_bytes": in_bytes,
+        "out_bytes": out_bytes,
+        "seconds": time.perf_counter() - t0,
+    })
     return out
 
 
@@ -50,6 +231,8 @@ def main():
     parser = argparse.ArgumentParser(description="Create a clean zip without build/dist/runs/git artifacts.")
     parser.add_argument("--root", default=".", help="repository root (default: current directory)")
     parser.add_argument("--out", default="dist/clean_repo.zip", help="output zip path (default: dist/clean_repo.zip)")
+    parser.add_argument("--jobs", type=int, default=0, help="compression worker processes (default: CPU count; 1 = in-process)")
+    parser.add_argument("--update", action="store_true", help="reuse unchanged members of the existing output zip")
     args = parser.parse_args()
 
     root = Path(args.root)
@@ -58,8 +241,16 @@ def main():
     if not root.exists():
         parser.error(f"root does not exist: {root}")
 
-    result = make_clean_zip(root, out)
+    stats = {}
+    result = make_clean_zip(root, out, jobs=args.jobs, update=args.update, stats=stats)
+    mb_in = stats["in_bytes"] / 1e6
+    sec = max(stats["seconds"], 1e-6)
     print(f"[ok] wrote {result}")
+    print(
+        f"[stats] {stats['files']} files ({stats['reused']} reused, {stats['compressed']} compressed, "
+        f"{stats['stored']} stored) {mb_in:.2f} MB -> {stats['out_bytes'] / 1e6:.2f} MB "
+        f"in {sec:.2f}s ({mb_in / sec:.1f} MB/s, {stats['files'] / sec:.0f} files/s, jobs={stats['jobs']})"
+    )
 
 
 if __name__ == "__main__":
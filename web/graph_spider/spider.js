@@ -71,7 +71,7 @@ function enrichDirs(){const CAP=2500;const did=p=>`dir:${p}`;const exists=new Se
 function buildAdj(){by=new Map(nodes.map(n=>[n.id,n]));deg=new Map(nodes.map(n=>[n.id,0]));adj=new Map(nodes.map(n=>[n.id,new Set()]));out=new Map(nodes.map(n=>[n.id,new Set()]));inn=new Map(nodes.map(n=>[n.id,new Set()]));for(const e of links){const s=e.source,t=e.target;if(!by.has(s)||!by.has(t))continue;deg.set(s,(deg.get(s)||0)+1);deg.set(t,(deg.get(t)||0)+1);adj.get(s).add(t);adj.get(t).add(s);out.get(s).add(t);inn.get(t).add(s)}}
 function tiers(){const ds=nodes.map(n=>deg.get(n.id)||0).sort((a,b)=>a-b);const p95=ds[Math.floor(ds.length*.95)]||0;const p80=ds[Math.floor(ds.length*.80)]||0;for(const n of nodes){const d0=deg.get(n.id)||0;const l=(n.label||'').toLowerCase();const p=(n.path||'').toLowerCase();const pinned=l.includes('overview')||p.includes('00_overview')||l.includes('runbook')||p.includes('runbook')||p.endsWith('readme.md')||l==='readme';if(typeof n.importance!=='number')n.importance=d0+(pinned?12:0)+(n.group==='dir'?1:0);if(!n.tier){if(pinned)n.tier='P0';else if(d0>=p95)n.tier='P1';else if(d0>=p80)n.tier='P2';else n.tier='P3'}const baseR=(n.group==='dir')?5:4;if(n.tier==='P0')n.r=Math.max(n.r,baseR+3);else if(n.tier==='P1')n.r=Math.max(n.r,baseR+2);else if(n.tier==='P2')n.r=Math.max(n.r,baseR+1.2);else n.r=Math.max(n.r,baseR)}}
 function initPos(){for(const n of nodes){const a=H01(n.id)*Math.PI*2;const rr=ring(n.tier);const j=(H01(n.id+':j')-.5)*35;const r=Math.max(0,rr+j);if(!Number.isFinite(n.x)||!Number.isFinite(n.y)){n.x=Math.cos(a)*r;n.y=Math.sin(a)*r}n.vx=0;n.vy=0;n.fx=null;n.fy=null}let hub=nodes[0]||null;for(const n of nodes)if((n.importance||0)>(hub?.importance||0))hub=n;if(hub){hub.x=0;hub.y=0;sel=hub.id;}}
-function setGraph(g){hasGraph=true;const norm=normalize(g);nodes=norm.nodes;links=norm.links;by=new Map(nodes.map(n=>[n.id,n]));enrichDirs();buildAdj();tiers();initPos();overview({init:true});E=1;T(`Loaded: ${nodes.length} nodes / ${links.length} links`);emitSelected();}
+function setGraph(g){const pf0=performance.now();hasGraph=true;const norm=normalize(g);nodes=norm.nodes;links=norm.links;by=new Map(nodes.map(n=>[n.id,n]));enrichDirs();buildAdj();tiers();initPos();overview({init:true});E=1;T(`Loaded: ${nodes.length} nodes / ${links.length} links`);emitSelected();if(PF){Object.assign(PF,{nodes:nodes.length,links:links.length,graphSetMs:pf0,setGraphMs:performance.now()-pf0,firstPaintMs:null,settleMs:null,frames:0,frameMs:[],forcesMs:[],drawMs:[],_ts:null})}}
 
 const P={linkDist:55,linkK:.010,repulsion:1700,repMax:8,centerK:.0015,ringK:.010,damp:.86,collide:6.5,step:1};
 function grid(size){const g=new Map();for(let i=0;i<viewNodes.length;i++){const n=viewNodes[i];const cx=Math.floor(n.x/size),cy=Math.floor(n.y/size);const k=cx+','+cy;let a=g.get(k);if(!a)g.set(k,a=[]);a.push(i)}return g}
@@ -130,7 +130,10 @@ function draw(){x.setTransform(1,0,0,1,0,0);x.fillStyle='#000000';x.fillRect(0,0
  for(const n of nodes){if(viewIds.size&&!viewIds.has(n.id))continue;const isSel=n.id===sel,isH=n.id===hover,imp=n.tier==='P0'||n.tier==='P1';const rr=(n.r+(isH?2.3:0)+(isSel?1.8:0))/v.k;x.beginPath();x.arc(n.x,n.y,rr,0,Math.PI*2);let fillColor,shadowColor;if(n.tier==='P0'){fillColor='rgba(255,200,100,.95)';shadowColor='rgba(255,200,100,.45)';}else if(n.tier==='P1'){fillColor='rgba(112,255,210,.95)';shadowColor='rgba(112,255,210,.35)';}else if(n.tier==='P2'){fillColor='rgba(150,200,255,.82)';shadowColor='rgba(150,200,255,.25)';}else{fillColor='rgba(120,160,200,.72)';shadowColor='rgba(120,160,200,.18)';}if(n.group==='dir'){fillColor=fillColor.replace(/\.[\d]+\)/,`,.65)`);x.beginPath();const s=rr*.85;x.moveTo(n.x-s,n.y-s);x.lineTo(n.x+s,n.y-s);x.lineTo(n.x+s,n.y+s*.6);x.lineTo(n.x,n.y+s);x.lineTo(n.x-s,n.y+s*.6);x.closePath();}x.fillStyle=fillColor;x.shadowColor=shadowColor;x.shadowBlur=(isH||isSel||imp)?14/v.k:6/v.k;x.fill();x.shadowBlur=0;x.lineWidth=(isSel?2.4:1)/v.k;x.strokeStyle=isSel?'rgba(240,250,255,.9)':'rgba(255,255,255,.18)';x.stroke()}
  const z=v.k/d;const bud=z>1.2?220:(z>0.9?120:70);const sorted=[...nodes].filter(n=>viewIds.has(n.id)).sort((a,b)=>(b.importance||0)-(a.importance||0));let used=0;for(const n of sorted){const show=n.id===sel||n.id===hover||n.tier==='P0'||n.tier==='P1'||(used<bud&&z>0.75);if(!show)continue;const l=n.label||n.id;label(l,n.x+(n.r+10)/v.k,n.y,n.id===sel||n.id===hover?1:(n.tier==='P0'||n.tier==='P1'?0.9:0.65));if(n.tier!=='P0'&&n.tier!=='P1')used++;if(used>=bud)break}
  x.restore()}
-function tick(){forces();draw();requestAnimationFrame(tick)}requestAnimationFrame(tick);
+// perf hook for tools/checks/spider_render_bench.py; only active with ?perf=1
+const PF=/[?&]perf=1(&|$)/.test(location.search)?(window.__SPIDER_PERF__={nodes:0,links:0,graphSetMs:null,firstPaintMs:null,settleMs:null,frames:0,frameMs:[],forcesMs:[],drawMs:[],_ts:null}):null;
+function pfPush(a,v){if(a.length>=20000)a.shift();a.push(v)}
+function tick(ts){if(PF){const t0=performance.now();forces();const t1=performance.now();draw();const t2=performance.now();if(PF.graphSetMs!=null){PF.frames++;if(PF._ts!=null)pfPush(PF.frameMs,ts-PF._ts);PF._ts=ts;pfPush(PF.forcesMs,t1-t0);pfPush(PF.drawMs,t2-t1);if(PF.firstPaintMs==null)PF.firstPaintMs=t2-PF.graphSetMs;if(PF.settleMs==null&&E<=.0201)PF.settleMs=t2-PF.graphSetMs}}else{forces();draw()}requestAnimationFrame(tick)}requestAnimationFrame(tick);
 function results(list){ui.results.innerHTML='';if(!list.length){ui.results.classList.add('hidden');return}ui.results.classList.remove('hidden');for(const n of list){const el=document.createElement('div');el.className='result-item';const t=document.createElement('div');t.className='result-title';t.textContent=n.label||n.id;const s=document.createElement('div');s.className='result-sub';s.textContent=n.path||n.group||n.id;el.appendChild(t);el.appendChild(s);el.addEventListener('click',()=>{ui.results.classList.add('hidden');ui.search.value='';focus(n.id,{push:true,anim:true})});ui.results.appendChild(el)}}
 ui.search.addEventListener('input',()=>{const q=ui.search.value.trim().toLowerCase();if(!q){results([]);return}const hits=[];for(const n of nodes){const hay=(String(n.label)+' '+String(n.path)+' '+String(n.id)).toLowerCase();if(hay.includes(q))hits.push(n);if(hits.length>=120)break}results(hits)});document.addEventListener('pointerdown',(e)=>{if(e.target===ui.search||ui.results.contains(e.target))return;ui.results.classList.add('hidden')});
 c.addEventListener('dblclick',(e)=>{if(!sel)return;const n=by.get(sel);if(n&&isCollapsible(sel)){e.preventDefault();drillDown(sel);}else{setRoot(sel,{push:true,anim:false});}});